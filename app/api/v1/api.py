@@ -1,5 +1,7 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import chat
+from app.api.v1.endpoints import cache, chat, stats
 
 api_router = APIRouter()
 api_router.include_router(chat.router, tags=["chat"])
+api_router.include_router(stats.router, tags=["stats"])
+api_router.include_router(cache.router, tags=["cache"])
@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Depends
+from app.core.security import verify_service_key
+from app.services.service_container import services
+
+router = APIRouter()
+
+@router.post("/cache/invalidate", dependencies=[Depends(verify_service_key)])
+async def invalidate_response_cache():
+    """Drops every cached answer held by this worker."""
+    services.get_rag_service().response_cache.clear()
+    return {"status": "ok"}
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from app.models.schemas import ChatRequest, ChatResponse
 from app.services.rag_service import RAGService
+from app.services.service_container import services
 from app.core.security import verify_service_key
 from fastapi.responses import StreamingResponse
 import structlog
@@ -10,8 +11,8 @@ log = structlog.get_logger()
 
 router = APIRouter()
 
-def get_rag_service():
-    return RAGService()
+def get_rag_service() -> RAGService:
+    return services.get_rag_service()
 
 async def _stream_event_generator(rag_service: RAGService, request: ChatRequest):
     try:
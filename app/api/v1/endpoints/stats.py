@@ -0,0 +1,10 @@
+from fastapi import APIRouter, Depends
+from app.core.security import verify_service_key
+from app.services.service_container import services
+
+router = APIRouter()
+
+@router.get("/stats/pools", dependencies=[Depends(verify_service_key)])
+async def pool_stats():
+    """Connection-pool and service reuse statistics for the shared service container."""
+    return services.stats()
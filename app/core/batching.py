@@ -0,0 +1,74 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item calls into one batched call.
+
+    Items submitted within *window_ms* of the first pending item (or until
+    *max_batch* distinct items are pending) are handed to *handler* as one list.
+    Identical keys submitted while pending share a single slot in the batch;
+    every caller gets its own result back.
+    """
+
+    def __init__(self, handler: Callable[[List[str]], Awaitable[list]], window_ms: float, max_batch: int):
+        self.handler = handler
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.calls = 0
+        self.deduplicated = 0
+        self.batches = 0
+        self.batched_items = 0
+
+    async def submit(self, key: str):
+        self.calls += 1
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[key] = future
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._flush)
+        else:
+            self.deduplicated += 1
+        # shield: one cancelled caller must not cancel the shared result for the others
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        self.batches += 1
+        self.batched_items += len(batch)
+        asyncio.get_running_loop().create_task(self._run(batch))
+
+    async def _run(self, batch: Dict[str, asyncio.Future]):
+        keys = list(batch)
+        try:
+            results = await self.handler(keys)
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+                # Mark retrieved so callers that were cancelled don't trigger warnings
+                future.exception()
+            return
+        for key, result in zip(keys, results):
+            if not batch[key].done():
+                batch[key].set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "deduplicated": self.deduplicated,
+            "batches": self.batches,
+            "avg_batch_size": round(self.batched_items / self.batches, 2) if self.batches else 0.0,
+        }
@@ -0,0 +1,110 @@
+import httpx
+import structlog
+import redis.asyncio as redis
+from typing import Optional
+from openai import AsyncOpenAI
+from app.core.config import settings
+
+log = structlog.get_logger()
+
+
+class HTTPPoolStats:
+    """
+    Counts outgoing requests and newly opened TCP connections on a shared
+    httpx client so we can tell how often pooled connections are reused.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.connections_opened = 0
+
+    async def on_request(self, request: httpx.Request):
+        self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    async def _trace(self, event_name: str, info: dict):
+        if event_name == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+
+    def snapshot(self) -> dict:
+        reused = max(self.requests - self.connections_opened, 0)
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "reuse_rate": round(reused / self.requests, 4) if self.requests else 0.0,
+        }
+
+
+def create_http_client(stats: Optional[HTTPPoolStats] = None) -> httpx.AsyncClient:
+    """Builds the process-wide HTTP/2 client used by every OpenAI call."""
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    )
+    event_hooks = {"request": [stats.on_request]} if stats else None
+    try:
+        return httpx.AsyncClient(http2=True, limits=limits, event_hooks=event_hooks)
+    except ImportError:
+        # http2=True needs the optional 'h2' package (httpx[http2])
+        log.warning("h2 not installed, shared HTTP client falling back to HTTP/1.1")
+        return httpx.AsyncClient(limits=limits, event_hooks=event_hooks)
+
+
+def create_openai_client(http_client: Optional[httpx.AsyncClient] = None) -> AsyncOpenAI:
+    return AsyncOpenAI(api_key=settings.OPENAI_API_KEY, http_client=http_client)
+
+
+def redis_connection_kwargs() -> dict:
+    """Connection options shared by the async service client and the sync pipeline scripts."""
+    # Upstash and most cloud providers need SSL for rediss:// (the scheme already
+    # selects an SSL connection; plain connections reject the ssl_* options)
+    if settings.REDIS_URL.startswith("rediss://"):
+        return {"ssl_cert_reqs": None} # Let redis-py handle it based on URL
+    return {}
+
+
+def create_redis_client():
+    """
+    Returns a Redis client backed by its own connection pool, or None if Redis is unusable.
+    Responses are raw bytes (binary embedding cache entries share the pool); text
+    callers decode what they read.
+    """
+    try:
+        return redis.from_url(
+            settings.REDIS_URL,
+            decode_responses=False,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            **redis_connection_kwargs(),
+        )
+    except Exception as e:
+        log.error("Failed to initialize Redis", error=str(e))
+        return None # Fallback to no cache
+
+
+def http_pool_snapshot(client: httpx.AsyncClient) -> dict:
+    """Current connection counts of an httpx client's pool (best effort, uses httpcore internals)."""
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []) or [])
+    idle = sum(1 for c in connections if c.is_idle())
+    return {
+        "open_connections": len(connections),
+        "idle_connections": idle,
+        "active_connections": len(connections) - idle,
+    }
+
+
+def redis_pool_snapshot(client) -> dict:
+    """Current connection counts of a redis.asyncio client's pool."""
+    pool = getattr(client, "connection_pool", None)
+    if pool is None:
+        return {"enabled": False}
+    available = len(getattr(pool, "_available_connections", []) or [])
+    in_use = len(getattr(pool, "_in_use_connections", []) or [])
+    return {
+        "enabled": True,
+        "max_connections": pool.max_connections,
+        "open_connections": available + in_use,
+        "in_use_connections": in_use,
+        "idle_connections": available,
+    }
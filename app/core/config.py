@@ -15,8 +15,81 @@ class Settings(BaseSettings):
     MILVUS_TOKEN: Optional[str] = None
     MILVUS_COLLECTION_NAME: str = "lebanese_laws"
     MILVUS_DIMENSION: int = 1536
+    # Native async search via pymilvus.AsyncMilvusClient (falls back to a thread pool if unavailable)
+    MILVUS_ASYNC_CLIENT: bool = True
+    MILVUS_SEARCH_CONCURRENCY: int = 32
+    # HNSW search breadth; raised to the requested limit when lower (data_pipeline/benchmark_retrieval.py)
+    MILVUS_SEARCH_EF: int = 10
+    # milvus | local (in-process snapshot index only) | fallback (Milvus, local index when Milvus fails)
+    VECTOR_STORE_BACKEND: str = "milvus"
+    LOCAL_INDEX_PATH: str = "data/vector_snapshot"
+    LOCAL_INDEX_DTYPE: str = "float32"  # float32 (memory-mapped) | int8 (in RAM, 4x smaller)
+    LOCAL_INDEX_NLIST: int = 0  # > 0 builds an IVF coarse quantizer with this many lists
+    LOCAL_INDEX_NPROBE: int = 8
+
+    # Hybrid retrieval: BM25 over text_content fused with Milvus results (reciprocal rank fusion)
+    HYBRID_SEARCH_ENABLED: bool = True
+    LEXICAL_INDEX_PATH: str = "data/lexical_index.npz"
+    HYBRID_CANDIDATES: int = 20
+    HYBRID_RRF_K: int = 60
+    # Exact (law, article) / (court, ruling, year) lookup that answers pinpoint citations without search
+    CITATION_LOOKUP_ENABLED: bool = True
+    CITATION_INDEX_PATH: str = "data/citation_index.json"
+    # Search only the source_type partitions a query asks for (articles, rulings or both);
+    # a mix searches both concurrently and reserves SOURCE_RULING_SHARE of the results for rulings
+    SOURCE_ROUTING_ENABLED: bool = True
+    SOURCE_RULING_SHARE: float = 0.4
+    # Context packing: whole-prompt token budget (system prompt, context, history, query), tokens kept
+    # for context before the oldest history turns are dropped, per-document window, and the shingle
+    # Jaccard similarity above which a chunk is a near-duplicate of a higher-ranked one
+    TOKENIZER_MODEL: str = "gpt-4o-mini"
+    PROMPT_TOKEN_BUDGET: int = 8000
+    CONTEXT_MIN_TOKENS: int = 1500
+    CONTEXT_DOC_MAX_TOKENS: int = 700
+    CONTEXT_DEDUP_THRESHOLD: float = 0.8
     
     REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_MAX_CONNECTIONS: int = 50
+
+    # Run intent classification, query rewrite and raw-query embedding concurrently
+    PARALLEL_PRE_RETRIEVAL: bool = True
+
+    # Embeddings: concurrent single-text calls within the window share one request
+    EMBEDDING_BATCH_WINDOW_MS: float = 5.0
+    EMBEDDING_BATCH_MAX_SIZE: int = 64
+    EMBEDDING_MAX_INPUTS_PER_REQUEST: int = 512
+    EMBEDDING_CACHE_DTYPE: str = "float32"  # float32 | float16 | int8 (Redis only; the store keeps float32)
+    EMBEDDING_L1_MAX_BYTES: int = 64 * 1024 * 1024
+    EMBEDDING_STORE_PATH: str = "data/embedding_store.sqlite"  # durable tier behind Redis; "" disables
+
+    # Answer cache (exact + semantic tiers). The semantic tier uses the
+    # raw-query embedding, so it needs PARALLEL_PRE_RETRIEVAL.
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL: int = 86400
+    RESPONSE_CACHE_MAX_ENTRIES: int = 2000
+    RESPONSE_CACHE_SIMILARITY_THRESHOLD: float = 0.97
+    RESPONSE_CACHE_VERSION_CHECK_INTERVAL: float = 30.0
+
+    # Local zero-LLM intent pre-classifier (lexicons + optional n-gram linear model)
+    INTENT_LOCAL_ENABLED: bool = True
+    INTENT_LOCAL_THRESHOLD: float = 0.9
+    INTENT_MODEL_PATH: Optional[str] = None
+
+    # Query rewrite / intent label cache (in-process LRU + Redis)
+    LLM_CACHE_MAX_ENTRIES: int = 5000
+    LLM_CACHE_TTL: int = 604800
+
+    # Online LLM-as-judge evaluation (background queue)
+    EVAL_ENABLED: bool = True
+    EVAL_SAMPLE_RATE: float = 1.0
+    EVAL_QUEUE_MAX_SIZE: int = 100
+    EVAL_BATCH_SIZE: int = 4
+    EVAL_DRAIN_TIMEOUT: float = 30.0
+
+    # Shared HTTP/2 client used by every OpenAI call
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
     
     OTEL_ENABLED: bool = False
     OTEL_SERVICE_NAME: str = "lebanese-legal-assistant"
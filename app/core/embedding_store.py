@@ -0,0 +1,123 @@
+"""
+Durable embedding store: SQLite, keyed by (model, sha256 of the model input),
+values packed with app/core/vector_codec.py, always as float32: the pipeline
+inserts stored vectors into Milvus, so EMBEDDING_CACHE_DTYPE (Redis) never applies.
+
+Unlike the Redis cache it never expires, so re-ingesting, re-indexing or
+re-running evaluation tools never pays for the same embedding twice. WAL mode
+lets the API workers read while a pipeline script writes.
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import structlog
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.core.config import settings
+from app.core.vector_codec import decode_vector, encode_vector, is_float32
+
+log = structlog.get_logger()
+
+_MAX_VARIABLES = 500  # keys per SELECT ... IN (...)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model      TEXT NOT NULL,
+    text_hash  TEXT NOT NULL,
+    vector     BLOB NOT NULL,
+    created_at INTEGER NOT NULL,
+    PRIMARY KEY (model, text_hash)
+) WITHOUT ROWID;
+"""
+
+
+def model_input(text: str) -> str:
+    """What is actually sent to the embeddings API (newlines hurt the model)."""
+    return text.replace("\n", " ")
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(model_input(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    @classmethod
+    def open_default(cls) -> Optional["EmbeddingStore"]:
+        """The store at EMBEDDING_STORE_PATH, or None if disabled or unusable (e.g. read-only disk)."""
+        if not settings.EMBEDDING_STORE_PATH:
+            return None
+        try:
+            return cls(settings.EMBEDDING_STORE_PATH)
+        except Exception as e:
+            log.warning("Embedding store unavailable", path=settings.EMBEDDING_STORE_PATH, error=str(e))
+            return None
+
+    def get_many(self, model: str, keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for i in range(0, len(keys), _MAX_VARIABLES):
+                chunk = keys[i:i + _MAX_VARIABLES]
+                rows = self.db.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? "
+                    f"AND text_hash IN ({', '.join('?' * len(chunk))})",
+                    [model, *chunk],
+                )
+                for key, blob in rows:
+                    if is_float32(blob):  # quantized rows of older versions are re-embedded and replaced
+                        found[key] = decode_vector(blob)
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, model: str, items: Iterable[Tuple[str, np.ndarray]]):
+        now = int(time.time())
+        rows = [(model, key, encode_vector(vector, "float32"), now) for key, vector in items]
+        if not rows:
+            return
+        with self._lock:
+            self.db.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+            self.db.commit()
+        self.writes += len(rows)
+
+    def get_texts(self, model: str, texts: List[str]) -> Dict[str, np.ndarray]:
+        """Convenience for callers holding texts: {text: vector} for the stored ones."""
+        keys = {text: text_key(text) for text in texts}
+        found = self.get_many(model, keys.values())
+        return {text: found[key] for text, key in keys.items() if key in found}
+
+    def put_texts(self, model: str, vectors: Dict[str, np.ndarray]):
+        self.put_many(model, ((text_key(text), vector) for text, vector in vectors.items()))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "writes": self.writes,
+        }
+
+    def close(self):
+        with self._lock:
+            self.db.close()
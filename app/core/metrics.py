@@ -0,0 +1,51 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class LatencyTracker:
+    """
+    Keeps a rolling window of per-stage latencies (milliseconds) and reports
+    p50/p95 per stage. Cheap enough to record on every request.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+
+    def record(self, timings: Dict[str, float]):
+        for stage, ms in timings.items():
+            self._samples.setdefault(stage, deque(maxlen=self.window)).append(ms)
+
+    def summary(self) -> dict:
+        result = {}
+        for stage, samples in self._samples.items():
+            values = sorted(samples)
+            result[stage] = {
+                "count": len(values),
+                "p50": round(_percentile(values, 50), 1),
+                "p95": round(_percentile(values, 95), 1),
+            }
+        return result
+
+
+@contextmanager
+def stage_timer(timings: Dict[str, float], stage: str):
+    """Records the wall-clock duration of the wrapped block into timings[stage] (ms)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = round((time.perf_counter() - start) * 1000, 1)
+
+
+def elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
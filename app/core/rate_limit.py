@@ -0,0 +1,42 @@
+import time
+import asyncio
+
+
+class AsyncTokenBucket:
+    """
+    Paces callers to *rate_per_minute* units (requests, tokens, ...) with bursts
+    of up to *burst_seconds* worth of units.
+
+    acquire(n) waits until the bucket is non-empty, then takes n units, going
+    into debt if n exceeds what is left; later callers wait the debt off. A
+    single request larger than the burst therefore still goes through, and the
+    long-run rate stays exact. Waiters are served in arrival order.
+    """
+
+    def __init__(self, rate_per_minute: float, burst_seconds: float = 10.0):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = self.rate * burst_seconds
+        self.tokens = self.capacity
+        self.waited = 0.0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, n: float = 1.0):
+        async with self._lock:
+            self._refill()
+            if self.tokens <= 0:
+                delay = -self.tokens / self.rate + 1e-3
+                self.waited += delay
+                await asyncio.sleep(delay)
+                self._refill()
+            self.tokens -= n
+
+    def refund(self, n: float):
+        """Settles an estimate: returns unused units, or takes more if n is negative."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + n)
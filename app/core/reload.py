@@ -0,0 +1,40 @@
+import time
+import asyncio
+import structlog
+from typing import Optional
+
+log = structlog.get_logger()
+
+RELOAD_CHECK_INTERVAL = 30.0  # seconds between checks for a rebuilt index file
+
+
+class BackgroundReload:
+    """
+    Mixin for services that serve an index file the data pipeline rebuilds. The
+    class provides _load(), which checks the file's mtime and swaps `self.index`
+    for a freshly loaded one in a single assignment.
+
+    reload_if_due() checks at most every RELOAD_CHECK_INTERVAL seconds. Inside an
+    event loop the load runs in a worker thread, so a multi-megabyte JSON parse
+    never stalls in-flight requests; they keep the old index until the swap.
+    """
+
+    _checked_at = 0.0
+    _reload_task: Optional[asyncio.Task] = None
+
+    def _load(self):
+        raise NotImplementedError
+
+    def reload_if_due(self):
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_CHECK_INTERVAL:
+            return
+        if self._reload_task is not None and not self._reload_task.done():
+            return
+        self._checked_at = now
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._load()  # scripts and benchmarks have no loop to keep responsive
+            return
+        self._reload_task = loop.create_task(asyncio.to_thread(self._load))
@@ -0,0 +1,229 @@
+"""
+Columnar on-disk snapshots of the Milvus collection.
+
+A snapshot is a directory:
+
+    manifest.json   format_version, count, dim, collection, docs_format, per-file sha256
+    ids.npy         int64 primary keys
+    vectors.npy     float32 (count, dim), contiguous; open with np.load(mmap_mode="r")
+    docs.parquet    pk, source_type, text_content, metadata (JSON) when pyarrow is installed,
+    docs.jsonl      otherwise one {"text", "source", "metadata"} object per line
+
+Rows are in the same order in every file. Snapshots are written into <path>.tmp
+and swapped into place on close, so readers never see a half-written one.
+"""
+
+import os
+import json
+import time
+import shutil
+import struct
+import hashlib
+import numpy as np
+from typing import Iterator, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: docs fall back to JSON lines
+    pa = pq = None
+
+SNAPSHOT_FORMAT_VERSION = 1
+_NPY_HEADER_SIZE = 128  # fixed so the shape can be patched in once the row count is known
+
+
+def _npy_header(shape: tuple) -> bytes:
+    header = "{'descr': '<f4', 'fortran_order': False, 'shape': %r, }" % (shape,)
+    length = _NPY_HEADER_SIZE - 10
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", length) + (header.ljust(length - 1) + "\n").encode("latin1")
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class SnapshotWriter:
+    """
+    Streams batches of entities into a snapshot without holding the collection in memory:
+    vectors are appended to vectors.npy as raw float32, docs to Parquet / JSON lines.
+
+        with SnapshotWriter(path, dim=1536, collection="lebanese_laws") as writer:
+            for batch in batches:
+                writer.write(ids, vectors, docs)
+        manifest = writer.manifest
+    """
+
+    def __init__(self, path: str, dim: int, docs_format: Optional[str] = None, **manifest_extra):
+        self.path = path
+        self.dim = dim
+        self.docs_format = docs_format or ("parquet" if pq is not None else "jsonl")
+        if self.docs_format == "parquet" and pq is None:
+            raise ImportError("docs_format='parquet' needs pyarrow")
+        self.manifest_extra = manifest_extra
+        self.manifest: Optional[dict] = None
+        self.count = 0
+        self._ids: List[np.ndarray] = []
+        self._tmp = f"{path}.tmp"
+        shutil.rmtree(self._tmp, ignore_errors=True)
+        os.makedirs(self._tmp)
+        self._vectors = open(os.path.join(self._tmp, "vectors.npy"), "wb")
+        self._vectors.write(_npy_header((0, dim)))
+        self._docs_path = os.path.join(self._tmp, f"docs.{self.docs_format}")
+        self._parquet = None
+        self._jsonl = open(self._docs_path, "w", encoding="utf-8") if self.docs_format == "jsonl" else None
+
+    def __enter__(self) -> "SnapshotWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, ids, vectors, docs: List[dict]):
+        """docs: dicts with text, source and metadata, in the same order as ids / vectors."""
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        if len(ids) != len(vectors) or len(ids) != len(docs):
+            raise ValueError(f"Batch size mismatch: {len(ids)} ids, {len(vectors)} vectors, {len(docs)} docs")
+        self._vectors.write(vectors.tobytes())
+        self._ids.append(ids)
+        if self._jsonl is not None:
+            for doc in docs:
+                self._jsonl.write(json.dumps(
+                    {"text": doc["text"], "source": doc["source"], "metadata": doc["metadata"]}, ensure_ascii=False
+                ) + "\n")
+        else:
+            table = pa.table({
+                "pk": pa.array(ids),
+                "source_type": pa.array([d["source"] for d in docs], type=pa.string()),
+                "text_content": pa.array([d["text"] for d in docs], type=pa.string()),
+                "metadata": pa.array([json.dumps(d["metadata"], ensure_ascii=False) for d in docs], type=pa.string()),
+            })
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self._docs_path, table.schema)
+            self._parquet.write_table(table)
+        self.count += len(ids)
+
+    def close(self) -> dict:
+        self._vectors.seek(0)
+        self._vectors.write(_npy_header((self.count, self.dim)))
+        self._vectors.close()
+        np.save(os.path.join(self._tmp, "ids.npy"),
+                np.concatenate(self._ids) if self._ids else np.empty(0, dtype=np.int64))
+        if self._jsonl is not None:
+            self._jsonl.close()
+        elif self._parquet is not None:
+            self._parquet.close()
+        else:  # no rows: still leave a readable (empty) docs file
+            pq.write_table(pa.table({"pk": pa.array([], type=pa.int64())}), self._docs_path)
+
+        files = sorted(os.listdir(self._tmp))
+        self.manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "count": self.count,
+            "dim": self.dim,
+            "metric": "COSINE",
+            "docs_format": self.docs_format,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            **self.manifest_extra,
+            "files": {
+                name: {"bytes": os.path.getsize(os.path.join(self._tmp, name)),
+                       "sha256": _sha256(os.path.join(self._tmp, name))}
+                for name in files
+            },
+        }
+        with open(os.path.join(self._tmp, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+
+        old = f"{self.path}.old"
+        if os.path.exists(self.path):
+            shutil.rmtree(old, ignore_errors=True)
+            os.replace(self.path, old)
+        os.replace(self._tmp, self.path)
+        shutil.rmtree(old, ignore_errors=True)
+        return self.manifest
+
+    def abort(self):
+        for f in (self._vectors, self._jsonl):
+            if f is not None and not f.closed:
+                f.close()
+        if self._parquet is not None:
+            self._parquet.close()
+        shutil.rmtree(self._tmp, ignore_errors=True)
+
+
+def write_snapshot(path: str, ids, vectors, docs: List[dict], **manifest_extra) -> dict:
+    """Writes an in-memory collection as a snapshot in one go."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    with SnapshotWriter(path, dim=vectors.shape[1], **manifest_extra) as writer:
+        writer.write(ids, vectors, docs)
+    return writer.manifest
+
+
+# ── Reading ─────────────────────────────────────────────────────────────────
+
+def read_manifest(path: str) -> dict:
+    with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format {manifest.get('format_version')}")
+    return manifest
+
+
+def read_ids(path: str) -> np.ndarray:
+    return np.load(os.path.join(path, "ids.npy"))
+
+
+def open_vectors(path: str) -> np.ndarray:
+    """Zero-copy, read-only view of vectors.npy (pages are loaded on access)."""
+    return np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+
+
+def iter_docs(path: str, batch_size: int = 10_000) -> Iterator[List[dict]]:
+    """Yields the docs ({"text", "source", "metadata"}) in row order, batch by batch."""
+    parquet_path = os.path.join(path, "docs.parquet")
+    if os.path.exists(parquet_path):
+        if pq is None:
+            raise ImportError("This snapshot stores docs as Parquet; install pyarrow to read it")
+        for batch in pq.ParquetFile(parquet_path).iter_batches(batch_size=batch_size):
+            columns = batch.to_pydict()
+            yield [
+                {"text": t, "source": s, "metadata": json.loads(m) if m else {}}
+                for t, s, m in zip(columns["text_content"], columns["source_type"], columns["metadata"])
+            ]
+        return
+    with open(os.path.join(path, "docs.jsonl"), encoding="utf-8") as f:
+        batch = []
+        for line in f:
+            if line.strip():
+                batch.append(json.loads(line))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+
+def read_docs(path: str) -> List[dict]:
+    return [doc for batch in iter_docs(path) for doc in batch]
+
+
+def verify_snapshot(path: str) -> dict:
+    """Re-hashes every file and checks the row counts. Raises ValueError on any mismatch."""
+    manifest = read_manifest(path)
+    for name, expected in manifest["files"].items():
+        actual = _sha256(os.path.join(path, name))
+        if actual != expected["sha256"]:
+            raise ValueError(f"Checksum mismatch for {name}")
+    vectors = open_vectors(path)
+    if len(read_ids(path)) != manifest["count"] or vectors.shape != (manifest["count"], manifest["dim"]):
+        raise ValueError("Row count mismatch between manifest, ids.npy and vectors.npy")
+    if sum(len(batch) for batch in iter_docs(path)) != manifest["count"]:
+        raise ValueError("Row count mismatch between manifest and docs")
+    return manifest
@@ -0,0 +1,53 @@
+import re
+import hashlib
+
+_ARABIC_DIACRITICS = re.compile(r"[\u064B-\u0652\u0640]")  # tashkeel + tatweel
+_TRAILING_PUNCT = re.compile(r"[\s?؟.!،,]+$")
+
+
+def normalize_query(text: str) -> str:
+    """Case, whitespace, tashkeel/tatweel and trailing-punctuation folding used for cache keys."""
+    text = _ARABIC_DIACRITICS.sub("", text or "")
+    text = " ".join(text.lower().split())
+    return _TRAILING_PUNCT.sub("", text)
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def prompt_version(prompt: str) -> str:
+    """Short fingerprint of a system prompt; embedded in cache keys so edits invalidate old entries."""
+    return text_hash(prompt)[:12]
+
+
+_ARABIC_FOLD = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ؤ": "و", "ئ": "ي", "ى": "ي", "ة": "ه", "ء": None,
+    **{chr(0x0660 + i): str(i) for i in range(10)},  # Arabic-Indic digits
+    **{chr(0x06F0 + i): str(i) for i in range(10)},  # Extended (Persian) digits
+})
+_TOKEN = re.compile(r"\w+")
+
+
+def normalize_arabic(text: str) -> str:
+    """
+    Search-oriented folding: strips tashkeel/tatweel, folds alef/hamza variants,
+    ta marbuta -> ha, alef maqsura -> ya, Arabic-Indic digits -> ASCII, lowercases Latin.
+    """
+    return _ARABIC_DIACRITICS.sub("", text or "").translate(_ARABIC_FOLD).lower()
+
+
+def tokenize(text: str) -> list:
+    return _TOKEN.findall(normalize_arabic(text))
+
+
+_ARABIC_PREFIXES = ("وال", "بال", "فال", "كال", "لل", "ال", "و", "ب", "ل")
+
+
+def light_stem(token: str) -> str:
+    """Strips one common Arabic prefix (ال / و / ب / ل ...) when at least 3 letters remain."""
+    for prefix in _ARABIC_PREFIXES:
+        if token.startswith(prefix) and len(token) - len(prefix) >= 3:
+            return token[len(prefix):]
+    return token
@@ -0,0 +1,33 @@
+import structlog
+from functools import lru_cache
+from app.core.config import settings
+
+log = structlog.get_logger()
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """The model's tiktoken encoding, loaded once per process (None if tiktoken / its BPE file is unavailable)."""
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model(settings.TOKENIZER_MODEL)
+    except Exception as e:
+        log.warning("Tokenizer unavailable, estimating token counts", model=settings.TOKENIZER_MODEL, error=str(e))
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Prompt tokens of *text*, counted locally (no API call)."""
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is None:
+        # o200k averages ~3 characters per token on Arabic, ~4 on Latin; err high
+        return len(text) // 3 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+@lru_cache(maxsize=1024)
+def count_tokens_cached(text: str) -> int:
+    """count_tokens for texts that recur across requests (system prompt, templates, history turns)."""
+    return count_tokens(text)
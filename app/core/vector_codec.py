@@ -0,0 +1,60 @@
+import json
+import struct
+import numpy as np
+
+# Binary layout: b"EV" | version (u8) | dtype code (u8) | [scale (f32), int8 only] | payload
+_MAGIC = b"EV"
+_VERSION = 1
+_HEADER = struct.Struct("<2sBB")
+_SCALE = struct.Struct("<f")
+
+_DTYPES = {"float32": 0, "float16": 1, "int8": 2}
+
+
+def encode_vector(vector, dtype: str = "float32") -> bytes:
+    """Packs an embedding into a compact, versioned byte string."""
+    code = _DTYPES[dtype]
+    v = np.asarray(vector, dtype=np.float32)
+    header = _HEADER.pack(_MAGIC, _VERSION, code)
+    if dtype == "float32":
+        return header + v.tobytes()
+    if dtype == "float16":
+        return header + v.astype(np.float16).tobytes()
+    # int8: symmetric per-vector quantization, value ≈ q * scale
+    scale = float(np.abs(v).max()) / 127 or 1.0
+    q = np.clip(np.rint(v / scale), -127, 127).astype(np.int8)
+    return header + _SCALE.pack(scale) + q.tobytes()
+
+
+def decode_vector(blob) -> np.ndarray:
+    """
+    Decodes a cached embedding into a float32 NumPy array. float32 payloads are a
+    zero-copy (read-only) view over *blob*. Legacy entries written as JSON float
+    lists are still understood so existing caches keep working.
+    """
+    if isinstance(blob, str):
+        blob = blob.encode()
+    if blob[:1] == b"[":
+        return np.asarray(json.loads(blob), dtype=np.float32)
+
+    magic, version, code = _HEADER.unpack_from(blob)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError(f"Unknown embedding cache format: {magic!r} v{version}")
+    offset = _HEADER.size
+    if code == 0:
+        return np.frombuffer(blob, dtype=np.float32, offset=offset)
+    if code == 1:
+        return np.frombuffer(blob, dtype=np.float16, offset=offset).astype(np.float32)
+    (scale,) = _SCALE.unpack_from(blob, offset)
+    return np.frombuffer(blob, dtype=np.int8, offset=offset + _SCALE.size).astype(np.float32) * scale
+
+
+def is_float32(blob) -> bool:
+    """True for a lossless float32 payload (versioned or legacy JSON)."""
+    if isinstance(blob, str):
+        blob = blob.encode()
+    return blob[:1] == b"[" or (len(blob) >= _HEADER.size and blob[_HEADER.size - 1] == _DTYPES["float32"])
+
+
+def is_legacy(blob) -> bool:
+    return blob[:1] in (b"[", "[")
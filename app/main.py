@@ -5,6 +5,7 @@ from app.core.config import settings
 from app.core.logging import setup_logging
 from app.core.telemetry import setup_telemetry
 from app.api.v1.api import api_router
+from app.services.service_container import services
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 from fastapi.staticfiles import StaticFiles
 import os
@@ -20,9 +21,14 @@ async def lifespan(app: FastAPI):
         os.environ["LANGCHAIN_API_KEY"] = settings.LANGCHAIN_API_KEY or ""
         os.environ["LANGCHAIN_PROJECT"] = settings.LANGCHAIN_PROJECT
         os.environ["LANGCHAIN_ENDPOINT"] = settings.LANGCHAIN_ENDPOINT
-        
+
+    # Shared HTTP/2, Redis and Milvus connections for the lifetime of the process
+    await services.startup()
+
     yield
 
+    await services.shutdown()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
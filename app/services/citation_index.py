@@ -0,0 +1,165 @@
+import os
+import json
+import time
+import structlog
+from typing import Dict, Iterable, List, Optional
+from app.core.config import settings
+from app.core.reload import BackgroundReload
+from app.core.text import light_stem, normalize_arabic, tokenize
+from app.services.legal_entities import ARTICLE_PATTERN, RULING_PATTERN, field_value, name_terms
+
+log = structlog.get_logger()
+
+_FORMAT_VERSION = 1
+
+
+class CitationIndex:
+    """
+    Exact lookup of pinpoint citations, built from the entity metadata:
+
+        (law_name, article_number)       -> article rows
+        (Court, Ruling_Number, Year)     -> ruling rows (every chunk of the ruling)
+
+    The keyed rows are stored with the index, so a lookup returns complete hits
+    (shaped like VectorStoreService results) without embedding or searching.
+    A law or court named in the query narrows the match; when none is named,
+    every law / court with that article or ruling number matches.
+    """
+
+    def __init__(self, docs: List[dict], articles: Dict[str, Dict[str, List[int]]],
+                 rulings: Dict[str, Dict[str, List[int]]]):
+        self.docs = docs
+        self.articles = articles  # "24"       -> {law_name: [doc indices]}
+        self.rulings = rulings    # "171/2021" -> {court: [doc indices]}
+        names = {n for by_name in (*articles.values(), *rulings.values()) for n in by_name}
+        self._terms = {name: name_terms(name) for name in names}
+
+    @classmethod
+    def build(cls, docs: Iterable[dict]) -> "CitationIndex":
+        """docs: dicts with id, text, source and metadata (the Milvus entity fields)."""
+        kept: List[dict] = []
+        articles: Dict[str, Dict[str, List[int]]] = {}
+        rulings: Dict[str, Dict[str, List[int]]] = {}
+        for doc in docs:
+            meta = doc.get("metadata") or {}
+            article = field_value(meta, "article_number")
+            number = field_value(meta, "ruling_number")
+            year = field_value(meta, "year")
+            if article is not None:
+                law = field_value(meta, "law_name") or ""
+                articles.setdefault(str(article), {}).setdefault(law, []).append(len(kept))
+            elif number is not None and year is not None:
+                court = field_value(meta, "court") or ""
+                rulings.setdefault(f"{number}/{year}", {}).setdefault(court, []).append(len(kept))
+            else:
+                continue
+            kept.append({k: doc[k] for k in ("id", "text", "source", "metadata")})
+        return cls(kept, articles, rulings)
+
+    def save(self, path: str):
+        """Atomically writes the index to *path* (JSON)."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": _FORMAT_VERSION, "docs": self.docs,
+                       "articles": self.articles, "rulings": self.rulings}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "CitationIndex":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported citation index version {data.get('version')}")
+        return cls(data["docs"], data["articles"], data["rulings"])
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    @property
+    def laws(self) -> List[str]:
+        return sorted({law for by_law in self.articles.values() for law in by_law if law})
+
+    @property
+    def courts(self) -> List[str]:
+        return sorted({court for by_court in self.rulings.values() for court in by_court if court})
+
+    def _named(self, by_name: Dict[str, List[int]], query_terms: List[str]) -> List[List[int]]:
+        """Groups of the names the query mentions, or all groups when it mentions none."""
+        named = [
+            rows for name, rows in by_name.items()
+            if self._terms[name] and all(any(q.startswith(t) for q in query_terms) for t in self._terms[name])
+        ]
+        return named or list(by_name.values())
+
+    def lookup(self, query: str, limit: int = 5) -> List[dict]:
+        """
+        Hits for the articles / rulings cited in *query*, or [] when it cites none,
+        they are not indexed, or more than *limit* citations match (ambiguous: left to search).
+        """
+        text = normalize_arabic(query)
+        cited = [self.articles.get(str(int(m.group(1)))) for m in ARTICLE_PATTERN.finditer(text)]
+        cited += [self.rulings.get(f"{int(m.group(1))}/{m.group(2)}") for m in RULING_PATTERN.finditer(text)]
+        cited = [by_name for by_name in cited if by_name]
+        if not cited:
+            return []
+        query_terms = [light_stem(t) for t in tokenize(query)]
+        groups: List[List[int]] = []
+        for by_name in cited:
+            groups.extend(g for g in self._named(by_name, query_terms) if g not in groups)
+        if not groups or len(groups) > limit:
+            return []
+        rows = list(dict.fromkeys(i for group in groups for i in group))[:limit]
+        return [{**self.docs[i], "score": 1.0} for i in rows]
+
+
+class CitationLookup(BackgroundReload):
+    """Serves CitationIndex lookups for the RAG pipeline and picks up rebuilt index files."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.CITATION_INDEX_PATH
+        self.index: Optional[CitationIndex] = None
+        self._mtime = None
+        self.lookups = 0
+        self.hits = 0
+        self._load()
+
+    def _load(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            if self._mtime is None:
+                log.info("Citation index not found, exact citation lookup disabled until it is built", path=self.path)
+                self._mtime = 0
+            return
+        if mtime == self._mtime:
+            return
+        start = time.perf_counter()
+        try:
+            self.index = CitationIndex.load(self.path)
+        except Exception as e:
+            log.warning("Failed to load citation index", path=self.path, error=str(e))
+            self._mtime = mtime
+            return
+        self._mtime = mtime
+        log.info("Citation index loaded", path=self.path, documents=len(self.index),
+                 articles=len(self.index.articles), rulings=len(self.index.rulings),
+                 load_ms=round((time.perf_counter() - start) * 1000, 1))
+
+    def lookup(self, query: str, limit: int) -> List[dict]:
+        self.reload_if_due()
+        if self.index is None:
+            return []
+        self.lookups += 1
+        hits = self.index.lookup(query, limit)
+        if hits:
+            self.hits += 1
+        return hits
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.index is not None,
+            "documents": len(self.index) if self.index is not None else 0,
+            "lookups": self.lookups,
+            "hits": self.hits,
+        }
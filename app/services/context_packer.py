@@ -0,0 +1,223 @@
+import re
+import structlog
+from functools import lru_cache
+from typing import List, Optional, Set, Tuple
+from app.core.config import settings
+from app.core.text import light_stem, tokenize
+from app.core.tokens import count_tokens, count_tokens_cached
+
+log = structlog.get_logger()
+
+_SENTENCE = re.compile(r"(?<=[.!?؟؛:\n])\s+")
+_MAX_SPAN_WORDS = 60   # long sentences are cut into spans of at most this many words
+_SHINGLE_SIZE = 3
+_MIN_WINDOW_TOKENS = 64  # a document that would get less room than this is left out
+_TURN_OVERHEAD = 4       # per-message framing tokens of the chat format
+# Metadata keys that do not help the model cite a source
+_METADATA_SKIP = {"Keywords", "Source_URL", "Local_PDF_Filename", "isFavorite", "source_pk"}
+
+
+def render_metadata(metadata: Optional[dict]) -> str:
+    """'law_name: ... | article_number: 24', without empty values or the dict repr noise."""
+    parts = []
+    for key, value in (metadata or {}).items():
+        if key in _METADATA_SKIP or value in (None, "") or isinstance(value, dict):
+            continue
+        if isinstance(value, (list, tuple)):
+            value = "، ".join(str(v) for v in value if v not in (None, ""))
+            if not value:
+                continue
+        parts.append(f"{key}: {value}")
+    return " | ".join(parts)
+
+
+def verbatim_header(i: int, hit: dict) -> str:
+    """Header of the unpacked rendering (metadata as a dict repr), the tokens_saved baseline."""
+    return f"[Document {i+1}]\nSource: {hit['source']}\nMetadata: {hit['metadata']}\nText: "
+
+
+_stem = lru_cache(maxsize=65536)(light_stem)  # documents repeat a small vocabulary many times
+
+
+def _terms(text: str) -> List[str]:
+    return [_stem(t) for t in tokenize(text)]
+
+
+def _segment(text: str) -> Tuple[List[str], List[List[str]]]:
+    """Spans of *text* and the terms of each, tokenized once for both shingling and windowing."""
+    spans = _spans(text)
+    return spans, [_terms(s) for s in spans]
+
+
+def _shingles(span_terms: List[List[str]]) -> Set[tuple]:
+    terms = [t for terms in span_terms for t in terms]
+    if len(terms) < _SHINGLE_SIZE:
+        return {tuple(terms)} if terms else set()
+    return {tuple(terms[i:i + _SHINGLE_SIZE]) for i in range(len(terms) - _SHINGLE_SIZE + 1)}
+
+
+def _jaccard(a: Set[tuple], b: Set[tuple]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _spans(text: str) -> List[str]:
+    spans = []
+    for sentence in _SENTENCE.split(text.strip()):
+        words = sentence.split()
+        spans.extend(" ".join(words[i:i + _MAX_SPAN_WORDS]) for i in range(0, len(words), _MAX_SPAN_WORDS))
+    return spans
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    words = text.split()
+    while words and count_tokens(" ".join(words)) > max_tokens:
+        words = words[:int(len(words) * 0.9)]
+    return " ".join(words)
+
+
+def best_window(text: str, query_terms: Set[str], max_tokens: int,
+                text_tokens: int = None, segments: tuple = None) -> Tuple[str, bool]:
+    """
+    The contiguous run of sentences (spans) within *max_tokens* that contains the most
+    query terms, earliest on ties; "…" marks the cut ends. Returns (window, trimmed).
+    """
+    if (count_tokens(text) if text_tokens is None else text_tokens) <= max_tokens:
+        return text, False
+    spans, span_terms = segments or _segment(text)
+    costs = [count_tokens(s) + 1 for s in spans]
+    gains = [len(query_terms.intersection(terms)) for terms in span_terms]
+    best_hits, best = -1, None
+    start = total = hits = 0
+    for end in range(len(spans)):
+        total += costs[end]
+        hits += gains[end]
+        while total > max_tokens and start <= end:
+            total -= costs[start]
+            hits -= gains[start]
+            start += 1
+        # More query terms wins; an equal window with the same start grows to fill the room
+        if start <= end and (hits > best_hits or (hits == best_hits and start == best[0])):
+            best_hits, best = hits, (start, end + 1)
+    if best is None:  # even a single span is over the budget
+        best_span = max(range(len(spans)), key=lambda i: gains[i]) if spans else 0
+        best = (best_span, best_span + 1)
+        window = _truncate(spans[best_span], max_tokens - 2) if spans else ""
+    else:
+        window = " ".join(spans[best[0]:best[1]])
+    prefix = "… " if best[0] > 0 else ""
+    suffix = " …" if best[1] < len(spans) or best_hits < 0 else ""
+    return f"{prefix}{window}{suffix}", True
+
+
+class ContextPacker:
+    """
+    Packs retrieved hits into the prompt context within a token budget:
+
+    - hits whose word shingles overlap a higher-ranked hit's by CONTEXT_DEDUP_THRESHOLD
+      (Jaccard) or more are dropped as near-duplicates;
+    - each document is cut to its most query-relevant window of at most
+      CONTEXT_DOC_MAX_TOKENS (whole sentences, "…" at the cuts);
+    - metadata is rendered as "key: value | ..." instead of a dict repr;
+    - documents are added in rank order until the budget runs out.
+
+    Tokens are counted locally (app.core.tokens). Every pack records how many
+    tokens it saved against the verbatim rendering.
+    """
+
+    def __init__(self, prompt_budget: int = None, min_context_tokens: int = None,
+                 doc_max_tokens: int = None, dedup_threshold: float = None):
+        self.prompt_budget = prompt_budget or settings.PROMPT_TOKEN_BUDGET
+        self.min_context_tokens = min_context_tokens or settings.CONTEXT_MIN_TOKENS
+        self.doc_max_tokens = doc_max_tokens or settings.CONTEXT_DOC_MAX_TOKENS
+        self.dedup_threshold = dedup_threshold if dedup_threshold is not None else settings.CONTEXT_DEDUP_THRESHOLD
+        self.packs = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.duplicates = 0
+        self.trimmed = 0
+        self.history_turns_dropped = 0
+
+    def fit_history(self, history: list, fixed_texts: List[str]) -> list:
+        """
+        Drops the oldest history turns while the prompt would leave the context
+        less than CONTEXT_MIN_TOKENS of PROMPT_TOKEN_BUDGET.
+        """
+        history = list(history)
+        fixed = sum(count_tokens_cached(t) for t in fixed_texts if t)
+        turns = [count_tokens_cached(m.content) + _TURN_OVERHEAD for m in history]
+        while history and self.prompt_budget - fixed - sum(turns) < self.min_context_tokens:
+            history.pop(0)
+            turns.pop(0)
+            self.history_turns_dropped += 1
+        return history
+
+    def context_budget(self, prompt_texts: List[str]) -> int:
+        """Tokens left for the context by the rest of the prompt (never below CONTEXT_MIN_TOKENS)."""
+        used = sum(count_tokens_cached(t) + _TURN_OVERHEAD for t in prompt_texts if t)
+        return max(self.min_context_tokens, self.prompt_budget - used)
+
+    def pack(self, query: str, hits: List[dict], budget: int) -> Tuple[str, List[dict], dict]:
+        """Returns (context_text, the hits it includes, stats of this pack)."""
+        query_terms = set(_terms(query))
+        packed, chunks, kept_shingles = [], [], []
+        used = duplicates = trimmed = baseline = 0
+        full = False
+        for i, hit in enumerate(hits):
+            text = hit["text"] or ""
+            text_tokens = count_tokens(text)
+            baseline += count_tokens(verbatim_header(i, hit)) + text_tokens + 1
+            if full:
+                continue  # still counted in the baseline
+            segments = _segment(text)
+            shingles = _shingles(segments[1])
+            if any(_jaccard(shingles, other) >= self.dedup_threshold for other in kept_shingles):
+                duplicates += 1
+                continue
+            header = f"[Document {len(packed) + 1}] {hit['source']}"
+            metadata = render_metadata(hit.get("metadata"))
+            if metadata:
+                header += f"\nMetadata: {metadata}"
+            room = min(self.doc_max_tokens, budget - used - count_tokens(header) - 4)
+            if room < _MIN_WINDOW_TOKENS:
+                full = True
+                continue
+            window, was_trimmed = best_window(text, query_terms, room, text_tokens, segments)
+            chunk = f"{header}\nText: {window}"
+            used += count_tokens(chunk) + 1
+            trimmed += was_trimmed
+            chunks.append(chunk)
+            packed.append(hit)
+            kept_shingles.append(shingles)
+
+        context_text = "\n\n".join(chunks)
+        context_tokens = count_tokens(context_text)
+        stats = {
+            "documents": len(hits),
+            "packed": len(packed),
+            "duplicates": duplicates,
+            "trimmed": trimmed,
+            "budget": budget,
+            "context_tokens": context_tokens,
+            "baseline_tokens": baseline,
+            "tokens_saved": baseline - context_tokens,
+        }
+        self.packs += 1
+        self.tokens_in += baseline
+        self.tokens_out += context_tokens
+        self.duplicates += duplicates
+        self.trimmed += trimmed
+        return context_text, packed, stats
+
+    def stats(self) -> dict:
+        return {
+            "packs": self.packs,
+            "baseline_tokens": self.tokens_in,
+            "context_tokens": self.tokens_out,
+            "tokens_saved": self.tokens_in - self.tokens_out,
+            "avg_tokens_saved": round((self.tokens_in - self.tokens_out) / self.packs, 1) if self.packs else 0.0,
+            "duplicates_dropped": self.duplicates,
+            "documents_trimmed": self.trimmed,
+            "history_turns_dropped": self.history_turns_dropped,
+        }
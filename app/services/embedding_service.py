@@ -1,72 +1,279 @@
+import sys
+import time
+import asyncio
 import hashlib
-import json
 import structlog
-import redis.asyncio as redis
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Optional
 from openai import AsyncOpenAI
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from app.core.batching import MicroBatcher
+from app.core.clients import create_openai_client, create_redis_client
 from app.core.config import settings
+from app.core.embedding_store import EmbeddingStore
+from app.core.vector_codec import decode_vector, encode_vector, is_legacy
 from langsmith import traceable
 
 log = structlog.get_logger()
 
+_EMBEDDING_MODEL = "text-embedding-3-small"
+_CACHE_TTL = 86400  # 24h
+_REDIS_RETRY_AFTER = 30.0  # seconds to skip Redis after an error
+
+class EmbeddingL1Cache:
+    """In-process LRU of decoded embeddings, bounded by the bytes it holds."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+    @staticmethod
+    def _size(key: str, vector: np.ndarray) -> int:
+        return vector.nbytes + sys.getsizeof(key)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        vector = self._entries.get(key)
+        if vector is not None:
+            self._entries.move_to_end(key)
+        return vector
+
+    def put(self, key: str, vector: np.ndarray):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+        self._entries[key] = vector
+        self.nbytes += self._size(key, vector)
+        while self.nbytes > self.max_bytes and self._entries:
+            old_key, old = self._entries.popitem(last=False)
+            self.nbytes -= self._size(old_key, old)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
 class EmbeddingService:
-    def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        # Upstash and most cloud providers need SSL for rediss://
-        is_ssl = settings.REDIS_URL.startswith("rediss://")
-        try:
-            self.redis = redis.from_url(
-                settings.REDIS_URL, 
-                decode_responses=True,
-                ssl=is_ssl,
-                ssl_cert_reqs=None # Let redis-py handle it based on URL
-            )
-        except Exception as e:
-            log.error("Failed to initialize Redis", error=str(e))
-            self.redis = None # Fallback to no cache
+    """
+    Embeddings with four tiers: an in-process L1 (EmbeddingL1Cache), the shared
+    Redis cache, the durable on-disk EmbeddingStore (shared with the data
+    pipeline), then OpenAI. A text that is already being looked up is never
+    looked up twice: later callers join the in-flight lookup (single flight).
+    """
+
+    def __init__(self, client: Optional[AsyncOpenAI] = None, redis_client=None,
+                 store: Optional[EmbeddingStore] = None):
+        self.client = client or create_openai_client()
+        self.redis = redis_client if redis_client is not None else create_redis_client()
+        self.store = store if store is not None else EmbeddingStore.open_default()
+        # Concurrent get_embedding() calls within a few ms share one OpenAI request
+        self.batcher = MicroBatcher(
+            self.get_embeddings,
+            window_ms=settings.EMBEDDING_BATCH_WINDOW_MS,
+            max_batch=settings.EMBEDDING_BATCH_MAX_SIZE,
+        )
+        self.cache_dtype = settings.EMBEDDING_CACHE_DTYPE
+        self.l1 = EmbeddingL1Cache(settings.EMBEDDING_L1_MAX_BYTES)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._redis_retry_at = 0.0
+        self.l1_hits = 0
+        self.inflight_joins = 0
+        self.redis_lookups = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.redis_errors = 0
+        self.store_hits = 0
+        self.store_errors = 0
+        self.legacy_rewrites = 0
+        self.openai_requests = 0
 
     def _get_hash(self, text: str) -> str:
         return hashlib.sha256(text.encode()).hexdigest()
 
     @traceable(run_type="embedding", name="OpenAI Embedding")
-    async def get_embedding(self, text: str) -> list[float]:
-        text_hash = self._get_hash(text)
-        cache_key = f"embedding:{text_hash}"
-        
+    async def get_embedding(self, text: str) -> np.ndarray:
+        return await self.batcher.submit(text)
+
+    async def get_embeddings(self, texts: List[str]) -> List[np.ndarray]:
+        """
+        Embeds many texts at once. L1 hits are served in-process; the rest are
+        looked up with one Redis MGET, multi-input OpenAI requests for the misses
+        and one pipelined SETEX round trip to store them. Identical texts are only
+        embedded once. Results keep the input order and are float32 arrays (cache
+        hits decode zero-copy, see app/core/vector_codec.py).
+        """
+        found: dict[str, np.ndarray] = {}
+        joined: dict[str, asyncio.Task] = {}
+        owned: dict[str, str] = {}  # text -> hash
+        for text in dict.fromkeys(texts):
+            key = self._get_hash(text)
+            vector = self.l1.get(key)
+            if vector is not None:
+                self.l1_hits += 1
+                found[text] = vector
+            elif key in self._inflight:
+                self.inflight_joins += 1
+                joined[text] = self._inflight[key]
+            else:
+                owned[text] = key
+
+        if owned:
+            # The lookup runs as its own task so a cancelled caller doesn't fail the others
+            task = asyncio.ensure_future(self._lookup(owned))
+            for key in owned.values():
+                self._inflight[key] = task
+            task.add_done_callback(lambda t, keys=list(owned.values()): self._release(t, keys))
+            found.update(await asyncio.shield(task))
+
+        for text, task in joined.items():
+            found[text] = (await asyncio.shield(task))[text]
+
+        return [found[t] for t in texts]
+
+    def _release(self, task: asyncio.Task, keys: List[str]):
+        for key in keys:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here so an unawaited failure doesn't warn
+
+    def _redis_available(self) -> bool:
+        return bool(self.redis) and time.monotonic() >= self._redis_retry_at
+
+    def _redis_failed(self, action: str, error: Exception):
+        # Back off so an outage costs one failed round trip per interval, not one per request
+        self.redis_errors += 1
+        self._redis_retry_at = time.monotonic() + _REDIS_RETRY_AFTER
+        log.warning("Redis cache error, serving from L1/OpenAI", action=action, error=str(error), retry_in_s=_REDIS_RETRY_AFTER)
+
+    async def _lookup(self, owned: Dict[str, str]) -> Dict[str, np.ndarray]:
+        """Redis, the store, then OpenAI, for texts that missed L1. Fills L1 with every result."""
+        found: dict[str, np.ndarray] = {}
+        legacy: dict[str, np.ndarray] = {}
+
         # Check Cache
-        try:
-            if self.redis:
-                cached = await self.redis.get(cache_key)
-                if cached:
-                    log.info("Embedding cache hit", text_hash=text_hash[:8])
-                    return json.loads(cached)
-        except Exception as e:
-            log.warning("Redis cache read error", error=str(e))
-
-        # Call OpenAI with retry logic
-        try:
-            embedding = await self._call_openai(text)
-            
-            # Save to Cache (TTL 24h)
+        if self._redis_available():
             try:
-                if self.redis:
-                    await self.redis.setex(cache_key, 86400, json.dumps(embedding))
+                cached_values = await self.redis.mget([f"embedding:{key}" for key in owned.values()])
+                self.redis_lookups += len(owned)
+                for text, cached in zip(owned, cached_values):
+                    if cached:
+                        found[text] = decode_vector(cached)
+                        if is_legacy(cached):
+                            legacy[text] = found[text]
             except Exception as e:
-                log.warning("Redis cache write error", error=str(e))
-                
-            return embedding
-        except Exception as e:
-            log.error("Embedding generation failed after retries", error=str(e))
-            raise e
+                self._redis_failed("read", e)
+
+        self.redis_hits += len(found)
+        missing = [t for t in owned if t not in found]
+
+        # Durable store: hits are copied back into Redis below
+        stored: dict[str, np.ndarray] = {}
+        if missing and self.store is not None:
+            try:
+                stored = await asyncio.to_thread(self.store.get_texts, _EMBEDDING_MODEL, missing)
+            except Exception as e:
+                self.store_errors += 1
+                log.warning("Embedding store read failed", error=str(e))
+            found.update(stored)
+            self.store_hits += len(stored)
+            missing = [t for t in missing if t not in stored]
+
+        self.misses += len(missing)
+        if found:
+            log.info("Embedding cache hit", hits=len(found), misses=len(missing))
+
+        fresh: dict[str, np.ndarray] = {}
+        if missing:
+            # Call OpenAI with retry logic
+            try:
+                step = settings.EMBEDDING_MAX_INPUTS_PER_REQUEST
+                for i in range(0, len(missing), step):
+                    chunk = missing[i:i + step]
+                    fresh.update(zip(chunk, await self._call_openai(chunk)))
+            except Exception as e:
+                log.error("Embedding generation failed after retries", error=str(e))
+                raise e
+            found.update(fresh)
+            if self.store is not None:
+                try:
+                    await asyncio.to_thread(self.store.put_texts, _EMBEDDING_MODEL, fresh)
+                except Exception as e:
+                    self.store_errors += 1
+                    log.warning("Embedding store write failed", error=str(e))
+
+        for text, vector in found.items():
+            self.l1.put(owned[text], vector)
+
+        # Save to Cache (TTL 24h). Legacy JSON hits are rewritten in the binary format.
+        to_store = {**legacy, **stored, **fresh}
+        if to_store and self._redis_available():
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for text, embedding in to_store.items():
+                        pipe.setex(f"embedding:{owned[text]}", _CACHE_TTL, encode_vector(embedding, self.cache_dtype))
+                    await pipe.execute()
+                self.legacy_rewrites += len(legacy)
+            except Exception as e:
+                self._redis_failed("write", e)
+
+        return found
 
     @retry(
-        stop=stop_after_attempt(3), 
+        stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=1, max=10),
         retry=retry_if_exception_type(Exception)
     )
-    async def _call_openai(self, text: str) -> list[float]:
-        log.info("Calling OpenAI for embedding")
-        text = text.replace("\n", " ")
-        response = await self.client.embeddings.create(input=[text], model="text-embedding-3-small")
+    async def _call_openai(self, texts: List[str]) -> List[np.ndarray]:
+        log.info("Calling OpenAI for embedding", inputs=len(texts))
+        self.openai_requests += 1
+        response = await self.client.embeddings.create(
+            input=[t.replace("\n", " ") for t in texts],
+            model=_EMBEDDING_MODEL,
+        )
         log.info("OpenAI embedding received")
-        return response.data[0].embedding
+        return [np.asarray(d.embedding, dtype=np.float32) for d in sorted(response.data, key=lambda d: d.index)]
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
+
+    def stats(self) -> dict:
+        lookups = self.l1_hits + self.inflight_joins + self.redis_hits + self.store_hits + self.misses
+
+        def ratio(hits: int, total: int) -> float:
+            return round(hits / total, 4) if total else 0.0
+
+        return {
+            "lookups": lookups,
+            "l1": {
+                "hits": self.l1_hits,
+                "hit_ratio": ratio(self.l1_hits, lookups),
+                "entries": len(self.l1),
+                "bytes": self.l1.nbytes,
+                "max_bytes": self.l1.max_bytes,
+            },
+            "single_flight_joins": self.inflight_joins,
+            "redis": {
+                "hits": self.redis_hits,
+                "lookups": self.redis_lookups,
+                "hit_ratio": ratio(self.redis_hits, self.redis_lookups),
+                "errors": self.redis_errors,
+                "available": self._redis_available(),
+                "cache_dtype": self.cache_dtype,
+                "legacy_rewrites": self.legacy_rewrites,
+            },
+            "store": {
+                "hits": self.store_hits,
+                "errors": self.store_errors,
+                "enabled": self.store is not None,
+                "writes": self.store.writes if self.store is not None else 0,
+            },
+            "openai": {
+                "embedded": self.misses,
+                "requests": self.openai_requests,
+                "share_of_lookups": ratio(self.misses, lookups),
+            },
+            "overall_hit_ratio": ratio(lookups - self.misses, lookups),
+            "coalescing": self.batcher.stats(),
+        }
@@ -0,0 +1,116 @@
+import asyncio
+import random
+import httpx
+import structlog
+from typing import Optional
+from openevals.llm import create_async_llm_as_judge
+from langchain_openai import ChatOpenAI
+from app.core.config import settings
+
+log = structlog.get_logger()
+
+_JUDGE_PROMPT = "Is the answer legally accurate and helpful based on the context provided?"
+
+
+class OnlineEvaluationService:
+    """
+    Runs the LLM-as-a-judge (OpenEvals + LangSmith) in a background worker so
+    judge latency never counts toward request latency.
+
+    - Sampling: only EVAL_SAMPLE_RATE of answers are submitted.
+    - Backpressure: the queue is bounded; when it is full, new items are dropped
+      rather than making the request wait.
+    - Batching: the worker pulls up to EVAL_BATCH_SIZE queued items and judges
+      them concurrently.
+    - Shutdown: drain() waits (up to EVAL_DRAIN_TIMEOUT) for queued items.
+    """
+
+    def __init__(self, judge=None, http_client: Optional[httpx.AsyncClient] = None):
+        self.judge = judge or create_async_llm_as_judge(
+            judge=ChatOpenAI(model="gpt-4o", api_key=settings.OPENAI_API_KEY, http_async_client=http_client),
+            prompt=_JUDGE_PROMPT,
+        )
+        self.enabled = settings.EVAL_ENABLED
+        self.sample_rate = settings.EVAL_SAMPLE_RATE
+        self.batch_size = max(1, settings.EVAL_BATCH_SIZE)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.submitted = 0
+        self.skipped = 0
+        self.dropped = 0
+        self.completed = 0
+        self.failed = 0
+
+    def start(self):
+        """Starts the worker on the running event loop (idempotent)."""
+        if self._worker is not None and not self._worker.done():
+            return
+        self._queue = asyncio.Queue(maxsize=settings.EVAL_QUEUE_MAX_SIZE)
+        self._worker = asyncio.create_task(self._run())
+
+    def submit(self, query: str, context: str, answer: str) -> bool:
+        """Queues an answer for evaluation. Never blocks; returns False if sampled out or dropped."""
+        if not self.enabled or random.random() >= self.sample_rate:
+            self.skipped += 1
+            return False
+        self.start()
+        try:
+            self._queue.put_nowait((query, context, answer))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            log.warning("Online evaluation queue full, dropping item", queue_size=self._queue.qsize())
+            return False
+        self.submitted += 1
+        return True
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await asyncio.gather(*(self._evaluate(*item) for item in batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _evaluate(self, query: str, context: str, answer: str):
+        try:
+            eval_result = await self.judge(
+                inputs={"query": query, "context": context},
+                outputs={"answer": answer}
+            )
+            self.completed += 1
+            log.info("Online Evaluation Result",
+                     score=eval_result.get("score"),
+                     reasoning=eval_result.get("reasoning"))
+        except Exception as e:
+            self.failed += 1
+            log.warning("Online evaluation skipped due to error", error=str(e))
+
+    async def drain(self):
+        """Waits for queued evaluations to finish, then stops the worker."""
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=settings.EVAL_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            log.warning("Online evaluation drain timed out", pending=self._queue.qsize())
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "submitted": self.submitted,
+            "skipped": self.skipped,
+            "dropped": self.dropped,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
@@ -0,0 +1,186 @@
+import os
+import zlib
+import structlog
+import numpy as np
+from typing import Optional, Tuple
+from app.core.config import settings
+from app.core.text import light_stem, tokenize
+
+log = structlog.get_logger()
+
+LABELS = ("greeting", "legal", "off_topic")
+
+# Lexicons are stored in normalize_arabic() form (no hamza on alef, ة -> ه, ى -> ي).
+# A message is a greeting when every token is a greeting token and at least one is an anchor.
+_GREETING_ANCHORS = {
+    # Arabic
+    "مرحبا", "مرحبتين", "اهلا", "اهلين", "هلا", "السلام", "صباح", "مساء", "شكرا", "مشكور",
+    "مشكورين", "يسلمو", "يسلموا", "تحياتي", "وداعا", "هاي", "هلو", "باي", "كيفك", "كيفكم",
+    "حالك", "حالكم", "يو",
+    # Arabizi
+    "marhaba", "ahla", "ahlan", "salam", "shukran", "kifak", "kifik", "kifkon", "yislamo",
+    # English
+    "hi", "hello", "hey", "hiya", "thanks", "thank", "thx", "morning", "evening", "afternoon",
+    "bye", "goodbye", "cheers",
+    # French
+    "bonjour", "bonsoir", "salut", "merci", "coucou", "revoir",
+}
+_GREETING_TOKENS = _GREETING_ANCHORS | {
+    "عليكم", "وعليكم", "الخير", "النور", "كيف", "حالك", "الحال", "حالكم", "انت", "مع", "السلامه",
+    "يعطيك", "العافيه", "كتير", "جزيلا", "هو", "ار", "يو", "يا", "صديقي",
+    "sabah", "masa", "el", "lkheir", "kheir", "w", "ya",
+    "you", "good", "how", "are", "is", "it", "going", "doing", "whats", "up", "there", "much",
+    "very", "so", "ok", "okay", "a", "lot", "night", "day", "nice",
+    "ca", "va", "comment", "allez", "vous", "beaucoup", "au", "bonne", "journee", "soiree",
+}
+_LEGAL_TOKENS = {
+    # Arabic (with common ال / و / ب / ل prefixes stripped, see light_stem)
+    "قانون", "ماده", "مواد", "محكمه", "محاكم", "دعوي", "عقد", "عقود", "ايجار", "مستاجر", "موجر",
+    "حكم", "احكام", "قرار", "اجتهاد", "اجتهادات", "مرسوم", "اشتراعي", "طلاق", "حضانه", "ارث",
+    "ميراث", "شركه", "تعويض", "جزايي", "جريمه", "عقوبه", "محامي", "وكاله", "انذار", "استيناف",
+    "تمييز", "نفقه", "صرف", "تعسفي", "كفاله", "ملكيه", "عقار", "شيك", "قاضي", "نيابه", "شكوي",
+    "موجبات", "اصول", "محاكمات", "تحكيم", "حيازه", "حقوق", "مسووليه", "قانونيه", "قانوني", "تشريع",
+    # English
+    "law", "laws", "legal", "article", "court", "contract", "lease", "rent", "tenant", "landlord",
+    "lawsuit", "sue", "judge", "ruling", "decree", "divorce", "custody", "inheritance", "employer",
+    "employee", "labor", "labour", "penal", "criminal", "crime", "lawyer", "attorney", "liability",
+    "damages", "compensation", "arbitration", "appeal", "rights",
+    # French
+    "loi", "tribunal", "contrat", "bail", "locataire", "juge", "avocat", "decret", "droit",
+    "jugement", "cour", "penal", "obligations",
+}
+# Words that are also common in legal questions ("قدم بلاغا", "وصفه", "كره") are left out;
+# even so, one off-topic word is only a hint (_OFF_TOPIC_HINT) and the LLM decides.
+_OFF_TOPIC_TOKENS = {
+    "طقس", "مطر", "مباراه", "طبخ", "نكته", "مسلسل", "اغنيه", "رياضه",
+    "weather", "football", "soccer", "recipe", "cook", "cooking", "joke", "movie", "song", "sports",
+    "bitcoin", "crypto", "programming", "javascript",
+    "meteo", "recette", "blague", "chanson",
+}
+# Question and filler words (light-stemmed) that do not count as other content next to off-topic words
+_FUNCTION_WORDS = {
+    "ما", "ماذا", "هو", "هي", "هل", "كيف", "شو", "كيفيه", "في", "من", "على", "عن", "الي", "مع", "يوم",
+    "غدا", "بكرا", "هذا", "هذه", "ان", "اي", "لي", "عندي", "اريد", "بدي", "اعطني", "قل",
+    "what", "whats", "is", "the", "a", "an", "how", "today", "tomorrow", "tell", "me", "give", "about",
+    "any", "some", "for", "of", "in", "on", "i", "want", "to", "and", "or",
+    "quel", "quelle", "est", "la", "le", "les", "de", "du", "des", "un", "une", "aujourd", "hui",
+}
+_OFF_TOPIC_HINT = 0.6  # below any sensible INTENT_LOCAL_THRESHOLD
+_MAX_MODEL_CHARS = 256  # n-gram features only look at the head of the message
+
+
+def hashed_ngrams(text: str, n_features: int, ngram_range: Tuple[int, int] = (2, 4)) -> np.ndarray:
+    """Bag of hashed character n-grams (per word, with boundary marks), L2-normalized."""
+    indices = []
+    for token in tokenize(text[:_MAX_MODEL_CHARS]):
+        word = f" {token} "
+        for n in range(ngram_range[0], ngram_range[1] + 1):
+            for i in range(len(word) - n + 1):
+                indices.append(zlib.crc32(word[i:i + n].encode()) % n_features)
+    vec = np.bincount(np.asarray(indices, dtype=np.int64), minlength=n_features).astype(np.float32) if indices \
+        else np.zeros(n_features, dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+class LinearIntentModel:
+    """Multinomial logistic regression over hashed char n-grams (trained by data_pipeline/train_intent_classifier.py)."""
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, n_features: int):
+        self.weights = weights
+        self.bias = bias
+        self.n_features = n_features
+
+    @classmethod
+    def load(cls, path: str) -> "LinearIntentModel":
+        data = np.load(path)
+        return cls(data["weights"], data["bias"], int(data["n_features"]))
+
+    def save(self, path: str):
+        np.savez_compressed(path, weights=self.weights, bias=self.bias, n_features=self.n_features)
+
+    def predict_proba(self, text: str) -> np.ndarray:
+        x = hashed_ngrams(text, self.n_features)
+        logits = self.weights @ x + self.bias
+        exp = np.exp(logits - logits.max())
+        return exp / exp.sum()
+
+
+class LocalIntentClassifier:
+    """
+    Zero-LLM intent pre-classifier that runs in front of the gpt-4o-mini intent call.
+
+    1. Lexicons (Arabic / Arabizi / French / English): pure greetings, messages with
+       several legal terms, and messages made only of off-topic and function words
+       (at least two off-topic words). A single off-topic word is a low-confidence hint.
+    2. Optional linear model over character n-grams (INTENT_MODEL_PATH).
+
+    classify() returns a label only when confidence >= INTENT_LOCAL_THRESHOLD;
+    otherwise None and the caller consults the LLM.
+    """
+
+    def __init__(self, model: Optional[LinearIntentModel] = None, threshold: float = None):
+        self.enabled = settings.INTENT_LOCAL_ENABLED
+        self.threshold = threshold if threshold is not None else settings.INTENT_LOCAL_THRESHOLD
+        self.model = model
+        if self.model is None and settings.INTENT_MODEL_PATH:
+            if os.path.exists(settings.INTENT_MODEL_PATH):
+                self.model = LinearIntentModel.load(settings.INTENT_MODEL_PATH)
+                log.info("Local intent model loaded", path=settings.INTENT_MODEL_PATH)
+            else:
+                log.warning("Local intent model not found, using lexicons only", path=settings.INTENT_MODEL_PATH)
+        self.short_circuited = {label: 0 for label in LABELS}
+        self.deferred = 0
+
+    def predict(self, query: str, history=None) -> Tuple[str, float]:
+        tokens = tokenize(query)
+        if not tokens:
+            return "greeting", 0.5
+
+        stems = {light_stem(t) for t in tokens}
+        legal_hits = len(stems & _LEGAL_TOKENS)
+        if legal_hits:
+            return "legal", 0.95 if legal_hits >= 2 else 0.8
+
+        if len(tokens) <= 8 and set(tokens) <= _GREETING_TOKENS and set(tokens) & _GREETING_ANCHORS:
+            return "greeting", 0.97
+
+        # Off-topic needs an empty history: "and the weather clause?" may be a legal follow-up
+        hint = ("legal", 0.0)
+        off_topic_hits = stems & _OFF_TOPIC_TOKENS
+        if not history and off_topic_hits:
+            if len(off_topic_hits) >= 2 and not stems - _OFF_TOPIC_TOKENS - _FUNCTION_WORDS:
+                return "off_topic", 0.95
+            hint = ("off_topic", _OFF_TOPIC_HINT)
+
+        if self.model is not None:
+            probs = self.model.predict_proba(query)
+            idx = int(np.argmax(probs))
+            label = LABELS[idx]
+            if label == "off_topic" and history:
+                return "legal", 0.0
+            return label, float(probs[idx])
+
+        return hint
+
+    def classify(self, query: str, history=None) -> Optional[str]:
+        if not self.enabled:
+            return None
+        label, confidence = self.predict(query, history)
+        if confidence >= self.threshold:
+            self.short_circuited[label] += 1
+            log.debug("Intent classified locally", intent=label, confidence=confidence)
+            return label
+        self.deferred += 1
+        return None
+
+    def stats(self) -> dict:
+        local = sum(self.short_circuited.values())
+        total = local + self.deferred
+        return {
+            "enabled": self.enabled,
+            "model_loaded": self.model is not None,
+            "short_circuited": dict(self.short_circuited),
+            "deferred_to_llm": self.deferred,
+            "short_circuit_rate": round(local / total, 4) if total else 0.0,
+        }
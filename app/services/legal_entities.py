@@ -0,0 +1,128 @@
+import re
+import json
+from typing import Dict, Iterable, List, Optional
+from app.core.text import light_stem, normalize_arabic, tokenize
+
+# Patterns run on normalize_arabic() text: ة -> ه, Arabic-Indic digits -> ASCII
+ARTICLE_PATTERN = re.compile(r"(?:ماده|article|art\.)\s*(?:رقم\s*)?(\d+)", re.IGNORECASE)
+RULING_PATTERN = re.compile(
+    r"(?:قرار|حكم|اجتهاد|ruling|decision)\s*(?:رقم|no\.?|number|n°)?\s*(\d+)"
+    r"\s*(?:/|-|لعام|لسنه|عام|سنه|of|year|,)?\s*((?:19|20)\d\d)\b",
+    re.IGNORECASE,
+)
+_YEAR = re.compile(r"(?:عام|سنه|year|in)\s*((?:19|20)\d\d)\b", re.IGNORECASE)
+# A year only narrows ruling searches ("قرارات محكمة التمييز لعام 2021"), never article searches
+_RULING_CONTEXT = re.compile(r"قرار|حكم|احكام|اجتهاد|محكمه|مجلس|مجالس|ruling|decision|judgment|court", re.IGNORECASE)
+# Words that do not tell one law / court from another
+_GENERIC_TERMS = {"قانون", "محكمه", "مجلس", "law", "code", "court"}
+
+# Typed scalar fields of the collection -> metadata keys they are derived from (first non-empty wins)
+SCALAR_FIELDS: Dict[str, tuple] = {
+    "law_name": ("law_name", "Law_Name"),
+    "article_number": ("article_number", "Article_Number"),
+    "court": ("Court", "court"),
+    "year": ("Year", "year"),
+    "ruling_number": ("Ruling_Number", "ruling_number"),
+}
+_INT_FIELDS = {"article_number", "year", "ruling_number"}
+
+
+def meta_value(metadata: dict, *names: str):
+    for name in names:
+        if metadata.get(name) not in (None, ""):
+            return metadata[name]
+    return None
+
+
+def as_int(value) -> Optional[int]:
+    try:
+        return int(str(value).strip().translate(str.maketrans("٠١٢٣٤٥٦٧٨٩", "0123456789")))
+    except (TypeError, ValueError):
+        return None
+
+
+def name_terms(name: str) -> List[str]:
+    return [t for t in (light_stem(t) for t in tokenize(name)) if t not in _GENERIC_TERMS]
+
+
+def field_value(metadata: Optional[dict], field: str):
+    """Typed value of one scalar field (int for numbers, stripped str for names), or None."""
+    value = meta_value(metadata or {}, *SCALAR_FIELDS[field])
+    if value is None:
+        return None
+    if field in _INT_FIELDS:
+        return as_int(value)
+    return str(value).strip() or None
+
+
+def scalar_fields(metadata: Optional[dict]) -> Dict[str, object]:
+    """The typed scalar columns of an entity, derived from its metadata JSON."""
+    return {field: field_value(metadata, field) for field in SCALAR_FIELDS}
+
+
+def filter_expr(entities: Dict[str, list], typed: bool = True) -> Optional[str]:
+    """
+    Milvus filter expression for parsed entities, e.g.
+    'law_name == "قانون العمل" and article_number == 24'. typed=False targets the
+    metadata JSON paths instead, for collections created before the typed fields.
+    """
+    clauses = []
+    for field, keys in SCALAR_FIELDS.items():
+        values = entities.get(field)
+        if not values:
+            continue
+        name = field if typed else f'metadata["{keys[0]}"]'
+        literals = [json.dumps(v, ensure_ascii=False) for v in values]
+        if len(literals) == 1:
+            clauses.append(f"{name} == {literals[0]}")
+        else:
+            clauses.append(f"{name} in [{', '.join(literals)}]")
+    return " and ".join(clauses) or None
+
+
+class QueryEntityParser:
+    """
+    Extracts the citation entities of a query for pre-filtering: article numbers,
+    ruling number / year pairs, years, and the law and court names it mentions.
+
+    Numbers are read in Western and Arabic-Indic digits. Law and court names come
+    from the corpus (CitationIndex.laws / .courts): a name is mentioned when every
+    distinctive term of it starts a query term, so "محكمة التمييز الجزائية" names
+    "تمييز جزائي"; a name whose terms are a subset of another mentioned name's is dropped.
+
+    Article and ruling entities never mix in one filter (articles carry no court,
+    rulings no law): explicit numbers decide the side, and a query naming both a
+    law and a court without numbers gets no name filter.
+    """
+
+    def __init__(self, laws: Iterable[str] = (), courts: Iterable[str] = ()):
+        self._laws = {name: terms for name in laws if (terms := name_terms(name))}
+        self._courts = {name: terms for name in courts if (terms := name_terms(name))}
+
+    @staticmethod
+    def _mentioned(names: Dict[str, List[str]], query_terms: List[str]) -> List[str]:
+        found = {
+            name: set(terms) for name, terms in names.items()
+            if all(any(q.startswith(t) for q in query_terms) for t in terms)
+        }
+        return sorted(name for name, terms in found.items()
+                      if not any(terms < other for other in found.values()))
+
+    def parse(self, query: str) -> Dict[str, list]:
+        text = normalize_arabic(query)
+        query_terms = [light_stem(t) for t in tokenize(query)]
+        articles = sorted({int(m.group(1)) for m in ARTICLE_PATTERN.finditer(text)})
+        rulings = [(int(m.group(1)), int(m.group(2))) for m in RULING_PATTERN.finditer(text)]
+        laws = self._mentioned(self._laws, query_terms)
+        courts = self._mentioned(self._courts, query_terms)
+
+        if articles or (laws and not rulings and not courts):
+            return {"law_name": laws, "article_number": articles}
+        years = sorted({year for _, year in rulings})
+        if not years and _RULING_CONTEXT.search(text):
+            years = sorted({int(m.group(1)) for m in _YEAR.finditer(text)})
+        if rulings or courts or years:
+            return {"court": courts if rulings or not laws else [],
+                    "ruling_number": sorted({number for number, _ in rulings}),
+                    "year": years}
+        return {}
@@ -0,0 +1,196 @@
+import os
+import json
+import time
+import structlog
+import numpy as np
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+from app.core.config import settings
+from app.core.reload import BackgroundReload
+from app.core.text import light_stem, tokenize
+
+log = structlog.get_logger()
+
+_FORMAT_VERSION = 1
+
+
+def analyze(text: str) -> List[str]:
+    """BM25 terms: normalize_arabic() tokens with one Arabic prefix stripped. Numbers are kept whole."""
+    return [light_stem(t) for t in tokenize(text)]
+
+
+class BM25Index:
+    """
+    In-process inverted index over text_content with Okapi BM25 scoring.
+
+    Postings are stored term-major in flat NumPy arrays (CSR layout), so a query
+    touches only the postings of its own terms. The whole index, documents
+    included, is persisted as a single .npz file that loads without pickling.
+    """
+
+    def __init__(self, terms: np.ndarray, term_offsets: np.ndarray, posting_docs: np.ndarray,
+                 posting_tfs: np.ndarray, doc_lengths: np.ndarray, docs: List[dict],
+                 k1: float = 1.5, b: float = 0.75):
+        self.terms = terms
+        self.vocabulary: Dict[str, int] = {t: i for i, t in enumerate(terms.tolist())}
+        self.term_offsets = term_offsets
+        self.posting_docs = posting_docs
+        self.posting_tfs = posting_tfs
+        self.doc_lengths = doc_lengths
+        self.docs = docs
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+        n = len(docs)
+        df = np.diff(term_offsets).astype(np.float32)
+        self.idf = np.log1p((n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        # Length normalization part of the BM25 denominator, precomputed per document
+        self._norm = (k1 * (1 - b + b * doc_lengths / (self.avg_doc_length or 1.0))).astype(np.float32)
+        self._sources = np.array([doc.get("source") for doc in docs], dtype=object)
+        self._source_masks: Dict[tuple, np.ndarray] = {}
+
+    @classmethod
+    def build(cls, docs: Iterable[dict]) -> "BM25Index":
+        """docs: dicts with id, text, source and metadata (the Milvus entity fields)."""
+        docs = list(docs)
+        postings: Dict[str, List[tuple]] = {}
+        doc_lengths = np.zeros(len(docs), dtype=np.float32)
+        for doc_idx, doc in enumerate(docs):
+            counts = Counter(analyze(doc["text"]))
+            doc_lengths[doc_idx] = sum(counts.values())
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((doc_idx, tf))
+
+        terms = sorted(postings)
+        term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        term_offsets[1:] = np.cumsum([len(postings[t]) for t in terms])
+        posting_docs = np.empty(term_offsets[-1], dtype=np.int32)
+        posting_tfs = np.empty(term_offsets[-1], dtype=np.float32)
+        for i, term in enumerate(terms):
+            entries = postings[term]
+            posting_docs[term_offsets[i]:term_offsets[i + 1]] = [d for d, _ in entries]
+            posting_tfs[term_offsets[i]:term_offsets[i + 1]] = [tf for _, tf in entries]
+        return cls(np.array(terms, dtype=str), term_offsets, posting_docs, posting_tfs, doc_lengths, docs)
+
+    def save(self, path: str):
+        """Atomically writes the index to *path* (.npz)."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                version=np.int32(_FORMAT_VERSION),
+                terms=self.terms,
+                term_offsets=self.term_offsets,
+                posting_docs=self.posting_docs,
+                posting_tfs=self.posting_tfs,
+                doc_lengths=self.doc_lengths,
+                docs=np.frombuffer(json.dumps(self.docs, ensure_ascii=False).encode(), dtype=np.uint8),
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with np.load(path) as data:
+            if int(data["version"]) != _FORMAT_VERSION:
+                raise ValueError(f"Unsupported lexical index version {int(data['version'])}")
+            return cls(
+                data["terms"], data["term_offsets"], data["posting_docs"], data["posting_tfs"],
+                data["doc_lengths"], json.loads(data["docs"].tobytes()),
+            )
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def _source_mask(self, sources: Iterable[str]) -> np.ndarray:
+        key = tuple(sorted(sources))
+        if key not in self._source_masks:
+            self._source_masks[key] = np.isin(self._sources, key)
+        return self._source_masks[key]
+
+    def search(self, query: str, limit: int = 10, sources: Optional[Iterable[str]] = None) -> List[dict]:
+        """
+        Top *limit* documents by BM25, as hit dicts shaped like VectorStoreService results.
+        sources: only documents of these source types (the routed Milvus partitions).
+        """
+        term_ids = {self.vocabulary[t] for t in analyze(query) if t in self.vocabulary}
+        if not term_ids:
+            return []
+        scores = np.zeros(len(self.docs), dtype=np.float32)
+        for t in term_ids:
+            start, end = self.term_offsets[t], self.term_offsets[t + 1]
+            docs = self.posting_docs[start:end]
+            tfs = self.posting_tfs[start:end]
+            # doc indices are unique within one posting list, so fancy-index += is safe
+            scores[docs] += self.idf[t] * tfs * (self.k1 + 1) / (tfs + self._norm[docs])
+
+        if sources is not None:
+            scores[~self._source_mask(sources)] = 0.0
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit)[:limit]]
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [{**self.docs[i], "score": float(scores[i])} for i in ranked]
+
+
+class LexicalRetriever(BackgroundReload):
+    """Serves BM25Index searches for the RAG pipeline and picks up rebuilt index files."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.LEXICAL_INDEX_PATH
+        self.index: Optional[BM25Index] = None
+        self._mtime = None
+        self.searches = 0
+        self._load()
+
+    def _load(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            if self._mtime is None:
+                log.info("Lexical index not found, hybrid search disabled until it is built", path=self.path)
+                self._mtime = 0
+            return
+        if mtime == self._mtime:
+            return
+        start = time.perf_counter()
+        try:
+            self.index = BM25Index.load(self.path)
+        except Exception as e:
+            log.warning("Failed to load lexical index", path=self.path, error=str(e))
+            self._mtime = mtime
+            return
+        self._mtime = mtime
+        log.info("Lexical index loaded", path=self.path, documents=len(self.index),
+                 terms=len(self.index.terms), load_ms=round((time.perf_counter() - start) * 1000, 1))
+
+    def search(self, query: str, limit: int, sources: Optional[Iterable[str]] = None) -> List[dict]:
+        self.reload_if_due()
+        if self.index is None:
+            return []
+        self.searches += 1
+        return self.index.search(query, limit, sources)
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.index is not None,
+            "documents": len(self.index) if self.index is not None else 0,
+            "terms": len(self.index.terms) if self.index is not None else 0,
+            "searches": self.searches,
+        }
+
+
+def reciprocal_rank_fusion(result_lists: List[List[dict]], limit: int, k: int = None) -> List[dict]:
+    """
+    Merges ranked hit lists by id with RRF: score(d) = sum over lists of 1 / (k + rank).
+    Each fused hit keeps its first-seen fields; "score" becomes the fused score.
+    """
+    k = k if k is not None else settings.HYBRID_RRF_K
+    fused: Dict[object, dict] = {}
+    scores: Dict[object, float] = {}
+    for results in result_lists:
+        for rank, hit in enumerate(results, start=1):
+            fused.setdefault(hit["id"], hit)
+            scores[hit["id"]] = scores.get(hit["id"], 0.0) + 1.0 / (k + rank)
+    ranked = sorted(scores, key=scores.get, reverse=True)[:limit]
+    return [{**fused[doc_id], "score": round(scores[doc_id], 6)} for doc_id in ranked]
@@ -0,0 +1,75 @@
+import time
+import structlog
+from collections import OrderedDict
+from typing import Optional
+from app.core.config import settings
+
+log = structlog.get_logger()
+
+
+class TwoLevelCache:
+    """
+    Small string cache for deterministic LLM outputs (query rewrites, intent labels).
+
+    L1 is an in-process LRU with TTL; L2 is the shared Redis (optional). Callers
+    build keys that include a prompt_version() fingerprint so editing a system
+    prompt naturally misses every old entry.
+    """
+
+    def __init__(self, namespace: str, redis_client=None, max_entries: int = None, ttl: int = None):
+        self.namespace = namespace
+        self.redis = redis_client
+        self.max_entries = max_entries or settings.LLM_CACHE_MAX_ENTRIES
+        self.ttl = ttl or settings.LLM_CACHE_TTL
+        self._l1: "OrderedDict[str, tuple]" = OrderedDict()
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._l1.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at >= time.monotonic():
+                self._l1.move_to_end(key)
+                self.l1_hits += 1
+                return value
+            del self._l1[key]
+
+        if self.redis:
+            try:
+                value = await self.redis.get(f"{self.namespace}:{key}")
+                if value is not None:
+                    value = value.decode() if isinstance(value, bytes) else value
+                    self.l2_hits += 1
+                    self._remember(key, value)
+                    return value
+            except Exception as e:
+                log.warning("Redis cache read error", namespace=self.namespace, error=str(e))
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: str):
+        self._remember(key, value)
+        if self.redis:
+            try:
+                await self.redis.setex(f"{self.namespace}:{key}", self.ttl, value)
+            except Exception as e:
+                log.warning("Redis cache write error", namespace=self.namespace, error=str(e))
+
+    def _remember(self, key: str, value: str):
+        self._l1[key] = (value, time.monotonic() + self.ttl)
+        self._l1.move_to_end(key)
+        while len(self._l1) > self.max_entries:
+            self._l1.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.l1_hits + self.l2_hits + self.misses
+        return {
+            "entries": len(self._l1),
+            "l1_hits": self.l1_hits,
+            "l2_hits": self.l2_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.l1_hits + self.l2_hits) / lookups, 4) if lookups else 0.0,
+        }
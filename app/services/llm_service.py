@@ -1,14 +1,46 @@
 from openai import AsyncOpenAI
+from typing import Optional
 import structlog
-from app.core.config import settings
+from app.core.clients import create_openai_client
 from langsmith import traceable
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
 log = structlog.get_logger()
 
 class LLMService:
-    def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    def __init__(self, client: Optional[AsyncOpenAI] = None):
+        self.client = client or create_openai_client()
+        # Token usage of the answer generations; cached_tokens are prompt tokens
+        # OpenAI served from its automatic prompt (prefix) cache
+        self.generations = 0
+        self.prefix_cache_hits = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+
+    def _record_usage(self, response_usage, usage: Optional[dict]):
+        if response_usage is None:
+            return
+        details = getattr(response_usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None) or 0
+        self.generations += 1
+        self.prefix_cache_hits += bool(cached)
+        self.prompt_tokens += response_usage.prompt_tokens
+        self.cached_tokens += cached
+        self.completion_tokens += response_usage.completion_tokens
+        if usage is not None:
+            usage.update(prompt_tokens=response_usage.prompt_tokens, cached_tokens=cached,
+                         completion_tokens=response_usage.completion_tokens)
+
+    def stats(self) -> dict:
+        return {
+            "generations": self.generations,
+            "prefix_cache_hits": self.prefix_cache_hits,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cached_ratio": round(self.cached_tokens / self.prompt_tokens, 4) if self.prompt_tokens else 0.0,
+            "completion_tokens": self.completion_tokens,
+        }
 
     @retry(
         stop=stop_after_attempt(3), 
@@ -16,7 +48,9 @@ class LLMService:
         retry=retry_if_exception_type(Exception)
     )
     @traceable(run_type="llm", name="Final LLM Generation")
-    async def generate_response(self, messages: list[dict], temperature: float = 0.2) -> str:
+    async def generate_response(self, messages: list[dict], temperature: float = 0.2,
+                                usage: Optional[dict] = None) -> str:
+        """usage: filled in with prompt_tokens, cached_tokens and completion_tokens when given."""
         log.info("Calling LLM", model="gpt-4o-mini", message_count=len(messages))
         try:
             response = await self.client.chat.completions.create(
@@ -24,24 +58,30 @@ class LLMService:
                 messages=messages,
                 temperature=temperature
             )
+            self._record_usage(response.usage, usage)
             return response.choices[0].message.content
         except Exception as e:
             log.error("LLM generation failed", error=str(e))
             raise e
 
     @traceable(run_type="llm", name="Streaming LLM Generation")
-    async def stream_response(self, messages: list[dict], temperature: float = 0.2):
+    async def stream_response(self, messages: list[dict], temperature: float = 0.2,
+                              usage: Optional[dict] = None):
+        """usage: as for generate_response, filled in once the stream has ended."""
         log.info("Calling Streaming LLM", model="gpt-4o-mini", message_count=len(messages))
         try:
             stream = await self.client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=messages,
                 temperature=temperature,
-                stream=True
+                stream=True,
+                stream_options={"include_usage": True},
             )
             async for chunk in stream:
                 if chunk.choices and chunk.choices[0].delta.content:
                     yield chunk.choices[0].delta.content
+                if getattr(chunk, "usage", None) is not None:  # the final, choice-less chunk
+                    self._record_usage(chunk.usage, usage)
         except Exception as e:
             log.error("LLM streaming failed", error=str(e))
             raise e
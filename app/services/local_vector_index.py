@@ -0,0 +1,249 @@
+import re
+import json
+import time
+import structlog
+import numpy as np
+from collections import OrderedDict
+from typing import Callable, List, Optional
+from app.core.config import settings
+from app.core.snapshot import open_vectors, read_docs, read_ids, read_manifest
+from app.services.legal_entities import SCALAR_FIELDS, field_value
+
+log = structlog.get_logger()
+
+_RERANK_FACTOR = 4  # int8 scan keeps limit * factor candidates for exact float32 re-scoring
+_SCAN_CHUNK = 4096  # rows dequantized at a time by the int8 scan
+_MAX_CACHED_FILTERS = 64
+
+
+# ── Filter expressions ──────────────────────────────────────────────────────
+# The subset of Milvus boolean expressions the RAG pipeline produces:
+#   field == 24, metadata["article_number"] == 24, source_type in ["article"], joined by and / &&
+# Typed citation fields (law_name, article_number, court, year, ruling_number) are
+# read from the snapshot metadata the way the collection derives them.
+
+_CLAUSE = re.compile(
+    r'^\s*(?P<field>\w+(?:\[\s*["\'][^"\']+["\']\s*\])?)\s*'
+    r'(?P<op>==|!=|>=|<=|>|<|in)\s*(?P<value>.+?)\s*$',
+    re.IGNORECASE,
+)
+_AND = re.compile(r"\s+(?:and|&&)\s+", re.IGNORECASE)
+_FIELD_ALIASES = {"pk": "id", "source_type": "source", "text_content": "text"}
+_OPS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    ">": lambda a, b: a is not None and a > b,
+    ">=": lambda a, b: a is not None and a >= b,
+    "<": lambda a, b: a is not None and a < b,
+    "<=": lambda a, b: a is not None and a <= b,
+    "in": lambda a, b: a in b,
+}
+
+
+def _literal(raw: str):
+    raw = raw.strip()
+    if raw.startswith("'") or "['" in raw or ", '" in raw:
+        raw = raw.replace("'", '"')
+    return json.loads(raw)
+
+
+def compile_filter(expr: str) -> Callable[[dict], bool]:
+    """Compiles a filter expression into a predicate over snapshot docs. Raises ValueError if unsupported."""
+    predicates = []
+    for clause in _AND.split(expr.strip()):
+        match = _CLAUSE.match(clause)
+        if not match:
+            raise ValueError(f"Unsupported filter clause: {clause!r}")
+        field, op = match.group("field"), match.group("op").lower()
+        try:
+            value = _literal(match.group("value"))
+        except ValueError:
+            raise ValueError(f"Unsupported filter value: {match.group('value')!r}")
+        key_match = re.match(r'^metadata\[\s*["\']([^"\']+)["\']\s*\]$', field)
+        if key_match:
+            key = key_match.group(1)
+            getter = lambda doc, key=key: (doc.get("metadata") or {}).get(key)
+        elif field in SCALAR_FIELDS:
+            getter = lambda doc, field=field: field_value(doc.get("metadata"), field)
+        else:
+            name = _FIELD_ALIASES.get(field, field)
+            getter = lambda doc, name=name: doc.get(name)
+        predicates.append(lambda doc, getter=getter, fn=_OPS[op], value=value: fn(getter(doc), value))
+    return lambda doc: all(p(doc) for p in predicates)
+
+
+# ── Index ───────────────────────────────────────────────────────────────────
+
+class LocalVectorIndex:
+    """
+    In-process COSINE index over a Milvus snapshot (app/core/snapshot.py), with the
+    same hit format as VectorStoreService.search.
+
+    - float32: rows stay memory-mapped from vectors.npy; exact NumPy top-k.
+    - int8: rows are quantized into RAM (4x smaller); the int8 scan picks
+      candidates that are re-scored exactly from the mapped float32 rows.
+    - nlist > 0 adds an IVF coarse quantizer (spherical k-means); a query only
+      scans the rows of its nprobe nearest lists.
+    """
+
+    def __init__(self, ids: np.ndarray, vectors: np.ndarray, docs: List[dict],
+                 dtype: str = "float32", nlist: int = 0, nprobe: int = 8):
+        self.ids = ids
+        self.vectors = vectors
+        self.docs = [{**doc, "id": int(pk)} for pk, doc in zip(ids, docs)]
+        self.dtype = dtype
+        self.nprobe = nprobe
+        self.manifest: dict = {}
+        self._filters: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._inv_norms = self._inverse_norms(vectors)
+        self._quantized = self._scales = None
+        if dtype == "int8":
+            self._quantized, self._scales = self._quantize(vectors)
+        elif dtype != "float32":
+            raise ValueError(f"Unsupported local index dtype: {dtype}")
+        self._centroids = self._list_offsets = self._list_rows = None
+        if nlist and len(ids) > nlist:
+            self._build_ivf(nlist)
+
+    @classmethod
+    def load(cls, path: str = None, dtype: str = None, nlist: int = None, nprobe: int = None) -> "LocalVectorIndex":
+        path = path or settings.LOCAL_INDEX_PATH
+        manifest = read_manifest(path)
+        start = time.perf_counter()
+        index = cls(
+            read_ids(path),
+            open_vectors(path),
+            read_docs(path),
+            dtype=dtype or settings.LOCAL_INDEX_DTYPE,
+            nlist=settings.LOCAL_INDEX_NLIST if nlist is None else nlist,
+            nprobe=nprobe or settings.LOCAL_INDEX_NPROBE,
+        )
+        index.manifest = manifest
+        log.info("Local vector index loaded", path=path, count=len(index), dtype=index.dtype,
+                 ivf_lists=0 if index._centroids is None else len(index._centroids),
+                 load_ms=round((time.perf_counter() - start) * 1000, 1))
+        return index
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @staticmethod
+    def _inverse_norms(vectors: np.ndarray) -> np.ndarray:
+        # Snapshots keep the stored vectors as-is; COSINE needs them unit-length
+        inv = np.empty(len(vectors), dtype=np.float32)
+        for start in range(0, len(vectors), _SCAN_CHUNK):
+            norms = np.linalg.norm(np.asarray(vectors[start:start + _SCAN_CHUNK], dtype=np.float32), axis=1)
+            inv[start:start + len(norms)] = 1 / np.where(norms == 0, 1, norms)
+        return inv
+
+    def _quantize(self, vectors: np.ndarray):
+        quantized = np.empty(vectors.shape, dtype=np.int8)
+        scales = np.empty(len(vectors), dtype=np.float32)
+        for start in range(0, len(vectors), _SCAN_CHUNK):
+            block = np.asarray(vectors[start:start + _SCAN_CHUNK], dtype=np.float32)
+            block = block * self._inv_norms[start:start + len(block), None]
+            block_scales = np.abs(block).max(axis=1) / 127
+            block_scales[block_scales == 0] = 1.0
+            quantized[start:start + len(block)] = np.rint(block / block_scales[:, None])
+            scales[start:start + len(block)] = block_scales
+        return quantized, scales
+
+    def _build_ivf(self, nlist: int, iterations: int = 10, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        data = np.asarray(self.vectors, dtype=np.float32) * self._inv_norms[:, None]
+        centroids = data[rng.choice(len(data), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(data @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = data[assignment == c]
+                if len(members):
+                    mean = members.sum(axis=0)
+                    centroids[c] = mean / (np.linalg.norm(mean) or 1.0)
+                else:
+                    centroids[c] = data[rng.integers(len(data))]  # re-seed an empty list
+        assignment = np.argmax(data @ centroids.T, axis=1)
+        self._list_rows = np.argsort(assignment, kind="stable")
+        self._list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=nlist))])
+        self._centroids = centroids
+
+    def _ivf_candidates(self, q: np.ndarray) -> np.ndarray:
+        nprobe = min(self.nprobe, len(self._centroids))
+        lists = np.argpartition(-(self._centroids @ q), nprobe - 1)[:nprobe]
+        return np.concatenate([self._list_rows[self._list_offsets[c]:self._list_offsets[c + 1]] for c in lists])
+
+    def _filter_rows(self, expr: str) -> np.ndarray:
+        rows = self._filters.get(expr)
+        if rows is None:
+            predicate = compile_filter(expr)
+            rows = np.fromiter((i for i, doc in enumerate(self.docs) if predicate(doc)), dtype=np.int64)
+            self._filters[expr] = rows
+            while len(self._filters) > _MAX_CACHED_FILTERS:
+                self._filters.popitem(last=False)
+        else:
+            self._filters.move_to_end(expr)
+        return rows
+
+    def _exact_scores(self, q: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        if rows is None:
+            return np.asarray(self.vectors @ q, dtype=np.float32) * self._inv_norms
+        return np.asarray(self.vectors[rows] @ q, dtype=np.float32) * self._inv_norms[rows]
+
+    def _int8_scores(self, q: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        n = len(self.ids) if rows is None else len(rows)
+        scores = np.empty(n, dtype=np.float32)
+        for start in range(0, n, _SCAN_CHUNK):
+            idx = slice(start, start + _SCAN_CHUNK) if rows is None else rows[start:start + _SCAN_CHUNK]
+            block = self._quantized[idx].astype(np.float32)
+            scores[start:start + len(block)] = (block @ q) * self._scales[idx]
+        return scores
+
+    def search(self, vector, limit: int = 5, expr: str = None) -> List[dict]:
+        q = np.asarray(vector, dtype=np.float32)
+        q = q / (np.linalg.norm(q) or 1.0)
+
+        rows = None
+        if expr:
+            try:
+                rows = self._filter_rows(expr)
+            except ValueError as e:
+                log.warning("Local index cannot evaluate filter, returning no results", expr=expr, error=str(e))
+                return []
+        elif self._centroids is not None:
+            rows = self._ivf_candidates(q)
+        if rows is not None and not len(rows):
+            return []
+
+        n = len(self.ids) if rows is None else len(rows)
+        if self._quantized is not None:
+            scores = self._int8_scores(q, rows)
+            keep = min(n, limit * _RERANK_FACTOR)
+            top = np.argpartition(-scores, keep - 1)[:keep] if keep < n else np.arange(n)
+            candidates = top if rows is None else rows[top]
+            scores = self._exact_scores(q, candidates)
+            rows = candidates
+        else:
+            scores = self._exact_scores(q, rows)
+
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        hits = []
+        for i in top:
+            doc = self.docs[i if rows is None else rows[i]]
+            hits.append({
+                "id": doc["id"],
+                "score": float(scores[i]),
+                "text": doc["text"],
+                "source": doc["source"],
+                "metadata": doc["metadata"],
+            })
+        return hits
+
+    def stats(self) -> dict:
+        return {
+            "count": len(self.ids),
+            "dtype": self.dtype,
+            "ivf_lists": 0 if self._centroids is None else len(self._centroids),
+            "nprobe": self.nprobe if self._centroids is not None else None,
+            "resident_bytes": int(self._quantized.nbytes) if self._quantized is not None else 0,
+        }
@@ -1,7 +1,10 @@
 import structlog
+from typing import Optional
 from openai import AsyncOpenAI
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-from app.core.config import settings
+from app.core.clients import create_openai_client
+from app.core.text import normalize_query, prompt_version, text_hash
+from app.services.llm_output_cache import TwoLevelCache
 from langsmith import traceable
 
 log = structlog.get_logger()
@@ -25,6 +28,9 @@ Rules:
 - Keep the output concise (1–3 sentences maximum).\
 """
 
+_REWRITER_MODEL = "gpt-4o-mini"
+_REWRITER_PROMPT_VERSION = prompt_version(_REWRITER_MODEL + _REWRITER_SYSTEM_PROMPT)
+
 
 class QueryRewriterService:
     """
@@ -33,8 +39,10 @@ class QueryRewriterService:
     retrieves more relevant law articles and court rulings.
     """
 
-    def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    def __init__(self, client: Optional[AsyncOpenAI] = None, redis_client=None):
+        self.client = client or create_openai_client()
+        # temperature=0 makes rewrites deterministic enough to memoize
+        self.cache = TwoLevelCache("rewrite", redis_client)
 
     @traceable(run_type="llm", name="Rewrite Query")
     async def rewrite(self, query: str) -> str:
@@ -42,10 +50,19 @@ class QueryRewriterService:
         Rewrite *query* into formal Lebanese legal search terms.
         Falls back to the original query on any failure so the pipeline is never blocked.
         """
+        cache_key = f"{_REWRITER_PROMPT_VERSION}:{text_hash(normalize_query(query))}"
+        cached = await self.cache.get(cache_key)
+        if cached:
+            log.info("QueryRewriter cache hit")
+            return cached
+
         try:
-            rewritten = await self._call_llm(query)
+            rewritten = (await self._call_llm(query)).strip()
             # Safety: if the model returns something empty, fall back
-            return rewritten.strip() or query
+            if not rewritten:
+                return query
+            await self.cache.set(cache_key, rewritten)
+            return rewritten
         except Exception as e:
             log.warning(
                 "QueryRewriter failed, falling back to original query",
@@ -62,7 +79,7 @@ class QueryRewriterService:
     async def _call_llm(self, query: str) -> str:
         log.info("QueryRewriter: rewriting query", query=query)
         response = await self.client.chat.completions.create(
-            model="gpt-4o-mini",
+            model=_REWRITER_MODEL,
             messages=[
                 {"role": "system", "content": _REWRITER_SYSTEM_PROMPT},
                 {"role": "user", "content": query},
@@ -1,17 +1,29 @@
-import re
+import time
+import asyncio
+import httpx
 import structlog
 import pybreaker
-from typing import List, Optional
+from typing import Dict, List, Optional
+from openai import AsyncOpenAI
 from app.services.embedding_service import EmbeddingService
 from app.services.vector_store_service import VectorStoreService
 from app.services.llm_service import LLMService
 from app.services.query_rewriter_service import QueryRewriterService
 from app.services.drafting_service import DraftingService
+from app.services.evaluation_service import OnlineEvaluationService
+from app.services.response_cache import ResponseCache, replay_stream
+from app.services.llm_output_cache import TwoLevelCache
+from app.services.intent_classifier import LocalIntentClassifier
+from app.services.lexical_index import LexicalRetriever, reciprocal_rank_fusion
+from app.services.citation_index import CitationLookup
+from app.services.context_packer import ContextPacker
+from app.services.legal_entities import QueryEntityParser, filter_expr
+from app.services.source_routing import apply_quotas, route_sources, source_quotas
+from app.core.text import normalize_query, prompt_version, text_hash
 from app.models.schemas import ChatRequest, ChatResponse, SourceDocument
 from langsmith import traceable
-from openevals.llm import create_llm_as_judge
-from langchain_openai import ChatOpenAI
 from app.core.config import settings
+from app.core.metrics import LatencyTracker, elapsed_ms, stage_timer
 
 log = structlog.get_logger()
 
@@ -35,43 +47,110 @@ If conversation history is provided, use it to understand whether the message is
 Reply with ONLY one word: greeting, legal, or off_topic.\
 """
 
+_INTENT_MODEL = "gpt-4o-mini"
+_INTENT_PROMPT_VERSION = prompt_version(_INTENT_MODEL + _INTENT_SYSTEM_PROMPT)
+
+async def _timed(timings: dict, stage: str, coro):
+    """Awaits *coro* and records its duration (ms) under *stage* if it completes."""
+    start = time.perf_counter()
+    result = await coro
+    timings[stage] = elapsed_ms(start)
+    return result
+
+
+def _discard(*tasks: Optional[asyncio.Task]):
+    """Cancels speculative tasks that are no longer needed without leaking their exceptions."""
+    for task in tasks:
+        if task is None:
+            continue
+        if not task.done():
+            task.cancel()
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
 class RAGService:
-    def __init__(self):
-        self.query_rewriter = QueryRewriterService()
-        self.embedding_service = EmbeddingService()
-        self.vector_store = VectorStoreService()
-        self.llm_service = LLMService()
+    def __init__(
+        self,
+        openai_client: Optional[AsyncOpenAI] = None,
+        redis_client=None,
+        vector_store: Optional[VectorStoreService] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ):
+        # All sub-services share the injected clients when the app-scoped
+        # ServiceContainer builds us; standalone scripts get their own.
+        self.embedding_service = EmbeddingService(client=openai_client, redis_client=redis_client)
+        self.query_rewriter = QueryRewriterService(client=openai_client, redis_client=self.embedding_service.redis)
+        self.vector_store = vector_store or VectorStoreService()
+        self.llm_service = LLMService(client=openai_client)
         self.drafting_service = DraftingService()
+        self.stage_latency = LatencyTracker()
+        self.response_cache = ResponseCache(redis_client=self.embedding_service.redis)
+        self.intent_cache = TwoLevelCache("intent", self.embedding_service.redis)
+        self.local_intent = LocalIntentClassifier()
+        # BM25 over text_content, fused with the Milvus results (data_pipeline/build_lexical_index.py)
+        self.lexical = LexicalRetriever() if settings.HYBRID_SEARCH_ENABLED else None
+        # Exact (law, article) / (court, ruling, year) lookup for pinpoint citations
+        self.citations = CitationLookup() if settings.CITATION_LOOKUP_ENABLED else None
+        # Query entities -> scalar pre-filter; law / court names come from the citation index
+        self._entity_parser = QueryEntityParser()
+        self._entity_vocabulary = None
+        # Token-budgeted context: relevant windows, no near-duplicates, compact metadata
+        self.context_packer = ContextPacker()
         
-        # Initialize an LLM-as-a-judge for online evaluation
-        self.judge = create_llm_as_judge(
-            judge=ChatOpenAI(model="gpt-4o", api_key=settings.OPENAI_API_KEY),
-            prompt="Is the answer legally accurate and helpful based on the context provided?"
-        )
+        # LLM-as-a-judge for online evaluation, run off the request path
+        self.evaluator = OnlineEvaluationService(http_client=http_client)
 
     @traceable(run_type="chain", name="RAG Pipeline")
     async def process_query(self, request: ChatRequest) -> ChatResponse:
         query = request.query
         log.info("Processing query", query=query)
-
-        # 0. Intent gate
-        intent = await self._classify_intent(query, request.history)
+        started = time.perf_counter()
+        timings = {}
+
+        # Exact-match answer cache
+        cached = await self.response_cache.get_exact(query, request.history)
+        if cached:
+            self._record_timings(timings, started)
+            return ChatResponse(response=cached[0], sources=cached[1])
+
+        # Pinpoint citations skip the intent gate, rewrite, embedding and vector search
+        citation_hits = self._lookup_citation(query, timings)
+
+        # 0. Intent gate (rewrite + raw-query embedding run speculatively alongside it)
+        if citation_hits:
+            intent, rewrite_task, embedding_task = "legal", None, None
+        else:
+            intent, rewrite_task, embedding_task = await self._pre_retrieval(request, timings)
         log.info("Intent classified", intent=intent)
-        if intent == "greeting":
-            return ChatResponse(response=_GREETING_RESPONSE, sources=[])
-        if intent == "off_topic":
-            return ChatResponse(response=_OFF_TOPIC_RESPONSE, sources=[])
+        if intent in ("greeting", "off_topic"):
+            self._record_timings(timings, started)
+            response = _GREETING_RESPONSE if intent == "greeting" else _OFF_TOPIC_RESPONSE
+            return ChatResponse(response=response, sources=[])
+
+        # Semantic answer cache on the raw-query embedding
+        cached, query_vector = await self._semantic_cache_lookup(request, embedding_task)
+        if cached:
+            _discard(rewrite_task, embedding_task)
+            self._record_timings(timings, started)
+            return ChatResponse(response=cached[0], sources=cached[1])
 
         # 1. Retrieve & Prepare
-        messages, sources, context_text = await self._prepare_rag_context(request)
+        messages, sources, context_text = await self._prepare_rag_context(
+            request, rewrite_task, embedding_task, timings, citation_hits
+        )
 
         # 4. Generate Response
         try:
-            response_text = await self.llm_service.generate_response(messages)
+            usage = {}
+            with stage_timer(timings, "generation"):
+                response_text = await self.llm_service.generate_response(messages, usage=usage)
+            self._record_usage(timings, usage, "generation")
+            self._record_timings(timings, started)
             
-            # 5. Online Evaluation (OpenEvals + LangSmith)
+            # 5. Online Evaluation (OpenEvals + LangSmith), queued in the background
             if context_text:
-                self._run_online_eval(query, context_text, response_text)
+                self.evaluator.submit(query, context_text, response_text)
+                self.response_cache.put(query, request.history, response_text, sources, query_vector)
 
             return ChatResponse(response=response_text, sources=sources)
         except Exception as e:
@@ -85,81 +164,179 @@ class RAGService:
     async def stream_query(self, request: ChatRequest):
         query = request.query
         log.info("Streaming query", query=query)
+        started = time.perf_counter()
+        timings = {}
+
+        # Exact-match answer cache, replayed in the same SSE event format
+        cached = await self.response_cache.get_exact(query, request.history)
+        if cached:
+            self._record_timings(timings, started)
+            for event in replay_stream(*cached):
+                yield event
+            return
+
+        citation_hits = self._lookup_citation(query, timings)
 
-        # 0. Intent gate — short-circuit before touching rewriter / embeddings / Milvus
-        intent = await self._classify_intent(query, request.history)
+        # 0. Intent gate — greetings / off-topic cancel the speculative rewrite and embedding
+        if citation_hits:
+            intent, rewrite_task, embedding_task = "legal", None, None
+        else:
+            intent, rewrite_task, embedding_task = await self._pre_retrieval(request, timings)
         log.info("Intent classified", intent=intent)
-        if intent == "greeting":
+        if intent in ("greeting", "off_topic"):
+            self._record_timings(timings, started)
             yield {"type": "sources", "sources": []}
-            yield {"type": "content", "content": _GREETING_RESPONSE}
+            yield {"type": "content", "content": _GREETING_RESPONSE if intent == "greeting" else _OFF_TOPIC_RESPONSE}
             return
-        if intent == "off_topic":
-            yield {"type": "sources", "sources": []}
-            yield {"type": "content", "content": _OFF_TOPIC_RESPONSE}
+
+        cached, query_vector = await self._semantic_cache_lookup(request, embedding_task)
+        if cached:
+            _discard(rewrite_task, embedding_task)
+            self._record_timings(timings, started)
+            for event in replay_stream(*cached):
+                yield event
             return
 
         # 1. Retrieve & Prepare
-        messages, sources, context_text = await self._prepare_rag_context(request)
+        messages, sources, context_text = await self._prepare_rag_context(
+            request, rewrite_task, embedding_task, timings, citation_hits
+        )
 
         # 2. Yield Sources first (so UI can show them immediately)
         yield {"type": "sources", "sources": [s.dict() for s in sources]}
 
         # 3. Stream bits of response
         full_response = ""
-        async for chunk in self.llm_service.stream_response(messages):
+        usage = {}
+        async for chunk in self.llm_service.stream_response(messages, usage=usage):
+            if not full_response:
+                timings["ttft"] = elapsed_ms(started)
             full_response += chunk
             yield {"type": "content", "content": chunk}
+        self._record_usage(timings, usage, "ttft")
+        self._record_timings(timings, started)
 
         # 4. Background Evaluation
         if context_text and full_response:
-             self._run_online_eval(query, context_text, full_response)
+            self.evaluator.submit(query, context_text, full_response)
+            self.response_cache.put(query, request.history, full_response, sources, query_vector)
 
-    async def _prepare_rag_context(self, request: ChatRequest):
+    @staticmethod
+    def _record_usage(timings: dict, usage: dict, stage: str):
+        """
+        Logs the generation's token usage and files *stage*'s latency under
+        <stage>_prefix_cached / <stage>_prefix_miss, so the stage percentiles show
+        what the provider's prompt cache saves.
+        """
+        if not usage:
+            return
+        log.info("LLM usage", **usage)
+        if stage in timings:
+            outcome = "prefix_cached" if usage.get("cached_tokens") else "prefix_miss"
+            timings[f"{stage}_{outcome}"] = timings[stage]
+
+    def _record_timings(self, timings: dict, started: float):
+        timings["total"] = elapsed_ms(started)
+        self.stage_latency.record(timings)
+        log.info("RAG stage timings", **timings)
+
+    async def _semantic_cache_lookup(self, request: ChatRequest, embedding_task: Optional[asyncio.Task]):
+        """
+        Awaits the speculative raw-query embedding (if any) and probes the semantic
+        answer cache with it. Returns (cached, query_vector).
+        """
+        if not self.response_cache.enabled or embedding_task is None:
+            return None, None
+        try:
+            vector = await embedding_task
+        except Exception:
+            return None, None  # _prepare_rag_context logs the failure
+        return self.response_cache.get_semantic(request.query, request.history, vector), vector
+
+    async def _pre_retrieval(self, request: ChatRequest, timings: dict):
+        """
+        Runs the intent classifier. With PARALLEL_PRE_RETRIEVAL enabled, the query
+        rewrite and the raw-query embedding are started at the same time as
+        speculative tasks and handed back for _prepare_rag_context to await;
+        they are cancelled when the intent is greeting / off_topic.
+        Returns (intent, rewrite_task, embedding_task).
+        """
         query = request.query
-        history = request.history
+        if not settings.PARALLEL_PRE_RETRIEVAL:
+            intent = await _timed(timings, "intent", self._classify_intent(query, request.history))
+            return intent, None, None
 
-        # 0. Rewrite query
-        rewritten_query = await self.query_rewriter.rewrite(query)
-        log.info("Query rewritten", original=query, rewritten=rewritten_query)
+        rewrite_task = asyncio.create_task(_timed(timings, "rewrite", self.query_rewriter.rewrite(query)))
+        embedding_task = asyncio.create_task(
+            _timed(timings, "raw_embedding", self.embedding_service.get_embedding(query))
+        )
+        try:
+            intent = await _timed(timings, "intent", self._classify_intent(query, request.history))
+        except BaseException:
+            _discard(rewrite_task, embedding_task)
+            raise
+
+        if intent != "legal":
+            _discard(rewrite_task, embedding_task)
+            return intent, None, None
+        return intent, rewrite_task, embedding_task
+
+    async def _prepare_rag_context(
+        self,
+        request: ChatRequest,
+        rewrite_task: Optional[asyncio.Task] = None,
+        embedding_task: Optional[asyncio.Task] = None,
+        timings: Optional[dict] = None,
+        citation_hits: Optional[List[dict]] = None,
+    ):
+        query = request.query
+        history = request.history
+        timings = timings if timings is not None else {}
 
-        # 1. Generate Embedding
         vector = None
-        try:
-            vector = await self.embedding_service.get_embedding(rewritten_query)
-        except Exception as e:
-            log.error("Embedding failed.", error=str(e))
+        rewritten_query = query
+        if citation_hits:
+            log.info("Pinpoint citation answered from the citation index", count=len(citation_hits))
+        else:
+            try:
+                # 0. Rewrite query
+                if rewrite_task is not None:
+                    rewritten_query = await rewrite_task
+                else:
+                    rewritten_query = await _timed(timings, "rewrite", self.query_rewriter.rewrite(query))
+                log.info("Query rewritten", original=query, rewritten=rewritten_query)
+
+                # 1. Generate Embedding — the speculative raw-query embedding is only
+                # usable when the rewriter left the query unchanged (or fell back to it).
+                try:
+                    if embedding_task is not None and rewritten_query == query:
+                        vector = await embedding_task
+                    else:
+                        _discard(embedding_task)
+                        vector = await _timed(timings, "embedding", self.embedding_service.get_embedding(rewritten_query))
+                except Exception as e:
+                    log.error("Embedding failed.", error=str(e))
+            finally:
+                _discard(rewrite_task, embedding_task)
 
         # 2. Retrieve Context
         context_text = ""
         sources = []
+        raw_results = []
         retrieval_error = None
+        lexical_query = query if rewritten_query == query else f"{query}\n{rewritten_query}"
 
-        if vector:
+        if citation_hits or vector is not None or self.lexical is not None:
             try:
-                # Build a metadata filter if the user asked about a specific article number
-                expr = self._build_article_filter(query)
-                raw_results = await self.vector_store.search(vector, expr=expr)
-
-                # If the filter returned nothing, fall back to unfiltered vector search
-                if expr and not raw_results:
-                    log.info("Filtered search returned no results, falling back to vector-only search")
-                    raw_results = await self.vector_store.search(vector)
+                if citation_hits:
+                    raw_results = citation_hits
+                else:
+                    with stage_timer(timings, "retrieval"):
+                        raw_results = await self._retrieve(query, lexical_query, vector)
 
-                log.info("Retrieved documents from Milvus", count=len(raw_results))
+                log.info("Retrieved documents", count=len(raw_results))
                 for r in raw_results:
                     log.info("Document retrieved", id=r["id"], score=r["score"], source=r["source"])
-                    sources.append(SourceDocument(
-                        id=r["id"],
-                        score=r["score"],
-                        text=r["text"],
-                        source_type=r["source"],
-                        metadata=r["metadata"]
-                    ))
-                context_chunks = [
-                    f"[Document {i+1}]\nSource: {r['source']}\nMetadata: {r['metadata']}\nText: {r['text']}"
-                    for i, r in enumerate(raw_results)
-                ]
-                context_text = "\n\n".join(context_chunks)
             except pybreaker.CircuitBreakerError:
                 retrieval_error = "Legal database is temporarily unavailable."
             except Exception as e:
@@ -176,17 +353,39 @@ class RAGService:
                                    f"Required Fields: {', '.join(template['required_fields'])}\n" \
                                    f"Description: {template['description']}\n"
 
-        # 3. Construct Messages
+        # 3. Pack the context into what PROMPT_TOKEN_BUDGET leaves after the rest of the prompt
         system_instruction = self._get_system_prompt()
+        fixed_texts = [system_instruction, drafting_context, query]
+        history = self.context_packer.fit_history(history, fixed_texts)
+        if raw_results:
+            with stage_timer(timings, "context_packing"):
+                budget = self.context_packer.context_budget(fixed_texts + [m.content for m in history])
+                # CPU-bound on long documents: keep it off the event loop
+                context_text, packed, pack_stats = await asyncio.to_thread(
+                    self.context_packer.pack, lexical_query, raw_results, budget
+                )
+            log.info("Context packed", **pack_stats)
+            sources = [
+                SourceDocument(id=r["id"], score=r["score"], text=r["text"], source_type=r["source"], metadata=r["metadata"])
+                for r in packed
+            ]
+
+        # 4. Construct Messages. The static system prompt leads on its own, byte-identical
+        # across requests, so OpenAI's automatic prompt caching serves it (plus the history
+        # of a continuing conversation) as a cached prefix. The per-request context and
+        # drafting hint come after the history, right before the question.
         context_block = ""
         if context_text:
-            context_block = f"\n\n### LEBANESE LEGAL CONTEXT:\n{context_text}\n"
+            context_block = f"### LEBANESE LEGAL CONTEXT:\n{context_text}\n"
         elif retrieval_error:
-            context_block = f"\n\n### SYSTEM NOTICE:\n{retrieval_error}. Proceeding with general knowledge.\n"
-        
-        messages = [{"role": "system", "content": system_instruction + context_block + drafting_context}]
+            context_block = f"### SYSTEM NOTICE:\n{retrieval_error}. Proceeding with general knowledge.\n"
+
+        messages = [{"role": "system", "content": system_instruction}]
         for msg in history:
             messages.append({"role": msg.role, "content": msg.content})
+        request_block = (context_block + drafting_context).strip()
+        if request_block:
+            messages.append({"role": "system", "content": request_block})
         messages.append({"role": "user", "content": query})
 
         # Log the full prompt for debugging
@@ -194,57 +393,128 @@ class RAGService:
 
         return messages, sources, context_text
 
+    def _lookup_citation(self, query: str, timings: dict, limit: int = 5) -> List[dict]:
+        """Hits for an article / ruling cited by number, from the in-memory citation index ([] if none)."""
+        if self.citations is None:
+            return []
+        with stage_timer(timings, "citation_lookup"):
+            return self.citations.lookup(query, limit)
+
+    async def _retrieve(self, query: str, lexical_query: str, vector, limit: int = 5) -> list:
+        """
+        Dense Milvus search, fused with BM25 results by reciprocal rank fusion when
+        the lexical index is available. An entity pre-filter that matches is
+        trusted as is; if Milvus fails but BM25 found something, that is served alone.
+        Both searches are limited to the source partitions the query is routed to,
+        and a mix of articles and rulings keeps each source's quota.
+        """
+        entities = self._parse_entities(query)
+        quotas = self._route_sources(query, entities, limit)
+        # Pre-filter on the law / article / court / ruling / year the user named
+        expr = self._build_filter(entities)
+        if vector is not None and expr:
+            try:
+                raw_results = await self._dense_search(vector, limit, quotas, expr)
+            except Exception as e:
+                log.warning("Filtered vector search failed, falling back to hybrid search", error=str(e))
+                raw_results = []
+            if raw_results:
+                return self._take(raw_results, limit, quotas)
+            # If the filter returned nothing, fall back to unfiltered search
+            log.info("Filtered search returned no results, falling back to vector-only search")
+
+        sources = list(quotas) if quotas is not None else None
+        lexical = self.lexical.search(lexical_query, settings.HYBRID_CANDIDATES, sources) if self.lexical is not None else []
+        if not lexical:
+            if vector is None:
+                return []
+            return self._take(await self._dense_search(vector, limit, quotas), limit, quotas)
+
+        dense = []
+        if vector is not None:
+            try:
+                dense = await self._dense_search(vector, settings.HYBRID_CANDIDATES, quotas)
+            except Exception as e:
+                log.warning("Vector search failed, serving lexical results only", error=str(e))
+        fused = reciprocal_rank_fusion([dense, lexical], limit=len(dense) + len(lexical))
+        return self._take(fused, limit, quotas)
+
+    def _route_sources(self, query: str, entities: dict, limit: int) -> Optional[Dict[str, int]]:
+        """Result quota per routed source_type partition, or None (every partition) when routing is off."""
+        if not settings.SOURCE_ROUTING_ENABLED:
+            return None
+        quotas = source_quotas(route_sources(query, entities), limit)
+        log.info("Source routing", quotas=quotas)
+        return quotas
+
+    async def _dense_search(self, vector, limit: int, quotas: Optional[Dict[str, int]], expr: str = None) -> list:
+        if quotas is None:
+            return await self.vector_store.search(vector, limit=limit, expr=expr)
+        return await self.vector_store.search_sources(vector, list(quotas), limit=limit, expr=expr)
+
+    @staticmethod
+    def _take(hits: list, limit: int, quotas: Optional[Dict[str, int]]) -> list:
+        return hits[:limit] if quotas is None else apply_quotas(hits, quotas)
+
     async def _classify_intent(self, query: str, history=None) -> str:
         """Returns 'greeting', 'legal', or 'off_topic'. Falls back to 'legal' on error."""
+        # Include last 2 history turns so the classifier understands follow-ups
+        recent = list(history[-2:]) if history else []
+
+        # Confident local (lexicon / n-gram model) decisions skip the LLM entirely
+        local = self.local_intent.classify(query, recent)
+        if local:
+            return local
+
+        key_material = "\n".join([f"{m.role}:{normalize_query(m.content)}" for m in recent] + [normalize_query(query)])
+        cache_key = f"{_INTENT_PROMPT_VERSION}:{text_hash(key_material)}"
+        cached = await self.intent_cache.get(cache_key)
+        if cached:
+            return cached
+
         try:
             messages = [{"role": "system", "content": _INTENT_SYSTEM_PROMPT}]
-            # Include last 2 history turns so the classifier understands follow-ups
-            if history:
-                for msg in history[-2:]:
-                    messages.append({"role": msg.role, "content": msg.content})
+            for msg in recent:
+                messages.append({"role": msg.role, "content": msg.content})
             messages.append({"role": "user", "content": query})
 
             resp = await self.llm_service.client.chat.completions.create(
-                model="gpt-4o-mini",
+                model=_INTENT_MODEL,
                 messages=messages,
                 temperature=0,
                 max_tokens=5,
             )
             label = resp.choices[0].message.content.strip().lower()
             if label in ("greeting", "legal", "off_topic"):
+                await self.intent_cache.set(cache_key, label)
                 return label
             return "legal"
         except Exception as e:
             log.warning("Intent classification failed, defaulting to legal", error=str(e))
             return "legal"
 
-    def _build_article_filter(self, query: str) -> Optional[str]:
+    def _parse_entities(self, query: str) -> dict:
         """
-        Detects if the user is asking about a specific article number and returns
-        a Milvus filter expression to pin retrieval to that exact article.
-        Handles Arabic-Indic numerals (٢٤) and Western numerals (24).
+        Entities the query names (article / ruling numbers, years, law and court
+        names; see QueryEntityParser). Law and court names are known once the
+        citation index is loaded.
         """
-        pattern = r'(?:مادة|المادة|article)\s*([٠-٩\d]+)'
-        match = re.search(pattern, query, re.IGNORECASE)
-        if not match:
-            return None
-        num_str = match.group(1).translate(str.maketrans('٠١٢٣٤٥٦٧٨٩', '0123456789'))
-        article_num = int(num_str)
-        expr = f'metadata["article_number"] == {article_num}'
-        log.info("Article filter detected", article_number=article_num, expr=expr)
+        index = self.citations.index if self.citations is not None else None
+        if index is not None and index is not self._entity_vocabulary:
+            self._entity_parser = QueryEntityParser(index.laws, index.courts)
+            self._entity_vocabulary = index
+        return self._entity_parser.parse(query)
+
+    def _build_filter(self, entities: dict) -> Optional[str]:
+        """
+        Pre-filter expression for the parsed entities: the typed scalar fields when
+        the collection has them, the metadata JSON paths otherwise.
+        """
+        expr = filter_expr(entities, typed=self.vector_store.typed_filters)
+        if expr:
+            log.info("Entity filter detected", expr=expr)
         return expr
 
-    def _run_online_eval(self, query: str, context: str, answer: str):
-        try:
-            eval_result = self.judge(
-                inputs={"query": query, "context": context},
-                outputs={"answer": answer}
-            )
-            log.info("Online Evaluation Result", 
-                     score=eval_result.get("score"), 
-                     reasoning=eval_result.get("reasoning"))
-        except Exception as e:
-            log.warning("Online evaluation skipped due to error", error=str(e))
 # old
 #     def _get_system_prompt(self) -> str:
 #         return """أنت "ADL Legal Assistant"، مساعد ذكاء اصطناعي محترف متخصص حصرياً في القانون اللبناني.
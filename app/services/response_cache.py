@@ -0,0 +1,211 @@
+import re
+import time
+import hashlib
+import structlog
+import numpy as np
+import redis
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from app.core.config import settings
+from app.core.clients import redis_connection_kwargs
+from app.core.text import normalize_query
+from app.models.schemas import ChatMessage, SourceDocument
+
+log = structlog.get_logger()
+
+_NUMBER = re.compile(r"[0-9\u0660-\u0669]+")
+_ARABIC_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩", "0123456789")
+
+# Bumped by the data pipeline whenever the Milvus collection is re-ingested or migrated.
+COLLECTION_VERSION_KEY = "rag:collection_version:{collection}"
+
+
+def _numbers(text: str) -> set:
+    return {n.translate(_ARABIC_DIGITS).lstrip("0") for n in _NUMBER.findall(text)}
+
+
+def bump_collection_version(collection_name: str = None):
+    """
+    Called by data_pipeline scripts after writing to Milvus so every running
+    ResponseCache drops answers built from the old collection contents.
+    """
+    collection_name = collection_name or settings.MILVUS_COLLECTION_NAME
+    try:
+        client = redis.Redis.from_url(settings.REDIS_URL, **redis_connection_kwargs())
+        version = client.incr(COLLECTION_VERSION_KEY.format(collection=collection_name))
+        log.info("Response cache invalidated", collection=collection_name, version=version)
+    except Exception as e:
+        log.warning("Could not bump collection version, cached answers may be stale until TTL", error=str(e))
+
+
+class _Entry:
+    __slots__ = ("response", "sources", "vector", "history_key", "numbers", "expires_at")
+
+    def __init__(self, response, sources, vector, history_key, numbers, expires_at):
+        self.response = response
+        self.sources = sources
+        self.vector = vector
+        self.history_key = history_key
+        self.numbers = numbers
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """
+    In-process answer cache with two tiers:
+
+    - exact: keyed on the normalized query + normalized history.
+    - semantic: reuses an answer whose raw-query embedding is within
+      RESPONSE_CACHE_SIMILARITY_THRESHOLD (cosine) of the new query, with the same
+      history and the same numbers (so "المادة 24" never serves "المادة 25").
+
+    Entries expire after RESPONSE_CACHE_TTL seconds and are LRU-evicted beyond
+    RESPONSE_CACHE_MAX_ENTRIES. The whole cache is cleared when the collection
+    version in Redis changes (see bump_collection_version).
+    """
+
+    def __init__(self, redis_client=None):
+        self.redis = redis_client
+        self.enabled = settings.RESPONSE_CACHE_ENABLED
+        self.ttl = settings.RESPONSE_CACHE_TTL
+        self.max_entries = settings.RESPONSE_CACHE_MAX_ENTRIES
+        self.threshold = settings.RESPONSE_CACHE_SIMILARITY_THRESHOLD
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: List[str] = []
+        self._collection_version: Optional[str] = None
+        self._version_checked_at = 0.0
+        self.lookups = 0  # one per request: get_exact starts it, get_semantic may finish it
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.invalidations = 0
+
+    # ── Keys ────────────────────────────────────────────────────────────────
+    @staticmethod
+    def _history_key(history: List[ChatMessage]) -> str:
+        joined = "\n".join(f"{m.role}:{normalize_query(m.content)}" for m in history or [])
+        return hashlib.sha256(joined.encode()).hexdigest()
+
+    def _key(self, query: str, history_key: str) -> str:
+        return hashlib.sha256(f"{history_key}\n{normalize_query(query)}".encode()).hexdigest()
+
+    # ── Invalidation ────────────────────────────────────────────────────────
+    async def _check_collection_version(self):
+        now = time.monotonic()
+        if not self.redis or now - self._version_checked_at < settings.RESPONSE_CACHE_VERSION_CHECK_INTERVAL:
+            return
+        self._version_checked_at = now
+        try:
+            version = await self.redis.get(COLLECTION_VERSION_KEY.format(collection=settings.MILVUS_COLLECTION_NAME))
+        except Exception as e:
+            log.warning("Response cache version check failed", error=str(e))
+            return
+        if isinstance(version, bytes):
+            version = version.decode()
+        if self._collection_version is not None and version != self._collection_version:
+            log.info("Collection re-ingested, clearing response cache", version=version)
+            self.clear()
+        self._collection_version = version
+
+    def clear(self):
+        self._entries.clear()
+        self._matrix = None
+        self._matrix_keys = []
+        self.invalidations += 1
+
+    # ── Lookup ──────────────────────────────────────────────────────────────
+    def _live(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at < time.monotonic():
+            del self._entries[key]
+            self._matrix = None
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def get_exact(self, query: str, history: List[ChatMessage]) -> Optional[Tuple[str, List[SourceDocument]]]:
+        if not self.enabled:
+            return None
+        await self._check_collection_version()
+        self.lookups += 1
+        entry = self._live(self._key(query, self._history_key(history)))
+        if entry is None:
+            return None
+        self.exact_hits += 1
+        log.info("Response cache hit", tier="exact")
+        return entry.response, entry.sources
+
+    def get_semantic(self, query: str, history: List[ChatMessage], vector: List[float]) -> Optional[Tuple[str, List[SourceDocument]]]:
+        """Second tier of the lookup get_exact counted; requests that skip it stay misses."""
+        if not self.enabled or vector is None:
+            return None
+        if self._matrix is None:
+            self._rebuild_matrix()
+        if not self._matrix_keys:
+            return None
+
+        history_key = self._history_key(history)
+        numbers = _numbers(query)
+        scores = self._matrix @ _unit(vector)
+        for idx in np.argsort(-scores):
+            if scores[idx] < self.threshold:
+                break
+            key = self._matrix_keys[idx]
+            entry = self._live(key)
+            if entry is None or entry.history_key != history_key or entry.numbers != numbers:
+                continue
+            self.semantic_hits += 1
+            log.info("Response cache hit", tier="semantic", similarity=round(float(scores[idx]), 4))
+            return entry.response, entry.sources
+        return None
+
+    def _rebuild_matrix(self):
+        keys = [k for k, e in self._entries.items() if e.vector is not None]
+        self._matrix_keys = keys
+        self._matrix = np.stack([self._entries[k].vector for k in keys]) if keys else np.empty((0, 0), dtype=np.float32)
+
+    # ── Store ───────────────────────────────────────────────────────────────
+    def put(self, query: str, history: List[ChatMessage], response: str, sources: List[SourceDocument], vector: Optional[List[float]] = None):
+        if not self.enabled:
+            return
+        history_key = self._history_key(history)
+        key = self._key(query, history_key)
+        self._entries[key] = _Entry(
+            response=response,
+            sources=sources,
+            vector=_unit(vector) if vector is not None else None,
+            history_key=history_key,
+            numbers=_numbers(query),
+            expires_at=time.monotonic() + self.ttl,
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._matrix = None
+
+    def stats(self) -> dict:
+        hits = self.exact_hits + self.semantic_hits
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": max(0, self.lookups - hits),
+            "hit_rate": round(hits / self.lookups, 4) if self.lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+def _unit(vector) -> np.ndarray:
+    v = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(v)
+    return v / norm if norm else v
+
+
+def replay_stream(response: str, sources: List[SourceDocument], chunk_size: int = 200):
+    """Yields a cached answer as the same events stream_query produces."""
+    yield {"type": "sources", "sources": [s.dict() for s in sources]}
+    for i in range(0, len(response), chunk_size):
+        yield {"type": "content", "content": response[i:i + chunk_size]}
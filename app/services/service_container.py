@@ -0,0 +1,124 @@
+import asyncio
+import time
+import structlog
+from typing import Optional
+from pymilvus import connections
+from app.core.clients import (
+    HTTPPoolStats,
+    create_http_client,
+    create_openai_client,
+    create_redis_client,
+    http_pool_snapshot,
+    redis_pool_snapshot,
+)
+from app.services.rag_service import RAGService
+from app.services.vector_store_service import VectorStoreService
+
+log = structlog.get_logger()
+
+
+class ServiceContainer:
+    """
+    Application-scoped owner of the shared network resources (one HTTP/2 client,
+    one Redis pool, one Milvus connection) and the RAGService built on top of them.
+
+    Started from the FastAPI lifespan hook; if a request arrives before startup
+    (e.g. serverless cold start without lifespan events) it is built lazily.
+    """
+
+    def __init__(self):
+        self.http_stats = HTTPPoolStats()
+        self.http_client = None
+        self.openai_client = None
+        self.redis = None
+        self.vector_store: Optional[VectorStoreService] = None
+        self.rag_service: Optional[RAGService] = None
+        self.rag_services_created = 0
+        self.requests_served = 0
+        self.started_at: Optional[float] = None
+
+    def _build(self):
+        if self.rag_service is not None:
+            return
+        log.info("Building shared service container")
+        self.http_client = create_http_client(self.http_stats)
+        self.openai_client = create_openai_client(self.http_client)
+        self.redis = create_redis_client()
+        self.vector_store = VectorStoreService()
+        self.rag_service = RAGService(
+            openai_client=self.openai_client,
+            redis_client=self.redis,
+            vector_store=self.vector_store,
+            http_client=self.http_client,
+        )
+        self.rag_services_created += 1
+        self.started_at = time.time()
+
+    async def startup(self):
+        self._build()
+        # Connect to Milvus and load the collection now instead of on the first search.
+        try:
+            await self.vector_store.warmup()
+        except Exception as e:
+            log.warning("Milvus warmup failed, will retry on first search", error=str(e))
+        self.rag_service.evaluator.start()
+
+    async def shutdown(self):
+        if self.rag_service is None:
+            return
+        log.info("Closing shared service container")
+        # Let queued judge calls finish while the HTTP client is still open
+        await self.rag_service.evaluator.drain()
+        if self.redis is not None:
+            try:
+                await self.redis.aclose()
+            except Exception as e:
+                log.warning("Failed to close Redis pool", error=str(e))
+        if self.http_client is not None:
+            await self.http_client.aclose()
+        try:
+            await self.vector_store.close()
+        except Exception as e:
+            log.warning("Failed to close Milvus client", error=str(e))
+        self.rag_service.embedding_service.close()
+        if connections.has_connection("default"):
+            await asyncio.to_thread(connections.disconnect, "default")
+        self.rag_service = None
+
+    def get_rag_service(self) -> RAGService:
+        self._build()
+        self.requests_served += 1
+        return self.rag_service
+
+    def stats(self) -> dict:
+        if self.rag_service is None:
+            return {"initialized": False}
+        served = self.requests_served
+        return {
+            "initialized": True,
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "rag_service": {
+                "instances_created": self.rag_services_created,
+                "requests_served": served,
+                "reuse_rate": round(1 - self.rag_services_created / served, 4) if served else 0.0,
+            },
+            "http": {**self.http_stats.snapshot(), **http_pool_snapshot(self.http_client)},
+            "redis": redis_pool_snapshot(self.redis),
+            "milvus": self.vector_store.stats(),
+            "pipeline_latency_ms": self.rag_service.stage_latency.summary(),
+            "online_eval": self.rag_service.evaluator.stats(),
+            "response_cache": self.rag_service.response_cache.stats(),
+            "embeddings": self.rag_service.embedding_service.stats(),
+            "local_intent": self.rag_service.local_intent.stats(),
+            "lexical_index": self.rag_service.lexical.stats() if self.rag_service.lexical else {"enabled": False},
+            "citation_index": self.rag_service.citations.stats() if self.rag_service.citations else {"enabled": False},
+            "context_packing": self.rag_service.context_packer.stats(),
+            "llm_usage": self.rag_service.llm_service.stats(),
+            "llm_cache": {
+                "rewrite": self.rag_service.query_rewriter.cache.stats(),
+                "intent": self.rag_service.intent_cache.stats(),
+            },
+        }
+
+
+services = ServiceContainer()
@@ -0,0 +1,61 @@
+from typing import Dict, List
+from app.core.config import settings
+from app.core.text import light_stem, tokenize
+
+ARTICLE = "article"
+RULING = "ruling"
+ALL_SOURCES = [ARTICLE, RULING]
+
+# Query terms (light-stemmed prefixes) that ask for statute text or for case law.
+# Words shared by both ("قانون", "محكمة", "حكم", which is also "provision") do not
+# route; court names and ruling numbers do, through the parsed entities.
+_STATUTE_CUES = ("ماده", "مواد", "مرسوم", "article", "statute", "provision")
+_STATUTE_WORDS = {"نص", "نصوص"}
+_RULING_CUES = ("اجتهاد", "قرار", "ruling", "precedent", "jurisprudence", "judgment", "judgement")
+
+
+def route_sources(query: str, entities: Dict[str, list]) -> List[str]:
+    """
+    The source_type partitions a query should search: [ARTICLE], [RULING], or
+    both when it asks for both or gives no cue either way. Entities parsed from the
+    query (legal_entities.QueryEntityParser) count as cues: a law or article number
+    points at statutes, a court, ruling number or year at rulings.
+    """
+    terms = [light_stem(t) for t in tokenize(query)]
+    statutes = bool(entities.get("law_name") or entities.get("article_number")
+                    or any(t in _STATUTE_WORDS or t.startswith(_STATUTE_CUES) for t in terms))
+    rulings = bool(entities.get("court") or entities.get("ruling_number") or entities.get("year")
+                   or any(t.startswith(_RULING_CUES) for t in terms) or "case law" in query.lower())
+    if statutes != rulings:
+        return [ARTICLE] if statutes else [RULING]
+    return list(ALL_SOURCES)
+
+
+def source_quotas(sources: List[str], limit: int, ruling_share: float = None) -> Dict[str, int]:
+    """Splits *limit* results between the routed sources; rulings get SOURCE_RULING_SHARE of a mix."""
+    if len(sources) == 1 or limit < 2:
+        return {sources[0]: limit}
+    share = settings.SOURCE_RULING_SHARE if ruling_share is None else ruling_share
+    rulings = min(limit - 1, max(1, round(limit * share)))
+    return {ARTICLE: limit - rulings, RULING: rulings}
+
+
+def apply_quotas(hits: List[dict], quotas: Dict[str, int]) -> List[dict]:
+    """
+    The best hits of each source up to its quota, in the order given; slots a source
+    cannot fill go to the next-best hits of the others. Hits of unrouted sources are dropped.
+    """
+    limit = sum(quotas.values())
+    taken = {source: 0 for source in quotas}
+    chosen, spare = [], []
+    for hit in hits:
+        source = hit.get("source")
+        if source not in quotas:
+            continue
+        if taken[source] < quotas[source]:
+            taken[source] += 1
+            chosen.append(hit)
+        else:
+            spare.append(hit)
+    chosen_ids = {id(hit) for hit in chosen + spare[:limit - len(chosen)]}
+    return [hit for hit in hits if id(hit) in chosen_ids]
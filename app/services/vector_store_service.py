@@ -1,19 +1,53 @@
 import asyncio
 import structlog
 import pybreaker
+from concurrent.futures import ThreadPoolExecutor
 from pymilvus import connections, Collection, utility
 from app.core.config import settings
+from app.services.legal_entities import SCALAR_FIELDS
+from app.services.local_vector_index import LocalVectorIndex
 from langsmith import traceable
 
+try:
+    from pymilvus import AsyncMilvusClient
+except ImportError:  # pymilvus < 2.5.3: searches run on a dedicated thread pool instead
+    AsyncMilvusClient = None
+
 log = structlog.get_logger()
 
+_OUTPUT_FIELDS = ["text_content", "source_type", "metadata"]
+
 # Circuit Breaker: Trip after 3 failures, reset after 60s
 # This protects the system from cascading failures if Milvus is down.
 db_breaker = pybreaker.CircuitBreaker(fail_max=3, reset_timeout=60)
 
 class VectorStoreService:
+    """
+    Milvus search. With pymilvus' AsyncMilvusClient (MILVUS_ASYNC_CLIENT) searches are
+    native gRPC-aio calls on the event loop; otherwise the blocking ORM search runs on
+    a dedicated, bounded thread pool instead of the shared default executor. Either
+    way at most MILVUS_SEARCH_CONCURRENCY searches are in flight at once.
+
+    VECTOR_STORE_BACKEND=local serves every search from an in-process
+    LocalVectorIndex over a Milvus snapshot; =fallback uses it only when a Milvus
+    search fails or db_breaker is open.
+    """
+
     def __init__(self):
         self._collection = None
+        self._async_client = None
+        self._executor: ThreadPoolExecutor = None
+        self._ready_lock = asyncio.Lock()
+        self._limiter = asyncio.Semaphore(settings.MILVUS_SEARCH_CONCURRENCY)
+        self.use_async_client = settings.MILVUS_ASYNC_CLIENT and AsyncMilvusClient is not None
+        self.backend = settings.VECTOR_STORE_BACKEND
+        self.local_index: LocalVectorIndex = None
+        self._field_names: set = set()
+        self.local_searches = 0
+        self.local_fallbacks = 0
+        self.searches = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
 
     def _connect(self):
         """Ensures a connection to Milvus exists. Handles local and Zilliz Cloud."""
@@ -33,20 +67,161 @@ class VectorStoreService:
             if utility.has_collection(settings.MILVUS_COLLECTION_NAME):
                 self._collection = Collection(settings.MILVUS_COLLECTION_NAME)
                 self._collection.load()
+                self._field_names = {f.name for f in self._collection.schema.fields}
             else:
                 log.error(f"Collection {settings.MILVUS_COLLECTION_NAME} not found.")
                 raise Exception("Collection not found")
 
-    @db_breaker
+    async def _connect_async(self):
+        kwargs = {"uri": settings.MILVUS_URI}
+        if settings.MILVUS_URI.startswith("https"):
+            log.info("Connecting to Zilliz Cloud (async client)")
+            kwargs["token"] = settings.MILVUS_TOKEN
+        else:
+            log.info("Connecting to local Milvus (async client)")
+        client = AsyncMilvusClient(**kwargs)
+        try:
+            if not await client.has_collection(settings.MILVUS_COLLECTION_NAME):
+                log.error(f"Collection {settings.MILVUS_COLLECTION_NAME} not found.")
+                raise Exception("Collection not found")
+            await client.load_collection(settings.MILVUS_COLLECTION_NAME)
+            description = await client.describe_collection(settings.MILVUS_COLLECTION_NAME)
+        except Exception:
+            await client.close()
+            raise
+        self._field_names = {f["name"] for f in description.get("fields", [])}
+        self._async_client = client
+
+    @property
+    def typed_filters(self) -> bool:
+        """
+        Whether filters may use the typed citation fields (law_name, article_number, ...).
+        False for collections created before them, and until the schema is known:
+        such filters use the metadata JSON paths instead.
+        """
+        if self.backend == "local":
+            return True  # LocalVectorIndex derives the typed fields from metadata
+        return all(name in self._field_names for name in SCALAR_FIELDS)
+
+    def _ready(self) -> bool:
+        return self._async_client is not None if self.use_async_client else self._collection is not None
+
+    async def _load_local_index(self):
+        try:
+            self.local_index = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), LocalVectorIndex.load
+            )
+        except Exception as e:
+            if self.backend == "local":
+                raise
+            log.warning("Local vector index unavailable, no fallback if Milvus fails",
+                        path=settings.LOCAL_INDEX_PATH, error=str(e))
+
+    async def warmup(self):
+        """Connects and loads the collection (and/or the local index) ahead of the first request."""
+        async with self._ready_lock:
+            if self.backend in ("local", "fallback") and self.local_index is None:
+                await self._load_local_index()
+            if self.backend == "local" or self._ready():
+                return
+            if self.use_async_client:
+                await self._connect_async()
+            else:
+                await asyncio.get_running_loop().run_in_executor(self._get_executor(), self._connect)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.MILVUS_SEARCH_CONCURRENCY, thread_name_prefix="milvus-search"
+            )
+        return self._executor
+
+    async def close(self):
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "breaker_state": db_breaker.current_state,
+            "local_index": self.local_index.stats() if self.local_index is not None else None,
+            "local_searches": self.local_searches,
+            "local_fallbacks": self.local_fallbacks,
+            "mode": "async_client" if self.use_async_client else "thread_pool",
+            "connected": self._async_client is not None or connections.has_connection("default"),
+            "collection_loaded": self._ready(),
+            "typed_filters": self.typed_filters,
+            "max_concurrent_searches": settings.MILVUS_SEARCH_CONCURRENCY,
+            "searches": self.searches,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+        }
+
     @traceable(run_type="retriever", name="Milvus Vector Search")
     async def search(self, vector: list[float], limit: int = 5, expr: str = None) -> list[dict]:
         """
-        Performs a vector search. Wrapped in a circuit breaker.
-        Runs the synchronous Milvus call in a separate thread.
-        expr: optional Milvus filter expression (e.g. 'metadata["article_number"] == 24')
+        Performs a vector search: Milvus behind the circuit breaker, or the local index
+        depending on VECTOR_STORE_BACKEND.
+        expr: optional Milvus filter expression (e.g. 'article_number == 24', see legal_entities.filter_expr)
+        """
+        if self.backend == "local":
+            return await self._search_local(vector, limit, expr)
+        try:
+            return await self._search_milvus(vector, limit, expr)
+        except Exception as e:
+            if self.backend != "fallback" or self.local_index is None:
+                raise
+            self.local_fallbacks += 1
+            log.warning("Milvus unavailable, serving from the local vector index", error=str(e))
+            return await self._search_local(vector, limit, expr)
+
+    async def search_sources(self, vector: list[float], sources: list[str], limit: int = 5,
+                             expr: str = None) -> list[dict]:
+        """
+        Searches only the source_type partitions in *sources* (source_type is the
+        partition key, so Milvus skips the others). Several sources are searched
+        concurrently, *limit* hits each, and merged by score; the caller picks each
+        source's share (source_routing.apply_quotas).
         """
+        def scoped(source: str) -> str:
+            clause = f'source_type == "{source}"'
+            return f"{clause} and {expr}" if expr else clause
+
+        if len(sources) == 1:
+            return await self.search(vector, limit=limit, expr=scoped(sources[0]))
+        per_source = await asyncio.gather(*(self.search(vector, limit=limit, expr=scoped(s)) for s in sources))
+        return sorted((hit for hits in per_source for hit in hits), key=lambda hit: hit["score"], reverse=True)
+
+    async def _search_local(self, vector, limit: int, expr: str = None) -> list[dict]:
+        if self.local_index is None:
+            await self.warmup()
+        self.local_searches += 1
+        return await asyncio.get_running_loop().run_in_executor(
+            self._get_executor(), self.local_index.search, vector, limit, expr
+        )
+
+    async def _search_milvus(self, vector, limit: int, expr: str = None) -> list[dict]:
         try:
-            return await asyncio.to_thread(self._search_sync, vector, limit, expr)
+            # pybreaker's decorator can't see failures of a coroutine, so guard the awaited call
+            with db_breaker.calling():
+                if not self._ready():
+                    await self.warmup()  # startup warmup failed; retry here
+                async with self._limiter:
+                    self.searches += 1
+                    self.in_flight += 1
+                    self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+                    try:
+                        if self.use_async_client:
+                            return await self._search_async(vector, limit, expr)
+                        return await asyncio.get_running_loop().run_in_executor(
+                            self._get_executor(), self._search_sync, vector, limit, expr
+                        )
+                    finally:
+                        self.in_flight -= 1
         except pybreaker.CircuitBreakerError:
             log.error("Circuit breaker passed: Milvus is unavailable.")
             raise
@@ -54,20 +229,48 @@ class VectorStoreService:
             log.error("Vector search failed", error=str(e))
             raise
 
-    def _search_sync(self, vector: list[float], limit: int, expr: str = None) -> list[dict]:
-        self._connect()
-
-        search_params = {
+    @staticmethod
+    def _search_params(limit: int) -> dict:
+        # HNSW rejects ef < limit (the hybrid path asks for HYBRID_CANDIDATES hits)
+        return {
             "metric_type": "COSINE",
-            "params": {"ef": 10},
+            "params": {"ef": max(settings.MILVUS_SEARCH_EF, limit)},
         }
 
+    async def _search_async(self, vector, limit: int, expr: str = None) -> list[dict]:
+        if expr:
+            log.info("Milvus search with filter", expr=expr)
+        results = await self._async_client.search(
+            collection_name=settings.MILVUS_COLLECTION_NAME,
+            data=[vector],
+            anns_field="vector",
+            search_params=self._search_params(limit),
+            limit=limit,
+            filter=expr or "",
+            output_fields=_OUTPUT_FIELDS,
+        )
+        hits_data = []
+        for hits in results:
+            for hit in hits:
+                entity = hit["entity"]
+                hits_data.append({
+                    "id": hit["id"],
+                    "score": hit["distance"],
+                    "text": entity.get("text_content"),
+                    "source": entity.get("source_type"),
+                    "metadata": entity.get("metadata")
+                })
+        return hits_data
+
+    def _search_sync(self, vector: list[float], limit: int, expr: str = None) -> list[dict]:
+        self._connect()
+
         search_kwargs = dict(
             data=[vector],
             anns_field="vector",
-            param=search_params,
+            param=self._search_params(limit),
             limit=limit,
-            output_fields=["text_content", "source_type", "metadata"]
+            output_fields=_OUTPUT_FIELDS
         )
         if expr:
             search_kwargs["expr"] = expr
@@ -0,0 +1,163 @@
+"""
+backfill_scalar_fields.py
+-------------------------
+Moves an existing collection onto the current schema (milvus_setup.build_schema),
+which adds typed, INVERTED-indexed copies of the citation metadata: law_name,
+article_number, court, year and ruling_number. Filters on them stay index
+lookups as the corpus grows, where metadata["..."] filters scan JSON.
+
+Milvus cannot add fields to an existing collection, so the entities are copied:
+
+  1. Create <collection>_typed with the new schema, the source's vector index
+     parameters and the scalar indexes.
+  2. Stream every entity out of the source in pk order, derive the typed fields
+     from its metadata and insert it, in batches sized by payload bytes.
+  3. Once the copy holds every entity, rename the source to
+     <collection>_untyped and the copy to <collection>.
+
+Until step 3 the service keeps reading the untouched source; an interrupted
+run is simply re-run (the partial copy is dropped and rebuilt). Entities get
+new pks, so the lexical / citation indexes are rebuilt and the ingestion
+manifest is removed, as after migrate_metadata.py.
+
+Usage:
+    python data_pipeline/backfill_scalar_fields.py
+    python data_pipeline/backfill_scalar_fields.py --drop-old    # drop <collection>_untyped afterwards
+"""
+
+import sys
+import os
+import argparse
+import structlog
+import logging
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymilvus import connections, Collection, utility
+from app.core.config import settings
+from app.services.response_cache import bump_collection_version
+from data_pipeline.build_lexical_index import rebuild_from_collection
+from data_pipeline.ingest_manifest import MANIFEST_PATH
+from data_pipeline.milvus_setup import (build_schema, create_scalar_indexes, entity_columns,
+                                        has_scalar_fields, hnsw_index_params)
+from data_pipeline.milvus_stream import Throughput, iter_batches, rebatch_by_bytes
+
+logging.basicConfig(level=logging.INFO)
+log = structlog.get_logger()
+
+READ_BATCH_SIZE  = 1000
+MAX_INSERT_ROWS  = 1000
+MAX_INSERT_BYTES = 16 * 1024 * 1024
+STREAM_FIELDS    = ["pk", "vector", "source_type", "text_content", "metadata"]
+
+
+def connect_milvus():
+    if settings.MILVUS_URI.startswith("https"):
+        log.info("Connecting to Zilliz Cloud...", uri=settings.MILVUS_URI)
+        connections.connect(alias="default", uri=settings.MILVUS_URI, token=settings.MILVUS_TOKEN)
+    else:
+        log.info("Connecting to local Milvus...", uri=settings.MILVUS_URI)
+        connections.connect(alias="default", uri=settings.MILVUS_URI)
+
+
+def vector_index_params(collection: Collection) -> dict:
+    """The source's vector index parameters, so the copy searches the same way."""
+    for index in collection.indexes:
+        if index.field_name == "vector":
+            return dict(index.params)
+    return hnsw_index_params()
+
+
+def create_typed_copy(source: Collection, name: str) -> Collection:
+    if utility.has_collection(name):
+        log.warning("Dropping the partial copy left by a previous run", collection=name)
+        utility.drop_collection(name)
+    dim = next(f.params["dim"] for f in source.schema.fields if f.name == "vector")
+    target = Collection(name=name, schema=build_schema(dim))
+    target.create_index(field_name="vector", index_params=vector_index_params(source))
+    create_scalar_indexes(target)
+    return target
+
+
+def live_count(collection: Collection) -> int:
+    """
+    Rows a query sees right now. num_entities counts flushed segments only and keeps
+    deleted rows until compaction, so it cannot be compared with what was copied.
+    """
+    collection.load()
+    rows = collection.query(expr="", output_fields=["count(*)"], consistency_level="Strong")
+    return rows[0]["count(*)"]
+
+
+def copy_entities(source: Collection, target: Collection, max_bytes: int = MAX_INSERT_BYTES) -> int:
+    meter = Throughput("Copied batch")
+    pages = iter_batches(source, STREAM_FIELDS, READ_BATCH_SIZE)
+    for batch in rebatch_by_bytes(pages, max_bytes, MAX_INSERT_ROWS):
+        target.insert(entity_columns(
+            target,
+            [e["vector"]         for e in batch],
+            [e["source_type"]    for e in batch],
+            [e["text_content"]   for e in batch],
+            [e["metadata"] or {} for e in batch],
+        ))
+        meter.add(len(batch))
+    target.flush()
+    log.info("Copy complete.", **meter.summary())
+    return meter.count
+
+
+def backfill(collection_name: str, drop_old: bool = False, max_bytes: int = MAX_INSERT_BYTES):
+    connect_milvus()
+    if not utility.has_collection(collection_name):
+        log.error("Collection not found", collection=collection_name)
+        sys.exit(1)
+
+    source = Collection(collection_name)
+    if has_scalar_fields(source):
+        log.info("Collection already has the typed fields; nothing to do.", collection=collection_name)
+        return
+    backup_name = f"{collection_name}_untyped"
+    if utility.has_collection(backup_name):
+        log.error("A previous backup collection is still present; drop or rename it first",
+                  collection=backup_name)
+        sys.exit(1)
+
+    target = create_typed_copy(source, f"{collection_name}_typed")
+    copied = copy_entities(source, target, max_bytes)
+    expected, in_copy = live_count(source), live_count(target)
+    if in_copy != expected:
+        log.error("The copy does not hold every entity; the source is left in place",
+                  copied=copied, in_copy=in_copy, expected=expected, copy=target.name)
+        sys.exit(1)
+
+    source.release()
+    utility.rename_collection(collection_name, backup_name)
+    utility.rename_collection(target.name, collection_name)
+    log.info("Swapped in the typed collection", collection=collection_name, backup=backup_name)
+    if drop_old:
+        utility.drop_collection(backup_name)
+        log.info("Dropped the untyped collection", collection=backup_name)
+
+    collection = Collection(collection_name)
+    bump_collection_version(collection_name)
+    rebuild_from_collection(collection)  # BM25 / citation hits carry pks
+    if os.path.exists(MANIFEST_PATH):
+        # Copied entities have new pks; the next ingestion re-adopts the collection
+        os.remove(MANIFEST_PATH)
+        log.info("Removed the ingestion manifest", path=MANIFEST_PATH)
+    log.info("Backfill complete. Restart the API (or re-export the local snapshot) to pick up the new pks.",
+             entities=copied)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy a collection onto the schema with typed citation fields")
+    parser.add_argument("--collection", default=settings.MILVUS_COLLECTION_NAME,
+                        help=f"Collection name (default: {settings.MILVUS_COLLECTION_NAME})")
+    parser.add_argument("--drop-old", action="store_true", help="Drop the untyped collection after the swap")
+    parser.add_argument("--batch-bytes", type=int, default=MAX_INSERT_BYTES, help="Max payload bytes per insert")
+    args = parser.parse_args()
+    backfill(args.collection, drop_old=args.drop_old, max_bytes=args.batch_bytes)
+
+
+if __name__ == "__main__":
+    main()
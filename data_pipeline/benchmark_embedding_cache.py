@@ -0,0 +1,108 @@
+"""
+benchmark_embedding_cache.py
+----------------------------
+Compares the legacy JSON embedding cache entries with the binary formats from
+app/core/vector_codec.py: bytes per entry, Redis memory per entry, decode
+latency and how close the decoded vector stays to the original.
+
+Usage:
+    # Payload size, decode latency and fidelity only (no network)
+    python data_pipeline/benchmark_embedding_cache.py
+
+    # Also write the entries to Redis (REDIS_URL) and read MEMORY USAGE per key
+    python data_pipeline/benchmark_embedding_cache.py --redis
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import statistics
+import numpy as np
+
+if hasattr(sys.stdout, "reconfigure"):
+    sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.vector_codec import decode_vector, encode_vector
+
+FORMATS = ("json", "float32", "float16", "int8")
+
+
+def sample_vectors(n: int, dim: int) -> np.ndarray:
+    """Unit-norm random vectors, like text-embedding-3-small outputs."""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def encode(vector: np.ndarray, fmt: str) -> bytes:
+    if fmt == "json":
+        # What EmbeddingService stored before: json.dumps of the OpenAI float list
+        return json.dumps(vector.tolist()).encode()
+    return encode_vector(vector, fmt)
+
+
+def redis_memory(payloads: list[bytes], fmt: str):
+    import redis
+    from app.core.clients import redis_connection_kwargs
+    from app.core.config import settings
+
+    client = redis.Redis.from_url(settings.REDIS_URL, **redis_connection_kwargs())
+    keys = [f"benchmark:embedding:{fmt}:{i}" for i in range(len(payloads))]
+    try:
+        pipe = client.pipeline(transaction=False)
+        for key, payload in zip(keys, payloads):
+            pipe.setex(key, 300, payload)
+        pipe.execute()
+        usage = [client.memory_usage(key) or 0 for key in keys]
+        return statistics.mean(usage)
+    finally:
+        client.delete(*keys)
+
+
+def run(n: int, dim: int, use_redis: bool):
+    vectors = sample_vectors(n, dim)
+    rows = []
+    for fmt in FORMATS:
+        payloads = [encode(v, fmt) for v in vectors]
+        latencies_us = []
+        cosines = []
+        for v, payload in zip(vectors, payloads):
+            start = time.perf_counter()
+            decoded = decode_vector(payload)
+            latencies_us.append((time.perf_counter() - start) * 1e6)
+            cosines.append(float(decoded @ v / np.linalg.norm(decoded)))
+        rows.append({
+            "format": fmt,
+            "bytes": statistics.mean(len(p) for p in payloads),
+            "redis": redis_memory(payloads, fmt) if use_redis else None,
+            "p50": statistics.median(latencies_us),
+            "min_cosine": min(cosines),
+        })
+
+    baseline = rows[0]
+    print("=" * 78)
+    print("   EMBEDDING CACHE FORMAT BENCHMARK")
+    print("=" * 78)
+    print(f"Vectors: {n} x {dim} (unit norm)\n")
+    print(f"{'format':<9} {'bytes/entry':>12} {'vs json':>8} {'redis/entry':>12} {'decode p50':>12} {'min cosine':>11}")
+    for row in rows:
+        redis_col = f"{row['redis']:.0f}" if row["redis"] is not None else "-"
+        print(f"{row['format']:<9} {row['bytes']:>12.0f} {row['bytes'] / baseline['bytes']:>7.1%} "
+              f"{redis_col:>12} {row['p50']:>9.1f} µs {row['min_cosine']:>11.6f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding cache encodings")
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--redis", action="store_true", help="Measure Redis MEMORY USAGE per entry")
+    args = parser.parse_args()
+    run(args.count, args.dim, args.redis)
+
+
+if __name__ == "__main__":
+    main()
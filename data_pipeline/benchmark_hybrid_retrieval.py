@@ -0,0 +1,161 @@
+"""
+benchmark_hybrid_retrieval.py
+-----------------------------
+Latency and recall of BM25 (and, with --dense, Milvus and the RRF hybrid) on
+data/golden_set.xlsx.
+
+The golden set holds corpus rows (source_type, text_content, metadata), so the
+queries are known-item queries generated from it:
+
+    span     5-8 consecutive words taken from a row
+    number   a 3+ digit number from a row (decree, ruling, law numbers) with the
+             words just before it
+
+A query counts as found at rank r when the r-th hit has the target row's text.
+
+Usage:
+    # BM25 only (no network)
+    python data_pipeline/benchmark_hybrid_retrieval.py
+
+    # Also dense Milvus search and the fused hybrid (embeds every query with OpenAI)
+    python data_pipeline/benchmark_hybrid_retrieval.py --dense --queries 100
+"""
+
+import sys
+import os
+import re
+import time
+import random
+import asyncio
+import argparse
+import logging
+import structlog
+import numpy as np
+
+if hasattr(sys.stdout, "reconfigure"):
+    sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.text import normalize_arabic
+from app.services.lexical_index import BM25Index, reciprocal_rank_fusion
+from data_pipeline.build_lexical_index import documents_from_excel
+
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+_NUMBER = re.compile(r"\d{3,}")
+KS = (1, 5, 10)
+
+
+def make_queries(docs: list[dict], n: int, seed: int = 0) -> list[tuple[str, str, int]]:
+    """(kind, query, target doc index) tuples."""
+    rng = random.Random(seed)
+    queries = []
+    for i in rng.sample(range(len(docs)), min(n, len(docs))):
+        words = docs[i]["text"].split()
+        if len(words) >= 8:
+            size = rng.randint(5, 8)
+            start = rng.randint(0, len(words) - size)
+            queries.append(("span", " ".join(words[start:start + size]), i))
+
+    numbered = [i for i, d in enumerate(docs) if _NUMBER.search(normalize_arabic(d["text"]))]
+    for i in rng.sample(numbered, min(n // 2, len(numbered))):
+        words = normalize_arabic(docs[i]["text"]).split()
+        positions = [p for p, w in enumerate(words) if _NUMBER.search(w)]
+        p = rng.choice(positions)
+        queries.append(("number", " ".join(words[max(0, p - 3):p + 1]), i))
+    return queries
+
+
+def rank_of(hits: list[dict], target_text: str):
+    for rank, hit in enumerate(hits, start=1):
+        if hit["text"] == target_text:
+            return rank
+    return None
+
+
+def summarize(name: str, ranks: list, latencies_ms: list = None):
+    total = len(ranks)
+    row = f"{name:<16} {total:>5}"
+    for k in KS:
+        row += f" {sum(1 for r in ranks if r and r <= k) / total:>8.1%}"
+    row += f" {sum(1 / r for r in ranks if r) / total:>7.3f}"
+    if latencies_ms:
+        lat = np.percentile(latencies_ms, [50, 95, 99])
+        row += f" {lat[0]:>8.2f} {lat[1]:>8.2f} {lat[2]:>8.2f}"
+    print(row)
+
+
+async def dense_hits(queries, depth: int):
+    from app.services.embedding_service import EmbeddingService
+    from app.services.vector_store_service import VectorStoreService
+
+    embeddings = EmbeddingService()
+    store = VectorStoreService()
+    await store.warmup()
+    vectors = await embeddings.get_embeddings([q for _, q, _ in queries])
+    results, latencies = [], []
+    for vector in vectors:
+        start = time.perf_counter()
+        results.append(await store.search(vector, limit=depth))
+        latencies.append((time.perf_counter() - start) * 1000)
+    await store.close()
+    return results, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BM25 / hybrid retrieval benchmark on the golden set")
+    parser.add_argument("--golden", default="data/golden_set.xlsx")
+    parser.add_argument("--queries", type=int, default=400, help="Span queries to sample (plus half as many number queries)")
+    parser.add_argument("--dense", action="store_true", help="Also query Milvus (needs OpenAI + a populated collection)")
+    args = parser.parse_args()
+
+    docs = documents_from_excel(args.golden)
+    start = time.perf_counter()
+    index = BM25Index.build(docs)
+    build_s = time.perf_counter() - start
+    path = os.path.join(os.path.dirname(os.path.abspath(args.golden)), ".golden_lexical_index.npz")
+    index.save(path)
+    start = time.perf_counter()
+    index = BM25Index.load(path)
+    load_ms = (time.perf_counter() - start) * 1000
+    os.remove(path)
+
+    queries = make_queries(docs, args.queries)
+    depth = settings.HYBRID_CANDIDATES
+    lexical, latencies = [], []
+    for _, query, _ in queries:
+        start = time.perf_counter()
+        lexical.append(index.search(query, depth))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    print("=" * 86)
+    print("   HYBRID RETRIEVAL BENCHMARK (golden set)")
+    print("=" * 86)
+    print(f"Documents: {len(docs)}, terms: {len(index.terms)}, build: {build_s:.2f}s, load from disk: {load_ms:.1f} ms")
+    print(f"Candidates per retriever: {depth}, RRF k: {settings.HYBRID_RRF_K}\n")
+    print(f"{'retriever':<16} {'n':>5} {'R@1':>8} {'R@5':>8} {'R@10':>8} {'MRR':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+
+    targets = [docs[i]["text"] for _, _, i in queries]
+    for kind in ("span", "number"):
+        idx = [j for j, (k, _, _) in enumerate(queries) if k == kind]
+        if idx:
+            summarize(f"bm25/{kind}", [rank_of(lexical[j], targets[j]) for j in idx], [latencies[j] for j in idx])
+    summarize("bm25/all", [rank_of(h, t) for h, t in zip(lexical, targets)], latencies)
+
+    if args.dense:
+        dense, dense_latencies = asyncio.run(dense_hits(queries, depth))
+        # Milvus ids are primary keys, BM25 ids here are row numbers: fuse on text instead
+        fused = [
+            reciprocal_rank_fusion(
+                [[{**h, "id": h["text"]} for h in d], [{**h, "id": h["text"]} for h in l]], limit=10
+            )
+            for d, l in zip(dense, lexical)
+        ]
+        summarize("milvus", [rank_of(h, t) for h, t in zip(dense, targets)], dense_latencies)
+        summarize("hybrid (RRF)", [rank_of(h, t) for h, t in zip(fused, targets)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+benchmark_intent_classifier.py
+------------------------------
+Measures how much intent traffic LocalIntentClassifier answers without the LLM,
+how often it agrees with the gpt-4o-mini labels, and its per-message latency.
+
+Usage:
+    # Built-in sample messages (hand-labelled, no network)
+    python data_pipeline/benchmark_intent_classifier.py
+
+    # Logged traffic with LLM labels ({"query": ..., "label": ...} per line)
+    python data_pipeline/benchmark_intent_classifier.py --labels labels.jsonl
+
+    # Unlabelled rows are labelled on the fly by the LLM classifier
+    python data_pipeline/benchmark_intent_classifier.py --labels queries.jsonl --label-with-llm
+"""
+
+import sys
+import os
+import json
+import time
+import asyncio
+import argparse
+import statistics
+import logging
+import structlog
+
+if hasattr(sys.stdout, "reconfigure"):
+    sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.intent_classifier import LABELS, LocalIntentClassifier
+
+# Keep per-message debug logs out of the latency numbers
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+SAMPLE_MESSAGES = [
+    ("مرحبا", "greeting"),
+    ("شكراً", "greeting"),
+    ("السلام عليكم", "greeting"),
+    ("صباح الخير", "greeting"),
+    ("كيف حالك؟", "greeting"),
+    ("هو ار يو", "greeting"),
+    ("hello", "greeting"),
+    ("thanks a lot!", "greeting"),
+    ("Bonjour", "greeting"),
+    ("merci beaucoup", "greeting"),
+    ("marhaba kifak", "greeting"),
+    ("ما هي حقوق المستأجر في حال بيع العقار المؤجر؟", "legal"),
+    ("ما هي المادة 24 من قانون أصول المحاكمات المدنية", "legal"),
+    ("هل يحق لصاحب العمل صرف العامل دون إنذار؟", "legal"),
+    ("What are the grounds for divorce under Lebanese law?", "legal"),
+    ("Can my landlord evict me without a court ruling?", "legal"),
+    ("Quelles sont les obligations du locataire selon le contrat de bail ?", "legal"),
+    ("أخبرني أكثر", "legal"),
+    ("tell me more", "legal"),
+    ("ما هو الطقس اليوم في بيروت؟", "off_topic"),
+    ("من ربح مباراة كرة القدم أمس؟", "off_topic"),
+    ("give me a recipe for tabbouleh", "off_topic"),
+    ("tell me a joke", "off_topic"),
+    ("what's the bitcoin price", "off_topic"),
+]
+
+
+def load_rows(path: str) -> list[tuple[str, str]]:
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                rows.append((row["query"], row.get("label")))
+    return rows
+
+
+async def _label_with_llm(rows: list[tuple[str, str]]) -> list[tuple[str, str]]:
+    from app.services.rag_service import RAGService
+    rag = RAGService()
+    rag.local_intent.enabled = False
+    labelled = []
+    for query, label in rows:
+        labelled.append((query, label or await rag._classify_intent(query)))
+    return labelled
+
+
+def run(rows: list[tuple[str, str]], threshold: float):
+    clf = LocalIntentClassifier(threshold=threshold)
+    latencies_us = []
+    decided = correct = 0
+    confusion = {(t, p): 0 for t in LABELS for p in LABELS}
+
+    for query, expected in rows:
+        start = time.perf_counter()
+        label = clf.classify(query)
+        latencies_us.append((time.perf_counter() - start) * 1e6)
+        if label is not None:
+            decided += 1
+            correct += label == expected
+            confusion[(expected, label)] += 1
+
+    total = len(rows)
+    latencies_us.sort()
+    print("=" * 60)
+    print("   LOCAL INTENT PRE-CLASSIFIER BENCHMARK")
+    print("=" * 60)
+    print(f"Messages              : {total}")
+    print(f"Threshold             : {threshold}")
+    print(f"Model loaded          : {clf.model is not None}")
+    print(f"Short-circuited       : {decided} ({decided / total:.1%} of traffic)")
+    print(f"Accuracy vs LLM labels: {correct / decided:.1%} (on short-circuited)" if decided else "Accuracy: n/a")
+    print(f"Latency p50 / p99     : {statistics.median(latencies_us):.1f} µs / "
+          f"{latencies_us[min(total - 1, int(total * 0.99))]:.1f} µs")
+    print("\nConfusion (expected → local):")
+    for (expected, predicted), count in confusion.items():
+        if count:
+            print(f"  {expected:>9} → {predicted:<9} {count}")
+    print("\nShort-circuited per label:", clf.stats()["short_circuited"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the local intent pre-classifier")
+    parser.add_argument("--labels", help="JSONL with query/label rows (defaults to built-in samples)")
+    parser.add_argument("--label-with-llm", action="store_true", help="Label rows without a label using the LLM")
+    parser.add_argument("--threshold", type=float, default=None)
+    args = parser.parse_args()
+
+    rows = load_rows(args.labels) if args.labels else SAMPLE_MESSAGES
+    if args.label_with_llm:
+        rows = asyncio.run(_label_with_llm(rows))
+    rows = [(q, l) for q, l in rows if l in LABELS]
+
+    from app.core.config import settings
+    run(rows, args.threshold if args.threshold is not None else settings.INTENT_LOCAL_THRESHOLD)
+
+
+if __name__ == "__main__":
+    main()
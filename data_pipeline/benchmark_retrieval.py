@@ -0,0 +1,381 @@
+"""
+benchmark_retrieval.py
+----------------------
+Recall and latency of dense retrieval on data/golden_set.xlsx across search and
+index parameters, to choose MILVUS_SEARCH_EF / limits / HNSW build parameters
+from measurements.
+
+Sweep:    ef x limit x HNSW M / efConstruction x rewrite on/off x filter on/off
+Metrics:  R@1, R@limit and MRR of the target row, overlap with the exact top-k
+          (what the ANN index gives up), p50 / p95 / p99 search latency
+Output:   one row per configuration, then the Pareto frontier of R@limit vs p95
+
+Queries are the known-item queries of benchmark_hybrid_retrieval.py (spans and
+numbers taken from a row) plus article queries ("المادة 24" + words of that
+article) that trigger the RAG entity pre-filter. Filter on mirrors
+RAGService._retrieve: the filtered search falls back to an unfiltered one when
+it finds nothing. Rewrite on embeds the query rewriter's output instead.
+
+No OpenAI calls: row and query vectors come from the embedding store
+(EMBEDDING_STORE_PATH), rewrites from a JSON file next to the golden set. Run
+once with --allow-api to fill in whatever is missing (export_snapshot.py
+--seed-embedding-store also seeds the row vectors from a collection).
+
+Backends:
+    local   in-process LocalVectorIndex; HNSW does not apply, an IVF index
+            (--nlist) with nprobe in place of ef is swept next to the exact scan
+    milvus  one scratch collection per (M, efConstruction) on MILVUS_URI,
+            dropped afterwards
+
+Usage:
+    # First run: embed rows / queries and rewrite queries once
+    python data_pipeline/benchmark_retrieval.py --allow-api
+
+    # Offline, in-process
+    python data_pipeline/benchmark_retrieval.py
+
+    # Local Milvus, HNSW sweep
+    python data_pipeline/benchmark_retrieval.py --backend milvus --ef 10 32 64 128 --m 8 16 32 --ef-construction 100 200
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import logging
+import structlog
+import numpy as np
+
+if hasattr(sys.stdout, "reconfigure"):
+    sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.embedding_store import EmbeddingStore, model_input
+from app.services.local_vector_index import LocalVectorIndex
+from app.services.citation_index import CitationIndex
+from app.services.legal_entities import QueryEntityParser, filter_expr
+from data_pipeline.benchmark_hybrid_retrieval import make_queries
+from data_pipeline.build_lexical_index import documents_from_excel
+from data_pipeline.milvus_setup import HNSW_PARAMS
+
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBED_BATCH = 256
+WARMUP_QUERIES = 5
+
+
+# ── Inputs ──────────────────────────────────────────────────────────────────
+
+def make_article_queries(docs: list[dict], n: int, seed: int = 0) -> list[tuple[str, str, int]]:
+    """("article", query, target doc index) for rows that carry an article number."""
+    rng = random.Random(seed)
+    numbered = [i for i, d in enumerate(docs) if isinstance(d["metadata"].get("article_number"), int)]
+    queries = []
+    for i in rng.sample(numbered, min(n, len(numbered))):
+        words = docs[i]["text"].split()
+        size = min(len(words), rng.randint(4, 6))
+        start = rng.randint(0, len(words) - size)
+        queries.append(("article", f"المادة {docs[i]['metadata']['article_number']} {' '.join(words[start:start + size])}", i))
+    return queries
+
+
+def embed_texts(store: EmbeddingStore, texts: list[str], allow_api: bool) -> np.ndarray:
+    """Vectors of *texts* from the embedding store; missing ones are embedded only with allow_api."""
+    found = store.get_texts(EMBEDDING_MODEL, texts)
+    missing = list(dict.fromkeys(t for t in texts if t not in found))
+    if missing and not allow_api:
+        sys.exit(f"{len(missing)} of {len(texts)} texts are not in the embedding store ({store.path}); "
+                 "run once with --allow-api to embed them")
+    if missing:
+        from openai import OpenAI
+
+        client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        for start in range(0, len(missing), EMBED_BATCH):
+            chunk = missing[start:start + EMBED_BATCH]
+            response = client.embeddings.create(input=[model_input(t) for t in chunk], model=EMBEDDING_MODEL)
+            fresh = {t: np.asarray(d.embedding, dtype=np.float32) for t, d in zip(chunk, response.data)}
+            store.put_texts(EMBEDDING_MODEL, fresh)
+            found.update(fresh)
+        print(f"Embedded {len(missing)} texts with the API (stored for the next runs)")
+    return np.stack([np.asarray(found[t], dtype=np.float32) for t in texts])
+
+
+def load_rewrites(path: str, queries: list[str], allow_api: bool) -> dict:
+    """{query: rewritten query}; missing rewrites are produced only with allow_api."""
+    rewrites = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            rewrites = json.load(f)
+    missing = [q for q in dict.fromkeys(queries) if q not in rewrites]
+    if missing and allow_api:
+        from app.services.query_rewriter_service import QueryRewriterService
+
+        async def rewrite_all():
+            rewriter = QueryRewriterService()
+            limiter = asyncio.Semaphore(8)
+
+            async def one(query):
+                async with limiter:
+                    return await rewriter.rewrite(query)
+
+            return await asyncio.gather(*(one(q) for q in missing))
+
+        rewrites.update(zip(missing, asyncio.run(rewrite_all())))
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(rewrites, f, ensure_ascii=False, indent=0)
+        os.replace(tmp, path)
+        print(f"Rewrote {len(missing)} queries with the API (saved to {path})")
+    elif missing:
+        return {}
+    return rewrites
+
+
+# ── Backends ────────────────────────────────────────────────────────────────
+# indexes() yields (index label, search params, search) where
+# search(vector, limit, expr, param) returns golden row numbers, best first.
+
+class LocalBackend:
+    def __init__(self, docs: list[dict], vectors: np.ndarray, nlist: int, nprobes: list[int]):
+        self.docs = docs
+        self.vectors = vectors
+        self.nlist = nlist
+        self.nprobes = nprobes
+
+    def indexes(self):
+        flat = LocalVectorIndex(np.arange(len(self.docs)), self.vectors, self.docs)
+        yield "flat", [None], lambda v, limit, expr, param: [h["id"] for h in flat.search(v, limit, expr)]
+        if self.nlist and len(self.docs) > self.nlist:
+            ivf = LocalVectorIndex(np.arange(len(self.docs)), self.vectors, self.docs, nlist=self.nlist)
+
+            def search(vector, limit, expr, nprobe):
+                ivf.nprobe = nprobe
+                return [h["id"] for h in ivf.search(vector, limit, expr)]
+
+            yield f"ivf{self.nlist}", self.nprobes, search
+
+    @staticmethod
+    def param_label(param, limit: int) -> str:
+        return "exact" if param is None else f"nprobe={param}"
+
+    def close(self):
+        pass
+
+
+class MilvusBackend:
+    def __init__(self, docs: list[dict], vectors: np.ndarray, efs: list[int], ms: list[int],
+                 ef_constructions: list[int], keep: bool = False):
+        from pymilvus import connections
+
+        self.docs = docs
+        self.vectors = vectors
+        self.efs = efs
+        self.builds = [(m, efc) for m in ms for efc in ef_constructions]
+        self.keep = keep
+        self.name = f"{settings.MILVUS_COLLECTION_NAME}_bench"
+        connections.connect(alias="default", uri=settings.MILVUS_URI, token=settings.MILVUS_TOKEN)
+
+    def _build(self, m: int, ef_construction: int):
+        from pymilvus import Collection, utility
+        from data_pipeline.milvus_setup import build_schema, create_scalar_indexes, entity_columns, hnsw_index_params
+
+        if utility.has_collection(self.name):
+            utility.drop_collection(self.name)
+        collection = Collection(self.name, build_schema(self.vectors.shape[1]))
+        row_of = {}
+        for start in range(0, len(self.docs), 500):
+            docs = self.docs[start:start + 500]
+            result = collection.insert(entity_columns(
+                collection,
+                self.vectors[start:start + len(docs)].tolist(),
+                [d["source"] for d in docs],
+                [d["text"] for d in docs],
+                [d["metadata"] for d in docs],
+            ))
+            row_of.update(zip(result.primary_keys, range(start, start + len(docs))))
+        collection.flush()
+        started = time.perf_counter()
+        collection.create_index("vector", hnsw_index_params(m, ef_construction))
+        create_scalar_indexes(collection)
+        collection.load()
+        print(f"Built HNSW M={m} efConstruction={ef_construction} in {time.perf_counter() - started:.1f}s")
+        return collection, row_of
+
+    def indexes(self):
+        for m, ef_construction in self.builds:
+            collection, row_of = self._build(m, ef_construction)
+
+            def search(vector, limit, expr, ef, collection=collection, row_of=row_of):
+                results = collection.search(
+                    data=[vector.tolist()],
+                    anns_field="vector",
+                    param={"metric_type": "COSINE", "params": {"ef": max(ef, limit)}},
+                    limit=limit,
+                    expr=expr,
+                )
+                return [row_of[hit.id] for hit in results[0]]
+
+            yield f"M{m}/efC{ef_construction}", self.efs, search
+
+    @staticmethod
+    def param_label(param, limit: int) -> str:
+        return f"ef={param}" if param >= limit else f"ef={param}->{limit}"
+
+    def close(self):
+        from pymilvus import utility
+
+        if not self.keep and utility.has_collection(self.name):
+            utility.drop_collection(self.name)
+
+
+# ── Measurement ─────────────────────────────────────────────────────────────
+
+def run_config(search, vectors: np.ndarray, targets: list[int], filters: list, exact: list[list[int]],
+               limit: int, param) -> dict:
+    for i in range(min(WARMUP_QUERIES, len(vectors))):
+        search(vectors[i], limit, None, param)
+
+    ranks, overlaps, latencies = [], [], []
+    for vector, target, expr, truth in zip(vectors, targets, filters, exact):
+        start = time.perf_counter()
+        rows = search(vector, limit, expr, param) if expr else []
+        if not rows:
+            rows = search(vector, limit, None, param)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ranks.append(rows.index(target) + 1 if target in rows else None)
+        truth = truth[:limit]
+        overlaps.append(len(set(rows) & set(truth)) / len(truth) if truth else 1.0)
+
+    total = len(ranks)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "r1": sum(1 for r in ranks if r == 1) / total,
+        "recall": sum(1 for r in ranks if r) / total,
+        "mrr": sum(1 / r for r in ranks if r) / total,
+        "overlap": float(np.mean(overlaps)),
+        "p50": p50, "p95": p95, "p99": p99,
+    }
+
+
+def pareto_front(rows: list[dict]) -> list[dict]:
+    """Rows no other row beats on both R@limit (higher) and p95 (lower)."""
+    return [
+        row for row in rows
+        if not any(
+            other["recall"] >= row["recall"] and other["p95"] <= row["p95"]
+            and (other["recall"] > row["recall"] or other["p95"] < row["p95"])
+            for other in rows
+        )
+    ]
+
+
+def print_table(rows: list[dict], front: list[dict]):
+    print(f"  {'index':<14} {'search':<11} {'limit':>5} {'rewrite':>7} {'filter':>6} "
+          f"{'R@1':>7} {'R@lim':>7} {'MRR':>6} {'ANN ov':>7} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7}")
+    for row in rows:
+        mark = "*" if row in front else " "
+        mark += "P" if row.get("production") else " "
+        print(f"{mark}{row['index']:<14} {row['search']:<11} {row['limit']:>5} {row['rewrite']:>7} {row['filter']:>6} "
+              f"{row['r1']:>7.1%} {row['recall']:>7.1%} {row['mrr']:>6.3f} {row['overlap']:>7.1%} "
+              f"{row['p50']:>7.2f} {row['p95']:>7.2f} {row['p99']:>7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall / latency sweep of dense retrieval on the golden set")
+    parser.add_argument("--golden", default="data/golden_set.xlsx")
+    parser.add_argument("--queries", type=int, default=200, help="Span and article queries to sample (plus half as many number queries)")
+    parser.add_argument("--backend", choices=("local", "milvus"), default="local")
+    parser.add_argument("--limit", type=int, nargs="+", default=[5, settings.HYBRID_CANDIDATES])
+    parser.add_argument("--ef", type=int, nargs="+", default=[settings.MILVUS_SEARCH_EF, 32, 64, 128, 256])
+    parser.add_argument("--m", type=int, nargs="+", default=[HNSW_PARAMS["M"]])
+    parser.add_argument("--ef-construction", type=int, nargs="+", default=[HNSW_PARAMS["efConstruction"]])
+    parser.add_argument("--nlist", type=int, default=32, help="IVF lists of the local backend (0: exact scan only)")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--rewrites", default=None, help="Rewrite cache (default: golden_rewrites.json next to --golden)")
+    parser.add_argument("--no-rewrite", action="store_true", help="Skip the rewrite-on configurations")
+    parser.add_argument("--allow-api", action="store_true", help="Embed / rewrite what the caches are missing with OpenAI")
+    parser.add_argument("--keep-collection", action="store_true", help="Keep the last Milvus scratch collection")
+    args = parser.parse_args()
+
+    docs = documents_from_excel(args.golden)
+    queries = make_queries(docs, args.queries) + make_article_queries(docs, args.queries)
+    texts = [q for _, q, _ in queries]
+    targets = [i for _, _, i in queries]
+
+    store = EmbeddingStore.open_default()
+    if store is None:
+        sys.exit("The embedding store is disabled or unavailable (EMBEDDING_STORE_PATH)")
+    doc_vectors = embed_texts(store, [d["text"] for d in docs], args.allow_api)
+    arms = {"off": texts}
+    if not args.no_rewrite:
+        rewrites_path = args.rewrites or os.path.join(os.path.dirname(os.path.abspath(args.golden)), "golden_rewrites.json")
+        rewrites = load_rewrites(rewrites_path, texts, args.allow_api)
+        if rewrites:
+            arms["on"] = [rewrites[q] for q in texts]
+        else:
+            print(f"No rewrites cached in {rewrites_path}; skipping rewrite=on (run once with --allow-api)")
+    arm_vectors = {arm: embed_texts(store, arm_texts, args.allow_api) for arm, arm_texts in arms.items()}
+    store.close()
+
+    # Filters come from the user's query, not the rewrite, as in RAGService._retrieve
+    citations = CitationIndex.build(docs)
+    entities = QueryEntityParser(citations.laws, citations.courts)
+    filters = {"off": [None] * len(texts), "on": [filter_expr(entities.parse(q)) for q in texts]}
+
+    # Exact top-k per arm / filter, for the ANN overlap column
+    flat = LocalVectorIndex(np.arange(len(docs)), doc_vectors, docs)
+    depth = max(args.limit)
+    exact = {}
+    for arm, vectors in arm_vectors.items():
+        for f, exprs in filters.items():
+            exact[arm, f] = []
+            for vector, expr in zip(vectors, exprs):
+                hits = flat.search(vector, depth, expr) if expr else []
+                exact[arm, f].append([h["id"] for h in (hits or flat.search(vector, depth))])
+
+    if args.backend == "milvus":
+        backend = MilvusBackend(docs, doc_vectors, args.ef, args.m, args.ef_construction, args.keep_collection)
+    else:
+        backend = LocalBackend(docs, doc_vectors, args.nlist, args.nprobe)
+
+    print("=" * 112)
+    print("   RETRIEVAL BENCHMARK (golden set)")
+    print("=" * 112)
+    kinds = {k: sum(1 for q in queries if q[0] == k) for k in ("span", "number", "article")}
+    print(f"Documents: {len(docs)}, queries: {len(queries)} {kinds}, "
+          f"with an entity filter: {sum(1 for f in filters['on'] if f)}, backend: {args.backend}\n")
+
+    rows = []
+    try:
+        for index_label, params, search in backend.indexes():
+            for param in params:
+                for limit in args.limit:
+                    for arm, vectors in arm_vectors.items():
+                        for f, exprs in filters.items():
+                            row = run_config(search, vectors, targets, exprs, exact[arm, f], limit, param)
+                            row.update(index=index_label, search=backend.param_label(param, limit), limit=limit,
+                                       rewrite=arm, filter=f)
+                            row["production"] = (
+                                args.backend == "milvus" and limit == 5 and arm == "on" and f == "on"
+                                and param == settings.MILVUS_SEARCH_EF
+                                and index_label == f"M{HNSW_PARAMS['M']}/efC{HNSW_PARAMS['efConstruction']}"
+                            )
+                            rows.append(row)
+    finally:
+        backend.close()
+
+    front = pareto_front(rows)
+    print_table(rows, front)
+    print("\n* Pareto-optimal (R@limit vs p95)   P current production settings\n")
+    print("Pareto frontier, fastest first:")
+    print_table(sorted(front, key=lambda r: r["p95"]), front)
+
+
+if __name__ == "__main__":
+    main()
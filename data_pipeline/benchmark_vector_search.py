@@ -0,0 +1,139 @@
+"""
+benchmark_vector_search.py
+--------------------------
+Throughput and latency of VectorStoreService.search under concurrent load for
+the three search paths:
+
+    to_thread     the old path: blocking ORM search in the default executor
+    thread_pool   blocking ORM search on the dedicated, bounded pool
+    async_client  pymilvus AsyncMilvusClient (gRPC aio on the event loop)
+
+Usage:
+    # Against the local Milvus from data_pipeline/vector_db/docker-compose.yml (MILVUS_URI)
+    python data_pipeline/benchmark_vector_search.py
+
+    # No Milvus: an in-process stand-in that takes --latency-ms per search
+    python data_pipeline/benchmark_vector_search.py --stand-in --latency-ms 20
+"""
+
+import sys
+import os
+import time
+import asyncio
+import argparse
+import statistics
+import logging
+import numpy as np
+import structlog
+
+if hasattr(sys.stdout, "reconfigure"):
+    sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services.vector_store_service import AsyncMilvusClient, VectorStoreService
+
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+MODES = ("to_thread", "thread_pool", "async_client")
+
+
+class StandInCollection:
+    """Blocking search that holds its thread for the configured latency."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def search(self, **kwargs):
+        time.sleep(self.latency)
+        return [[]]
+
+
+class StandInAsyncClient:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def search(self, **kwargs):
+        await asyncio.sleep(self.latency)
+        return [[]]
+
+    async def close(self):
+        pass
+
+
+async def build_service(mode: str, stand_in_latency: float = None) -> VectorStoreService:
+    store = VectorStoreService()
+    store.use_async_client = mode == "async_client"
+    if stand_in_latency is None:
+        await store.warmup()
+    elif store.use_async_client:
+        store._async_client = StandInAsyncClient(stand_in_latency)
+    else:
+        store._collection = StandInCollection(stand_in_latency)
+        store._connect = lambda: None
+    return store
+
+
+async def run_mode(mode: str, concurrency: int, requests: int, dim: int, stand_in_latency: float = None) -> dict:
+    store = await build_service(mode, stand_in_latency)
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((64, dim)).astype(np.float32)
+    queue = list(range(requests))
+    latencies_ms = []
+
+    async def search(vector):
+        if mode == "to_thread":
+            return await asyncio.to_thread(store._search_sync, vector, 5, None)
+        return await store.search(vector)
+
+    async def client():
+        while queue:
+            i = queue.pop()
+            start = time.perf_counter()
+            await search(vectors[i % len(vectors)])
+            latencies_ms.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+    await store.close()
+
+    latencies_ms.sort()
+    return {
+        "qps": requests / wall,
+        "p50": statistics.median(latencies_ms),
+        "p95": latencies_ms[int(len(latencies_ms) * 0.95) - 1],
+    }
+
+
+async def main_async(args):
+    modes = [m for m in MODES if m != "async_client" or AsyncMilvusClient is not None or args.stand_in]
+    latency = args.latency_ms / 1000 if args.stand_in else None
+    print("=" * 72)
+    print("   VECTOR SEARCH CONCURRENCY BENCHMARK")
+    print("=" * 72)
+    print(f"Backend: {'stand-in, %.0f ms/search' % args.latency_ms if args.stand_in else settings.MILVUS_URI}")
+    print(f"Requests per run: {args.requests}, MILVUS_SEARCH_CONCURRENCY={settings.MILVUS_SEARCH_CONCURRENCY}, "
+          f"default executor workers={min(32, (os.cpu_count() or 1) + 4)}\n")
+    print(f"{'mode':<13} {'clients':>8} {'qps':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for concurrency in args.concurrency:
+        for mode in modes:
+            row = await run_mode(mode, concurrency, args.requests, args.dim, latency)
+            print(f"{mode:<13} {concurrency:>8} {row['qps']:>9.1f} {row['p50']:>9.1f} {row['p95']:>9.1f}")
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent Milvus searches")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--requests", type=int, default=512)
+    parser.add_argument("--dim", type=int, default=settings.MILVUS_DIMENSION)
+    parser.add_argument("--stand-in", action="store_true", help="Use an in-process stand-in instead of Milvus")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Stand-in latency per search")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
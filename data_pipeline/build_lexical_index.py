@@ -0,0 +1,124 @@
+"""
+build_lexical_index.py
+----------------------
+Builds the BM25 index used by hybrid retrieval (app/services/lexical_index.py)
+from the text_content of every entity in the Milvus collection, and writes it to
+LEXICAL_INDEX_PATH. From the same pass it builds the exact citation index
+(app/services/citation_index.py) at CITATION_INDEX_PATH. Running services pick
+up new files within 30 seconds. ingest_data.py calls this automatically after
+each ingestion.
+
+Usage:
+    # From the collection at MILVUS_URI (ids are Milvus primary keys)
+    python data_pipeline/build_lexical_index.py
+
+    # From an Excel file instead (ids are row numbers; offline experiments only)
+    python data_pipeline/build_lexical_index.py --excel data/golden_set.xlsx --out /tmp/golden_index.npz \
+        --citation-out /tmp/golden_citations.json
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import structlog
+import logging
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services.citation_index import CitationIndex
+from app.services.lexical_index import BM25Index
+from data_pipeline.milvus_stream import PK_FIELD, iter_batches
+
+logging.basicConfig(level=logging.INFO)
+log = structlog.get_logger()
+
+
+def documents_from_collection(collection) -> list[dict]:
+    return [
+        {"id": e[PK_FIELD], "text": e["text_content"], "source": e["source_type"], "metadata": e["metadata"]}
+        for batch in iter_batches(collection, [PK_FIELD, "text_content", "source_type", "metadata"])
+        for e in batch
+    ]
+
+
+def documents_from_excel(path: str) -> list[dict]:
+    import pandas as pd
+
+    df = pd.read_excel(path)
+    docs = []
+    for i, row in df.iterrows():
+        meta = row.get("metadata")
+        if isinstance(meta, str):
+            try:
+                meta = json.loads(meta)
+            except ValueError:
+                meta = {"raw": meta}
+        docs.append({
+            "id": int(i),
+            "text": str(row["text_content"]),
+            "source": str(row["source_type"]),
+            "metadata": meta if isinstance(meta, dict) else {},
+        })
+    return docs
+
+
+def build_lexical_index(docs: list[dict], out_path: str = None) -> BM25Index:
+    out_path = out_path or settings.LEXICAL_INDEX_PATH
+    start = time.perf_counter()
+    index = BM25Index.build(docs)
+    index.save(out_path)
+    log.info("Lexical index written", path=out_path, documents=len(index), terms=len(index.terms),
+             seconds=round(time.perf_counter() - start, 2))
+    return index
+
+
+def build_citation_index(docs: list[dict], out_path: str = None) -> CitationIndex:
+    out_path = out_path or settings.CITATION_INDEX_PATH
+    index = CitationIndex.build(docs)
+    index.save(out_path)
+    log.info("Citation index written", path=out_path, documents=len(index),
+             articles=len(index.articles), rulings=len(index.rulings))
+    return index
+
+
+def build_indexes(docs: list[dict], out_path: str = None, citation_out_path: str = None):
+    build_lexical_index(docs, out_path)
+    build_citation_index(docs, citation_out_path)
+
+
+def rebuild_from_collection(collection, out_path: str = None):
+    """Rebuilds the indexes after ingestion; failures are logged, never raised."""
+    try:
+        build_indexes(documents_from_collection(collection), out_path)
+    except Exception as e:
+        log.error("Failed to rebuild lexical / citation indexes", error=str(e))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the BM25 index for hybrid retrieval")
+    parser.add_argument("--excel", help="Build from an Excel file instead of the Milvus collection")
+    parser.add_argument("--out", default=settings.LEXICAL_INDEX_PATH)
+    parser.add_argument("--citation-out", default=settings.CITATION_INDEX_PATH)
+    args = parser.parse_args()
+
+    if args.excel:
+        build_indexes(documents_from_excel(args.excel), args.out, args.citation_out)
+        return
+
+    from pymilvus import connections, Collection, utility
+
+    if settings.MILVUS_URI.startswith("https"):
+        connections.connect(alias="default", uri=settings.MILVUS_URI, token=settings.MILVUS_TOKEN)
+    else:
+        connections.connect(alias="default", uri=settings.MILVUS_URI)
+    if not utility.has_collection(settings.MILVUS_COLLECTION_NAME):
+        log.error(f"Collection {settings.MILVUS_COLLECTION_NAME} does not exist.")
+        return
+    build_indexes(documents_from_collection(Collection(settings.MILVUS_COLLECTION_NAME)), args.out, args.citation_out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+export_snapshot.py
+------------------
+Streams a Milvus collection into a columnar on-disk snapshot (app/core/snapshot.py):
+vectors as one contiguous float32 .npy (memory-mappable), text and metadata as
+Parquet (JSON lines without pyarrow), and a manifest with counts and sha256 checksums.
+
+The snapshot feeds the local vector index (VECTOR_STORE_BACKEND=local|fallback)
+and can be read back zero-copy by offline tools instead of re-querying Milvus.
+
+Usage:
+    # Export the collection at MILVUS_URI to LOCAL_INDEX_PATH
+    python data_pipeline/export_snapshot.py
+
+    # Another cluster / output directory
+    python data_pipeline/export_snapshot.py --uri https://...zillizcloud.com --token KEY --out snapshots/2024-06-01
+
+    # Re-check an existing snapshot's checksums and counts
+    python data_pipeline/export_snapshot.py --verify data/vector_snapshot
+
+    # Also copy every stored vector into the embedding store (EMBEDDING_STORE_PATH),
+    # so re-ingesting the same texts elsewhere costs no OpenAI calls
+    python data_pipeline/export_snapshot.py --seed-embedding-store
+"""
+
+import sys
+import os
+import argparse
+import structlog
+import logging
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymilvus import connections, Collection, utility
+from app.core.config import settings
+from app.core.embedding_store import EmbeddingStore, text_key
+from app.core.snapshot import SnapshotWriter, verify_snapshot
+from data_pipeline.milvus_stream import BATCH_SIZE, PK_FIELD, Throughput, iter_batches
+
+logging.basicConfig(level=logging.INFO)
+log = structlog.get_logger()
+
+OUTPUT_FIELDS = [PK_FIELD, "vector", "text_content", "source_type", "metadata"]
+EMBEDDING_MODEL = "text-embedding-3-small"  # the model the collection was embedded with
+
+
+def export_snapshot(collection: Collection, out_path: str, batch_size: int = BATCH_SIZE,
+                    docs_format: str = None, store: EmbeddingStore = None) -> dict:
+    dim = next(f.params["dim"] for f in collection.schema.fields if f.name == "vector")
+    meter = Throughput("Exported batch")
+    with SnapshotWriter(out_path, dim=dim, docs_format=docs_format, collection=collection.name) as writer:
+        for batch in iter_batches(collection, OUTPUT_FIELDS, batch_size):
+            writer.write(
+                [e[PK_FIELD] for e in batch],
+                [e["vector"] for e in batch],
+                [{"text": e["text_content"], "source": e["source_type"], "metadata": e["metadata"] or {}}
+                 for e in batch],
+            )
+            if store is not None:
+                store.put_many(EMBEDDING_MODEL, [(text_key(e["text_content"]), e["vector"]) for e in batch])
+            meter.add(len(batch))
+
+    manifest = writer.manifest
+    log.info("Snapshot written", path=out_path, count=manifest["count"], dim=dim,
+             docs_format=manifest["docs_format"], **meter.summary())
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a Milvus collection to a columnar snapshot")
+    parser.add_argument("--uri", default=settings.MILVUS_URI)
+    parser.add_argument("--token", default=settings.MILVUS_TOKEN)
+    parser.add_argument("--collection", default=settings.MILVUS_COLLECTION_NAME)
+    parser.add_argument("--out", default=settings.LOCAL_INDEX_PATH)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--docs-format", choices=["parquet", "jsonl"], help="Default: parquet if pyarrow is installed")
+    parser.add_argument("--verify", metavar="SNAPSHOT", help="Verify an existing snapshot and exit")
+    parser.add_argument("--seed-embedding-store", action="store_true",
+                        help="Also write every vector to the embedding store")
+    args = parser.parse_args()
+
+    if args.verify:
+        try:
+            manifest = verify_snapshot(args.verify)
+        except ValueError as e:
+            log.error("Snapshot verification failed", path=args.verify, error=str(e))
+            sys.exit(1)
+        log.info("Snapshot OK", path=args.verify, count=manifest["count"], created_at=manifest["created_at"])
+        return
+
+    if args.uri.startswith("https"):
+        connections.connect(alias="default", uri=args.uri, token=args.token)
+    else:
+        connections.connect(alias="default", uri=args.uri)
+    if not utility.has_collection(args.collection):
+        log.error("Collection not found", collection=args.collection)
+        sys.exit(1)
+
+    store = EmbeddingStore.open_default() if args.seed_embedding_store else None
+    if args.seed_embedding_store and store is None:
+        log.error("Embedding store unavailable; set EMBEDDING_STORE_PATH")
+        sys.exit(1)
+    try:
+        export_snapshot(Collection(args.collection), args.out, args.batch_size, args.docs_format, store)
+    finally:
+        if store is not None:
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
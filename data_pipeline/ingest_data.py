@@ -1,52 +1,396 @@
+"""
+ingest_data.py
+--------------
+Embeds the rows of Excel files (columns source_type, text_content and an
+optional metadata column) and inserts them into the Milvus collection.
+
+Ingestion is streamed so memory stays flat and work is kept as it goes:
+  1. Rows are read from the workbook in chunks (openpyxl read-only mode).
+  2. Each chunk is embedded with multi-input requests (up to
+     EMBEDDING_MAX_INPUTS_PER_REQUEST inputs / EMBED_BATCH_TOKENS tokens each),
+     at most --concurrency in flight, paced by request and token buckets so
+     the OpenAI rate limits are never hit.
+  3. Embedded rows are inserted in batches sized by payload bytes while the
+     next chunk is being embedded.
+
+A failure midway loses at most the chunk in flight; rows already inserted stay,
+and are recorded in the manifest batch by batch, so a re-run does not insert them again.
+Progress is logged in rows/sec.
+
+Runs are incremental (data_pipeline/ingest_manifest.py): unchanged rows are
+skipped, rows whose metadata changed are re-inserted with their stored vector,
+only new text is embedded, and rows that disappeared from the files (or whose
+file disappeared from the ingested directory) are deleted. Re-running over an
+unchanged corpus makes no OpenAI calls.
+
+Usage:
+    python data_pipeline/ingest_data.py <path_to_excel_or_directory>
+    python data_pipeline/ingest_data.py data/ --concurrency 16 --tpm 5000000
+
+    # Plain append without the manifest (the pre-incremental behaviour)
+    python data_pipeline/ingest_data.py data/ --no-manifest
+"""
+
 import sys
 import os
-import pandas as pd
-from openai import OpenAI
 import json
+import asyncio
+import argparse
+import pandas as pd
+import openai
 import structlog
 import logging
+from typing import Iterator, List, Optional
 
 # Add project root to sys.path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from pymilvus import connections, Collection, utility
+from app.core.clients import create_openai_client
 from app.core.config import settings
+from app.core.embedding_store import EmbeddingStore, model_input, text_key
+from app.core.rate_limit import AsyncTokenBucket
+from app.services.response_cache import bump_collection_version
+from data_pipeline.build_lexical_index import rebuild_from_collection
+from data_pipeline.ingest_manifest import MANIFEST_PATH, IngestManifest
+from data_pipeline.milvus_setup import entity_columns
+from data_pipeline.milvus_stream import Throughput, iter_batches, rebatch_by_bytes
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 log = structlog.get_logger()
 
-def get_embedding(client, text: str):
-    text = text.replace("\n", " ")
-    return client.embeddings.create(input=[text], model="text-embedding-3-small").data[0].embedding
+EMBEDDING_MODEL     = "text-embedding-3-small"
+READ_CHUNK_ROWS     = 2000               # rows read from the workbook at a time
+EMBED_BATCH_TOKENS  = 200_000            # per request; the API allows 300k
+EMBED_CONCURRENCY   = 8                  # embedding requests in flight
+REQUESTS_PER_MINUTE = 3000               # OpenAI account limits (tier 2 for text-embedding-3-small)
+TOKENS_PER_MINUTE   = 1_000_000
+MAX_INSERT_BYTES    = 16 * 1024 * 1024   # Milvus insert payload cap
+MAX_INSERT_ROWS     = 1000
+REQUIRED_COLUMNS    = ["source_type", "text_content"]
 
-def ingest_data(excel_path: str):
-    if not os.path.exists(excel_path):
-        log.error("File not found", path=excel_path)
-        return
 
-    log.info("Reading Excel file...", path=excel_path)
-    try:
+def estimate_tokens(text: str) -> int:
+    # cl100k averages ~4 bytes per token on Latin text and ~2 on Arabic; err high
+    return len(text.encode("utf-8")) // 2 + 1
+
+
+# ── Reading ─────────────────────────────────────────────────────────────────
+
+def iter_excel_chunks(excel_path: str, chunk_rows: int = READ_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Yields the first sheet as DataFrames of up to chunk_rows rows, without loading it whole."""
+    if not excel_path.endswith(".xlsx"):
+        # Legacy .xls has no streaming reader; load once and slice
         df = pd.read_excel(excel_path)
-    except Exception as e:
-        log.error("Failed to read Excel file", error=str(e))
-        return
-    
-    # Check required columns
-    required_cols = ["source_type", "text_content"]
-    missing = [c for c in required_cols if c not in df.columns]
-    if missing:
-        log.error("Missing required columns", missing=missing)
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows]
         return
 
-    # Init OpenAI
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(excel_path, read_only=True, data_only=True)
     try:
-        client = OpenAI(api_key=settings.OPENAI_API_KEY)
-    except Exception as e:
-        log.error("Failed to initialize OpenAI client", error=str(e))
-        return
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c) if c is not None else f"unnamed_{i}" for i, c in enumerate(header)]
+        chunk = []
+        for row in rows:
+            if any(v is not None for v in row):
+                chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                yield pd.DataFrame(chunk, columns=columns)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=columns)
+    finally:
+        workbook.close()
+
+
+def parse_metadata(val) -> dict:
+    if isinstance(val, dict):
+        return val
+    if isinstance(val, str):
+        try:
+            meta = json.loads(val)
+            return meta if isinstance(meta, dict) else {"raw": val}
+        except ValueError:
+            return {"raw": val}
+    return {}
+
+
+def parse_rows(df: pd.DataFrame, meta_col: Optional[str]) -> tuple[List[dict], int]:
+    """Returns (entities without vectors, rows skipped for having no text)."""
+    entities, skipped = [], 0
+    texts = df["text_content"].tolist()
+    sources = df["source_type"].tolist()
+    metas = df[meta_col].tolist() if meta_col else [None] * len(df)
+    for text, source, meta in zip(texts, sources, metas):
+        if text is None or pd.isna(text) or not str(text).strip():
+            skipped += 1
+            continue
+        entities.append({
+            "source_type": str(source),
+            "text_content": str(text),
+            "metadata": parse_metadata(meta) if meta is not None and not pd.isna(meta) else {},
+        })
+    return entities, skipped
+
+
+# ── Embedding ───────────────────────────────────────────────────────────────
+
+class BatchEmbedder:
+    """
+    Embeds entities with batched requests under a concurrency cap and request/token
+    buckets. Vectors already in the embedding store are reused; new ones are added.
+    """
+
+    def __init__(self, concurrency: int = EMBED_CONCURRENCY, rpm: int = REQUESTS_PER_MINUTE,
+                 tpm: int = TOKENS_PER_MINUTE, client=None, store: Optional[EmbeddingStore] = None):
+        self.client = client or create_openai_client().with_options(max_retries=5)
+        self.store = store if store is not None else EmbeddingStore.open_default()
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.request_bucket = AsyncTokenBucket(rpm)
+        self.token_bucket = AsyncTokenBucket(tpm)
+        self.max_inputs = settings.EMBEDDING_MAX_INPUTS_PER_REQUEST
+        self.requests = 0
+        self.tokens = 0
+        self.failed = 0
+        self.store_hits = 0
+        self.store_errors = 0
+
+    def plan(self, entities: List[dict]) -> List[List[dict]]:
+        """Groups entities into requests bounded by input count and estimated tokens."""
+        batches, batch, tokens = [], [], 0
+        for entity in entities:
+            n = estimate_tokens(entity["text_content"])
+            if batch and (len(batch) >= self.max_inputs or tokens + n > EMBED_BATCH_TOKENS):
+                batches.append(batch)
+                batch, tokens = [], 0
+            batch.append(entity)
+            tokens += n
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def _request(self, batch: List[dict]):
+        estimate = sum(estimate_tokens(e["text_content"]) for e in batch)
+        await self.request_bucket.acquire()
+        await self.token_bucket.acquire(estimate)
+        self.requests += 1
+        response = await self.client.embeddings.create(
+            input=[model_input(e["text_content"]) for e in batch],
+            model=EMBEDDING_MODEL,
+        )
+        used = getattr(response.usage, "total_tokens", None) or estimate
+        self.token_bucket.refund(estimate - used)
+        self.tokens += used
+        for d in response.data:
+            batch[d.index]["vector"] = d.embedding
+        if self.store is not None:
+            try:
+                await asyncio.to_thread(
+                    self.store.put_many, EMBEDDING_MODEL, [(text_key(e["text_content"]), e["vector"]) for e in batch]
+                )
+            except Exception as e:
+                # The rows are embedded and still get inserted; only the store misses them
+                self.store_errors += 1
+                log.warning("Embedding store write failed", rows=len(batch), error=str(e))
+
+    async def _embed_batch(self, batch: List[dict]):
+        async with self.semaphore:
+            try:
+                await self._request(batch)
+                return
+            except openai.BadRequestError as e:
+                if len(batch) == 1:
+                    self.failed += 1
+                    log.warning("Row rejected by the embeddings API, skipping",
+                                text=batch[0]["text_content"][:80], error=str(e))
+                    return
+                # One bad input fails the whole request; find it by halving
+                error = e
+            except Exception as e:
+                self.failed += len(batch)
+                log.warning("Embedding request failed, skipping its rows", rows=len(batch), error=str(e))
+                return
+        log.warning("Embedding request rejected, splitting", rows=len(batch), error=str(error))
+        half = len(batch) // 2
+        await asyncio.gather(self._embed_batch(batch[:half]), self._embed_batch(batch[half:]))
+
+    async def embed(self, entities: List[dict]) -> List[dict]:
+        """Adds a "vector" to every entity it can; returns those that got one, in order."""
+        pending = entities
+        if self.store is not None and entities:
+            keys = [text_key(e["text_content"]) for e in entities]
+            try:
+                stored = await asyncio.to_thread(self.store.get_many, EMBEDDING_MODEL, keys)
+            except Exception as e:
+                self.store_errors += 1
+                log.warning("Embedding store read failed, embedding the chunk", error=str(e))
+                stored = {}
+            for e, key in zip(entities, keys):
+                if key in stored:
+                    e["vector"] = stored[key].tolist()
+            pending = [e for e in entities if "vector" not in e]
+            self.store_hits += len(entities) - len(pending)
+        await asyncio.gather(*(self._embed_batch(b) for b in self.plan(pending)))
+        return [e for e in entities if "vector" in e]
+
+
+# ── Inserting ───────────────────────────────────────────────────────────────
+
+def delete_pks(collection: Collection, pks: List[int]):
+    for i in range(0, len(pks), MAX_INSERT_ROWS):
+        chunk = pks[i:i + MAX_INSERT_ROWS]
+        collection.delete(f"pk in [{', '.join(str(int(pk)) for pk in chunk)}]")
+
+
+def attach_vectors(collection: Collection, entities: List[dict]) -> List[dict]:
+    """Copies the stored vector of each entity's old_pk onto it; returns those whose vector is gone."""
+    vectors = {}
+    for i in range(0, len(entities), MAX_INSERT_ROWS):
+        pks = [e["old_pk"] for e in entities[i:i + MAX_INSERT_ROWS]]
+        for hit in collection.query(expr=f"pk in [{', '.join(map(str, pks))}]", output_fields=["pk", "vector"]):
+            vectors[hit["pk"]] = hit["vector"]
+    missing = []
+    for e in entities:
+        if e["old_pk"] in vectors:
+            e["vector"] = vectors[e["old_pk"]]
+        else:
+            missing.append(e)
+    return missing
+
+
+def insert_batch(collection: Collection, batch: List[dict]):
+    """Inserts one batch and sets each entity's new "pk"."""
+    result = collection.insert(entity_columns(
+        collection,
+        [e["vector"]       for e in batch],
+        [e["source_type"]  for e in batch],
+        [e["text_content"] for e in batch],
+        [e["metadata"]     for e in batch],
+    ))
+    for e, pk in zip(batch, result.primary_keys):
+        e["pk"] = pk
 
-    # Connect to Milvus
+
+async def insert_entities(collection: Collection, entities: List[dict], meter: Throughput,
+                          manifest: Optional[IngestManifest] = None, source_file: str = None) -> List[dict]:
+    """
+    Inserts in byte-sized batches. After each batch its new pks are recorded in the
+    manifest, then the entities it replaces are deleted and, once that succeeded,
+    forgotten; a failure part-way leaves the manifest in step with the collection.
+    The manifest is only used here on the event loop, never from the worker threads.
+    """
+    for batch in rebatch_by_bytes([entities], MAX_INSERT_BYTES, MAX_INSERT_ROWS):
+        await asyncio.to_thread(insert_batch, collection, batch)
+        if manifest is not None:
+            manifest.record(source_file, batch)
+        replaced = [e["old_pk"] for e in batch if "old_pk" in e]
+        if replaced:
+            await asyncio.to_thread(delete_pks, collection, replaced)
+            if manifest is not None:
+                manifest.replaced(replaced)
+        meter.add(len(batch))
+    return entities
+
+
+async def ingest_file(excel_path: str, collection: Collection, embedder: BatchEmbedder,
+                      manifest: Optional[IngestManifest] = None) -> Optional[dict]:
+    source_file = os.path.abspath(excel_path)
+    meter = Throughput("Inserted rows")
+    read = skipped = unchanged = updated = deleted = 0
+    meta_col = None
+    pending_insert: Optional[asyncio.Task] = None
+
+    async def finish_insert():
+        nonlocal pending_insert
+        if pending_insert is not None:
+            task, pending_insert = pending_insert, None
+            await task
+
+    try:
+        for i, df in enumerate(iter_excel_chunks(excel_path)):
+            if i == 0:
+                missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+                if missing:
+                    log.error("Missing required columns", missing=missing)
+                    return None
+                # Case-insensitive lookup for the metadata column
+                meta_col = next((c for c in df.columns if c.lower() == "metadata"), None)
+
+            entities, chunk_skipped = parse_rows(df, meta_col)
+            read += len(df)
+            skipped += chunk_skipped
+
+            changed = []
+            if manifest is not None:
+                entities, changed, chunk_unchanged = manifest.classify(source_file, entities)
+                unchanged += chunk_unchanged
+                if changed:
+                    # Metadata-only changes reuse the stored vector; re-embed only if it is gone
+                    entities += await asyncio.to_thread(attach_vectors, collection, changed)
+                    changed = [e for e in changed if "vector" in e]
+                    updated += len(changed)
+
+            embedded = await embedder.embed(entities)
+            if manifest is not None and len(embedded) < len(entities):
+                manifest.forget(source_file, [e for e in entities if "vector" not in e])
+
+            # Insert this chunk while the next one is read and embedded
+            await finish_insert()
+            if embedded or changed:
+                pending_insert = asyncio.create_task(
+                    insert_entities(collection, embedded + changed, meter, manifest, source_file)
+                )
+            log.info("Chunk processed", rows_read=read, embedded=len(embedded), metadata_updated=len(changed),
+                     openai_requests=embedder.requests, tokens=embedder.tokens)
+    finally:
+        await finish_insert()
+
+    if manifest is not None:
+        # Rows that were ingested from this file before but are no longer in it
+        stale = manifest.stale(source_file)
+        if stale:
+            await asyncio.to_thread(delete_pks, collection, stale)
+            deleted = len(stale)
+            log.info("Deleted rows no longer in the file", path=excel_path, deleted=deleted)
+
+    summary = {
+        "rows_read": read,
+        "skipped_empty": skipped,
+        "unchanged": unchanged,
+        "metadata_updated": updated,
+        "failed": embedder.failed,
+        "inserted": meter.count,
+        "deleted": deleted,
+        "embedding_store_hits": embedder.store_hits,
+        "embedding_store_errors": embedder.store_errors,
+        "openai_requests": embedder.requests,
+        "tokens": embedder.tokens,
+        "rate_limit_wait_s": round(embedder.request_bucket.waited + embedder.token_bucket.waited, 1),
+        "seconds": meter.summary()["seconds"],
+        "rows_per_sec": meter.rate,
+    }
+    return summary
+
+
+def open_manifest(path: str, collection: Collection) -> IngestManifest:
+    """Opens the manifest; a new one adopts what is already in the collection and drops exact duplicates."""
+    manifest = IngestManifest(path, {"uri": settings.MILVUS_URI, "collection": collection.name})
+    if len(manifest) == 0 and collection.num_entities > 0:
+        log.info("New manifest: adopting the entities already in the collection...", path=path)
+        duplicates = manifest.adopt(iter_batches(collection, ["pk", "text_content", "source_type", "metadata"]))
+        if duplicates:
+            delete_pks(collection, duplicates)
+        log.info("Adopted existing entities", adopted=len(manifest), duplicates_deleted=len(duplicates))
+    return manifest
+
+
+def connect_milvus() -> bool:
     if settings.MILVUS_URI.startswith("https"):
         log.info("Connecting to Zilliz Cloud...", uri=settings.MILVUS_URI)
         try:
@@ -57,14 +401,27 @@ def ingest_data(excel_path: str):
             )
         except Exception as e:
             log.error("Failed to connect to Zilliz Cloud", error=str(e))
-            return
+            return False
     else:
         log.info("Connecting to Milvus...", uri=settings.MILVUS_URI)
         try:
             connections.connect(uri=settings.MILVUS_URI)
         except Exception as e:
             log.error("Failed to connect to Milvus", error=str(e))
-            return
+            return False
+    return True
+
+
+def ingest_paths(excel_paths: List[str], root: Optional[str] = None, concurrency: int = EMBED_CONCURRENCY,
+                 rpm: int = REQUESTS_PER_MINUTE, tpm: int = TOKENS_PER_MINUTE,
+                 manifest_path: Optional[str] = MANIFEST_PATH):
+    """
+    Ingests the given Excel files. With a manifest (the default) the run is
+    incremental; when root is a directory, rows of files under it that no
+    longer exist are deleted too. manifest_path=None appends every row.
+    """
+    if not connect_milvus():
+        return
 
     collection_name = settings.MILVUS_COLLECTION_NAME
     if not utility.has_collection(collection_name):
@@ -72,92 +429,94 @@ def ingest_data(excel_path: str):
         return
 
     collection = Collection(collection_name)
+    try:
+        manifest = open_manifest(manifest_path, collection) if manifest_path else None
+    except ValueError as e:
+        log.error(str(e))
+        return
 
-    data_rows = []
-    
-    log.info(f"Processing {len(df)} rows...")
-    
-    for index, row in df.iterrows():
-        try:
-            text = str(row["text_content"])
-            source = str(row["source_type"])
-            
-            # Simple Metadata handling (case-insensitive column lookup)
-            meta = {}
-            meta_col = next((c for c in df.columns if c.lower() == "metadata"), None)
-            if meta_col and pd.notna(row[meta_col]):
-                try:
-                    val = row[meta_col]
-                    if isinstance(val, str):
-                        meta = json.loads(val)
-                    elif isinstance(val, dict):
-                        meta = val
-                except:
-                    meta = {"raw": str(row[meta_col])}
-            
-            vector = get_embedding(client, text)
-            
-            data_rows.append([
-                vector,
-                source,
-                text,
-                meta
-            ])
-            
-            if (index + 1) % 10 == 0:
-                log.info(f"Processed {index + 1} rows")
+    changes = 0
 
-        except Exception as e:
-            log.warning(f"Error processing row {index}", error=str(e))
-
-    if data_rows:
-        log.info(f"Inserting {len(data_rows)} vectors into Milvus...")
-        # PyMilvus insert expects list of columns, not list of rows for some versions, 
-        # but list of dicts or list of lists depending on API usage.
-        # Collection.insert usually takes: [[vector1, vector2], [source1, source2], ...] 
-        # Or a list of dicts if using DataFrame? 
-        # The safest way is column-based list of lists.
-        
-        vectors = [r[0] for r in data_rows]
-        sources = [r[1] for r in data_rows]
-        texts = [r[2] for r in data_rows]
-        metas = [r[3] for r in data_rows]
-        
-        entities = [
-            vectors,
-            sources,
-            texts,
-            metas
-        ]
-        
+    async def run():
+        nonlocal changes
+        embedder = BatchEmbedder(concurrency, rpm, tpm)
         try:
-            collection.insert(entities)
-            collection.flush()
-            log.info("Ingestion complete successfully.")
-        except Exception as e:
-            log.error("Failed to insert data", error=str(e))
+            for i, path in enumerate(excel_paths, 1):
+                log.info("Ingesting Excel file...", path=path, file=f"{i}/{len(excel_paths)}")
+                summary = await ingest_file(path, collection, embedder, manifest)
+                if summary is not None:
+                    changes += summary["inserted"] + summary["deleted"]
+                    log.info("File ingested", path=path, **summary)
+            if manifest is not None and root is not None:
+                present = {os.path.abspath(p) for p in excel_paths}
+                prefix = os.path.join(os.path.abspath(root), "")
+                for source_file in manifest.files():
+                    if source_file.startswith(prefix) and source_file not in present:
+                        stale = manifest.stale(source_file)
+                        await asyncio.to_thread(delete_pks, collection, stale)
+                        changes += len(stale)
+                        log.info("Deleted rows of a removed file", path=source_file, deleted=len(stale))
+        finally:
+            await embedder.client.close()
+            if embedder.store is not None:
+                embedder.store.close()
+
+    try:
+        asyncio.run(run())
+    except Exception as e:
+        log.error("Ingestion failed; rows inserted so far are kept", error=str(e))
+    finally:
+        collection.flush()
+        if manifest is not None:
+            manifest.close()
+
+    if not changes:
+        log.info("Collection already up to date.")
+        return
+    bump_collection_version(collection_name)
+    rebuild_from_collection(collection)
+    log.info("Ingestion complete successfully.", changes=changes)
+
 
+def ingest_data(excel_path: str, **kwargs):
+    if not os.path.exists(excel_path):
+        log.error("File not found", path=excel_path)
+        return
+    ingest_paths([excel_path], **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed Excel rows and insert them into Milvus")
+    parser.add_argument("target", help="Excel file or directory of Excel files")
+    parser.add_argument("--concurrency", type=int, default=EMBED_CONCURRENCY, help="Embedding requests in flight")
+    parser.add_argument("--rpm", type=int, default=REQUESTS_PER_MINUTE, help="OpenAI requests per minute")
+    parser.add_argument("--tpm", type=int, default=TOKENS_PER_MINUTE, help="OpenAI tokens per minute")
+    parser.add_argument("--manifest", default=MANIFEST_PATH, help="SQLite manifest for incremental runs")
+    parser.add_argument("--no-manifest", action="store_true", help="Append every row, ignoring the manifest")
+    args = parser.parse_args()
+
+    options = {
+        "concurrency": args.concurrency,
+        "rpm": args.rpm,
+        "tpm": args.tpm,
+        "manifest_path": None if args.no_manifest else args.manifest,
+    }
+    target = args.target
+    if os.path.isdir(target):
+        excel_files = []
+        for root, _, files in os.walk(target):
+            for f in files:
+                if f.endswith(".xlsx") or f.endswith(".xls"):
+                    excel_files.append(os.path.join(root, f))
+        if not excel_files:
+            print(f"No Excel files found in {target}")
+        else:
+            print(f"Found {len(excel_files)} Excel files. Starting ingestion...")
+            ingest_paths(sorted(excel_files), root=target, **options)
+            print("\nAll files ingested.")
     else:
-        log.info("No valid data to insert.")
+        ingest_data(target, **options)
+
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python ingest_data.py <path_to_excel_or_directory>")
-    else:
-        target = sys.argv[1]
-        if os.path.isdir(target):
-            excel_files = []
-            for root, _, files in os.walk(target):
-                for f in files:
-                    if f.endswith(".xlsx") or f.endswith(".xls"):
-                        excel_files.append(os.path.join(root, f))
-            if not excel_files:
-                print(f"No Excel files found in {target}")
-            else:
-                print(f"Found {len(excel_files)} Excel files. Starting ingestion...")
-                for i, path in enumerate(excel_files, 1):
-                    print(f"\n[{i}/{len(excel_files)}] Ingesting: {path}")
-                    ingest_data(path)
-                print("\nAll files ingested.")
-        else:
-            ingest_data(target)
+    main()
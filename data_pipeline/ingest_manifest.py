@@ -0,0 +1,198 @@
+"""
+ingest_manifest.py
+------------------
+SQLite manifest that makes ingest_data.py incremental and idempotent.
+
+Every ingested row is recorded under (source file, row hash) with its Milvus pk:
+
+    text_hash = sha256(source_type, text_content)          what the vector depends on
+    row_hash  = sha256(text_hash, canonical metadata JSON)  the whole entity
+
+On the next run a row whose row_hash is already recorded for its file is left
+alone; a row whose text_hash is recorded with other metadata reuses the stored
+vector; anything else is new and gets embedded. Rows recorded for a file but no
+longer in it are deleted. Each run stamps the rows it sees with a run id, so
+"no longer in it" means "not stamped by this run".
+
+Entities already in the collection when the manifest is first created are
+adopted with an empty source file, so upgrading does not re-ingest everything;
+a file that contains an adopted row claims it. Scripts that re-insert the whole
+collection under new pks (migrate_metadata.py) remove the manifest, and the
+next ingestion adopts again.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import structlog
+from typing import Iterable, List, Optional
+
+log = structlog.get_logger()
+
+MANIFEST_PATH = os.path.join("data", "ingest_manifest.sqlite")
+ADOPTED = ""  # source_file of rows found in the collection rather than ingested from a file
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    source_file TEXT NOT NULL,
+    row_hash    TEXT NOT NULL,
+    text_hash   TEXT NOT NULL,
+    pk          INTEGER NOT NULL,
+    run_id      INTEGER NOT NULL,
+    PRIMARY KEY (source_file, row_hash)
+);
+CREATE INDEX IF NOT EXISTS entities_text ON entities (source_file, text_hash);
+CREATE TABLE IF NOT EXISTS manifest (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+def text_hash(source_type: str, text: str) -> str:
+    return hashlib.sha256(f"{source_type}\x00{text}".encode("utf-8")).hexdigest()
+
+
+def row_hash(t_hash: str, metadata: Optional[dict]) -> str:
+    meta = json.dumps(metadata or {}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{t_hash}\x00{meta}".encode("utf-8")).hexdigest()
+
+
+def hash_entity(entity: dict) -> dict:
+    entity["text_hash"] = text_hash(entity["source_type"], entity["text_content"])
+    entity["row_hash"] = row_hash(entity["text_hash"], entity["metadata"])
+    return entity
+
+
+class IngestManifest:
+    def __init__(self, path: str, identity: dict):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(_SCHEMA)
+        stored = self._get("identity")
+        if stored is None:
+            self._set("identity", json.dumps(identity, sort_keys=True))
+        elif json.loads(stored) != identity:
+            raise ValueError(f"Manifest {path} belongs to {stored}; pass --manifest to use another file")
+        self.run_id = int(self._get("run_id") or 0) + 1
+        self._set("run_id", str(self.run_id))
+        self.db.commit()
+
+    def _get(self, key: str) -> Optional[str]:
+        row = self.db.execute("SELECT value FROM manifest WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set(self, key: str, value: str):
+        self.db.execute("INSERT OR REPLACE INTO manifest (key, value) VALUES (?, ?)", (key, value))
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM entities").fetchone()[0]
+
+    def adopt(self, batches: Iterable[List[dict]]) -> List[int]:
+        """
+        Records entities streamed from the collection as adopted rows. Returns the
+        pks of exact duplicates (same source_type, text and metadata as an entity
+        already adopted), which earlier non-incremental runs left behind.
+        """
+        duplicates = []
+        for batch in batches:
+            for e in batch:
+                t_hash = text_hash(e["source_type"], e["text_content"])
+                cursor = self.db.execute(
+                    "INSERT OR IGNORE INTO entities VALUES (?, ?, ?, ?, 0)",
+                    (ADOPTED, row_hash(t_hash, e["metadata"]), t_hash, e["pk"]),
+                )
+                if not cursor.rowcount:
+                    duplicates.append(e["pk"])
+        self._set("adopted_at", time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+        self.db.commit()
+        return duplicates
+
+    def classify(self, source_file: str, entities: List[dict]) -> tuple[List[dict], List[dict], int]:
+        """
+        Splits a chunk of parsed rows into (new, changed, unchanged count).
+        Changed rows carry "old_pk", the entity whose vector they can reuse.
+        Rows seen earlier in this run (duplicates inside the file) are dropped.
+        """
+        new, changed, unchanged = [], [], 0
+        for e in map(hash_entity, entities):
+            row = self.db.execute(
+                "SELECT source_file, run_id FROM entities WHERE source_file IN (?, ?) AND row_hash = ? "
+                "AND (pk >= 0 OR run_id = ?) ORDER BY source_file DESC LIMIT 1",
+                (source_file, ADOPTED, e["row_hash"], self.run_id),
+            ).fetchone()
+            if row is not None:
+                if row[1] != self.run_id:
+                    unchanged += 1
+                    self.db.execute(
+                        "UPDATE OR REPLACE entities SET source_file = ?, run_id = ? WHERE source_file = ? AND row_hash = ?",
+                        (source_file, self.run_id, row[0], e["row_hash"]),
+                    )
+                continue
+            previous = self.db.execute(
+                "SELECT source_file, row_hash, pk FROM entities WHERE source_file IN (?, ?) AND text_hash = ? "
+                "AND run_id != ? AND pk >= 0 ORDER BY source_file DESC LIMIT 1",
+                (source_file, ADOPTED, e["text_hash"], self.run_id),
+            ).fetchone()
+            if previous is not None:
+                # Stamp the old row so it is neither pruned nor claimed twice before it is replaced
+                self.db.execute(
+                    "UPDATE OR REPLACE entities SET source_file = ?, run_id = ? WHERE source_file = ? AND row_hash = ?",
+                    (source_file, self.run_id, previous[0], previous[1]),
+                )
+                e["old_pk"] = previous[2]
+                changed.append(e)
+            else:
+                new.append(e)
+            # Placeholder so a duplicate later in the file is recognised; record() sets the pk
+            self.db.execute(
+                "INSERT OR REPLACE INTO entities VALUES (?, ?, ?, -1, ?)",
+                (source_file, e["row_hash"], e["text_hash"], self.run_id),
+            )
+        return new, changed, unchanged
+
+    def record(self, source_file: str, entities: List[dict]):
+        """
+        Stores the pks of inserted rows. Placeholders of an interrupted run keep
+        pk -1 and are pruned by the next one.
+        """
+        self.db.executemany(
+            "UPDATE entities SET pk = ? WHERE source_file = ? AND row_hash = ?",
+            [(e["pk"], source_file, e["row_hash"]) for e in entities],
+        )
+        self.db.commit()
+
+    def replaced(self, pks: List[int]):
+        """
+        Forgets entities that were deleted from the collection after a re-insert.
+        Call only once the delete succeeded: until then the old rows stay recorded,
+        so stale() can still prune them.
+        """
+        self.db.executemany("DELETE FROM entities WHERE pk = ?", [(pk,) for pk in pks])
+        self.db.commit()
+
+    def forget(self, source_file: str, entities: List[dict]):
+        """Drops the placeholders of rows that could not be embedded, so the next run retries them."""
+        self.db.executemany(
+            "DELETE FROM entities WHERE source_file = ? AND row_hash = ? AND pk = -1",
+            [(source_file, e["row_hash"]) for e in entities],
+        )
+        self.db.commit()
+
+    def stale(self, source_file: str) -> List[int]:
+        """pks recorded for source_file that this run has not seen; removes them from the manifest."""
+        pks = [pk for (pk,) in self.db.execute(
+            "SELECT pk FROM entities WHERE source_file = ? AND run_id != ? AND pk >= 0",
+            (source_file, self.run_id),
+        )]
+        self.db.execute("DELETE FROM entities WHERE source_file = ? AND run_id != ?", (source_file, self.run_id))
+        self.db.commit()
+        return pks
+
+    def files(self) -> List[str]:
+        return [f for (f,) in self.db.execute("SELECT DISTINCT source_file FROM entities WHERE source_file != ?",
+                                              (ADOPTED,))]
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
@@ -4,33 +4,51 @@ migrate_metadata.py
 Fixes records in Milvus that were ingested with an empty metadata field because
 the Excel column was named "Metadata" (capital M) instead of "metadata".
 
-Strategy (no re-embedding):
-  1. Read the source Excel file to build a text_content → metadata mapping.
-  2. Fetch all entities from Milvus (including their stored vectors).
-  3. For each entity, look up the correct metadata from the Excel mapping.
-  4. Delete all existing entities.
-  5. Re-insert with the same vectors + corrected metadata.
+Strategy (no re-embedding, memory-bounded, the collection is never emptied):
+  1. Read the Excel file(s) in chunks into a column mapping a normalized text
+     hash to the canonical metadata JSON. The texts themselves are not kept.
+  2. Stream the collection (without vectors) with a query iterator and join
+     each batch against that column on the text hash (vectorized pandas map).
+  3. For the rows whose metadata differs, fetch their stored vectors, insert
+     the corrected entities, then delete the originals, batch by batch. An
+     interruption leaves every row either migrated or untouched, never missing.
+
+Rows that already carry the right metadata are skipped, so the migration is
+idempotent: re-running it after a failure only touches what is left.
 
 Usage:
-    python data_pipeline/migrate_metadata.py <path_to_excel_file>
+    python data_pipeline/migrate_metadata.py <path_to_excel_file_or_directory>
+
+    # Report the match rate and how many rows would change, without writing
+    python data_pipeline/migrate_metadata.py data/ --dry-run
 """
 
 import sys
 import os
 import json
+import argparse
 import pandas as pd
 import structlog
 import logging
+from typing import List
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from pymilvus import connections, Collection, utility
 from app.core.config import settings
+from app.core.text import text_hash
+from app.services.response_cache import bump_collection_version
+from data_pipeline.build_lexical_index import rebuild_from_collection
+from data_pipeline.ingest_data import iter_excel_chunks, parse_metadata
+from data_pipeline.ingest_manifest import MANIFEST_PATH
+from data_pipeline.milvus_setup import entity_columns
+from data_pipeline.milvus_stream import Throughput, iter_batches
 
 logging.basicConfig(level=logging.INFO)
 log = structlog.get_logger()
 
-BATCH_SIZE = 1000  # Milvus query pagination batch size
+BATCH_SIZE = 1000  # entities per read / insert / delete batch
+STREAM_FIELDS = ["pk", "text_content", "source_type", "metadata"]
 
 
 def connect_milvus():
@@ -42,72 +60,102 @@ def connect_milvus():
         connections.connect(alias="default", uri=settings.MILVUS_URI)
 
 
-def build_metadata_map(excel_path: str) -> dict:
-    """Returns a dict mapping text_content -> metadata dict from the Excel file."""
-    df = pd.read_excel(excel_path)
-
-    # Case-insensitive lookup for metadata column
-    meta_col = next((c for c in df.columns if c.lower() == "metadata"), None)
-    if not meta_col:
-        log.warning("No metadata column found in Excel. Migration will set all metadata to {}.")
-
-    text_col = next((c for c in df.columns if c.lower() == "text_content"), None)
-    if not text_col:
-        log.error("No text_content column found in Excel.", columns=list(df.columns))
-        sys.exit(1)
-
-    log.info("Excel columns detected", text_col=text_col, meta_col=meta_col)
-
-    mapping = {}
-    for _, row in df.iterrows():
-        text = str(row[text_col]).strip()
-        meta = {}
-        if meta_col and pd.notna(row[meta_col]):
-            try:
-                val = row[meta_col]
-                if isinstance(val, str):
-                    meta = json.loads(val)
-                elif isinstance(val, dict):
-                    meta = val
-            except Exception:
-                meta = {"raw": str(row[meta_col])}
-        mapping[text] = meta
-
+def normalized_key(text) -> str:
+    """Join key; whitespace differences between Excel and Milvus don't break a match."""
+    return text_hash(" ".join(str(text).split()))
+
+
+def canonical(metadata) -> str:
+    return json.dumps(metadata or {}, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def build_metadata_map(excel_paths: List[str]) -> pd.Series:
+    """Returns a Series mapping normalized text hash -> canonical metadata JSON. Later rows win."""
+    parts = []
+    for excel_path in excel_paths:
+        text_col = meta_col = None
+        for i, df in enumerate(iter_excel_chunks(excel_path)):
+            if i == 0:
+                # Case-insensitive lookup for the text and metadata columns
+                text_col = next((c for c in df.columns if c.lower() == "text_content"), None)
+                meta_col = next((c for c in df.columns if c.lower() == "metadata"), None)
+                if not text_col:
+                    log.error("No text_content column found in Excel.", path=excel_path, columns=list(df.columns))
+                    sys.exit(1)
+                if not meta_col:
+                    log.warning("No metadata column found in Excel; its rows map to {}.", path=excel_path)
+                log.info("Excel columns detected", path=excel_path, text_col=text_col, meta_col=meta_col)
+
+            df = df[df[text_col].notna()]
+            metas = df[meta_col].tolist() if meta_col else [None] * len(df)
+            parts.append(pd.Series(
+                [canonical(parse_metadata(m)) for m in metas],
+                index=[normalized_key(t) for t in df[text_col].tolist()],
+                dtype=object,
+            ))
+
+    if not parts:
+        return pd.Series(dtype=object)
+    mapping = pd.concat(parts)
+    mapping = mapping[~mapping.index.duplicated(keep="last")]
     log.info("Metadata map built", total_rows=len(mapping))
     return mapping
 
 
-def fetch_all_entities(collection: Collection) -> list[dict]:
-    """Fetches all entities from Milvus in batches using query pagination."""
-    collection.load()
-    all_entities = []
-    offset = 0
-
-    while True:
-        results = collection.query(
-            expr="pk >= 0",
-            output_fields=["pk", "text_content", "source_type", "metadata", "vector"],
-            limit=BATCH_SIZE,
-            offset=offset,
-        )
-        if not results:
-            break
-        all_entities.extend(results)
-        log.info("Fetched batch", offset=offset, batch_size=len(results), total_so_far=len(all_entities))
-        if len(results) < BATCH_SIZE:
-            break
-        offset += BATCH_SIZE
-
-    log.info("Total entities fetched from Milvus", count=len(all_entities))
-    return all_entities
-
-
-def migrate(excel_path: str):
-    if not os.path.exists(excel_path):
-        log.error("Excel file not found", path=excel_path)
-        sys.exit(1)
+def plan_batch(batch: List[dict], metadata_map: pd.Series) -> tuple[List[dict], int]:
+    """
+    Joins one batch of entities with the metadata map. Returns (entities whose
+    metadata must change, each carrying "new_metadata"; number of matched rows).
+    """
+    frame = pd.DataFrame({
+        "key": [normalized_key(e["text_content"] or "") for e in batch],
+        "current": [canonical(e["metadata"]) for e in batch],
+    })
+    frame["target"] = frame["key"].map(metadata_map)
+    matched = frame["target"].notna()
+    changed = matched & (frame["target"] != frame["current"])
+    updates = [
+        {**batch[i], "new_metadata": json.loads(frame.at[i, "target"])}
+        for i in frame.index[changed]
+    ]
+    return updates, int(matched.sum())
+
+
+def apply_updates(collection: Collection, updates: List[dict]) -> List[int]:
+    """Inserts the corrected entities with their stored vectors, deletes the originals; returns the new pks."""
+    hits = collection.query(
+        expr=f"pk in [{', '.join(str(u['pk']) for u in updates)}]",
+        output_fields=["pk", "vector"],
+    )
+    vectors = {h["pk"]: h["vector"] for h in hits}
+    updates = [u for u in updates if u["pk"] in vectors]  # deleted meanwhile: nothing to fix
+    if not updates:
+        return []
+
+    result = collection.insert(entity_columns(
+        collection,
+        [vectors[u["pk"]]     for u in updates],
+        [u["source_type"]     for u in updates],
+        [u["text_content"]    for u in updates],
+        [u["new_metadata"]    for u in updates],
+    ))
+    old_pks = [u["pk"] for u in updates]
+    try:
+        collection.delete(f"pk in [{', '.join(map(str, old_pks))}]")
+    except Exception:
+        log.error("Corrected rows were inserted but the originals could not be deleted; "
+                  "delete these pks before re-running", pks=old_pks)
+        raise
+    return list(result.primary_keys)
+
+
+def migrate(excel_paths: List[str], dry_run: bool = False, batch_size: int = BATCH_SIZE) -> dict:
+    for path in excel_paths:
+        if not os.path.exists(path):
+            log.error("Excel file not found", path=path)
+            sys.exit(1)
 
-    metadata_map = build_metadata_map(excel_path)
+    metadata_map = build_metadata_map(excel_paths)
 
     connect_milvus()
 
@@ -118,78 +166,65 @@ def migrate(excel_path: str):
 
     collection = Collection(collection_name)
 
-    # Step 1: Fetch all existing entities (with their vectors)
-    log.info("Fetching all entities from Milvus...")
-    entities = fetch_all_entities(collection)
-
-    if not entities:
-        log.warning("No entities found in collection. Nothing to migrate.")
-        return
-
-    # Step 2: Build corrected data
-    matched = 0
-    unmatched = 0
-    corrected = []
-
-    for entity in entities:
-        text = (entity.get("text_content") or "").strip()
-        correct_meta = metadata_map.get(text)
-
-        if correct_meta is None:
-            unmatched += 1
-            correct_meta = entity.get("metadata") or {}  # keep existing (empty) metadata
-        else:
-            matched += 1
-
-        corrected.append({
-            "vector": entity["vector"],
-            "source_type": entity.get("source_type", ""),
-            "text_content": text,
-            "metadata": correct_meta,
-        })
-
-    log.info("Match summary", matched=matched, unmatched=unmatched)
-
-    if unmatched > 0:
-        log.warning(
-            "Some Milvus records had no matching row in Excel. "
-            "Their metadata will remain unchanged.",
-            unmatched=unmatched,
-        )
-
-    # Step 3: Delete all existing entities
-    log.info("Deleting all existing entities...")
-    ids_to_delete = [e["pk"] for e in entities]
-    # Milvus delete requires an expression; delete by PKs in chunks
-    chunk_size = 500
-    for i in range(0, len(ids_to_delete), chunk_size):
-        chunk = ids_to_delete[i : i + chunk_size]
-        expr = f"pk in [{', '.join(str(x) for x in chunk)}]"
-        collection.delete(expr)
-    collection.flush()
-    log.info("All entities deleted.")
-
-    # Step 4: Re-insert with corrected metadata
-    log.info("Re-inserting entities with corrected metadata...", count=len(corrected))
-    vectors     = [r["vector"]      for r in corrected]
-    sources     = [r["source_type"] for r in corrected]
-    texts       = [r["text_content"]for r in corrected]
-    metas       = [r["metadata"]    for r in corrected]
-
-    entities_to_insert = [vectors, sources, texts, metas]
-    collection.insert(entities_to_insert)
-    collection.flush()
-
-    log.info("Migration complete.", total_reinserted=len(corrected))
-
-
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python data_pipeline/migrate_metadata.py <path_to_excel_file_or_directory>")
-        sys.exit(1)
-
-    target = sys.argv[1]
-
+    meter = Throughput("Scanned batch")
+    matched = to_change = migrated = 0
+    # Corrected rows get new, higher auto_id pks while the iterator is still
+    # running; the scan stops at the first of them.
+    first_new_pk = None
+    for batch in iter_batches(collection, STREAM_FIELDS, batch_size):
+        if first_new_pk is not None:
+            batch = [e for e in batch if e["pk"] < first_new_pk]
+            if not batch:
+                break
+        updates, batch_matched = plan_batch(batch, metadata_map)
+        matched += batch_matched
+        to_change += len(updates)
+        if updates and not dry_run:
+            new_pks = apply_updates(collection, updates)
+            migrated += len(new_pks)
+            if new_pks and first_new_pk is None:
+                first_new_pk = min(new_pks)
+        meter.add(len(batch), matched=matched, to_change=to_change)
+
+    scanned = meter.count
+    report = {
+        "scanned": scanned,
+        "matched": matched,
+        "unmatched": scanned - matched,
+        "match_rate": round(matched / scanned, 4) if scanned else 0.0,
+        "already_correct": matched - to_change,
+        "to_change": to_change,
+        "migrated": migrated,
+        "seconds": meter.summary()["seconds"],
+    }
+    if scanned - matched:
+        log.warning("Some Milvus records had no matching row in Excel. Their metadata is left unchanged.",
+                    unmatched=scanned - matched)
+
+    if dry_run:
+        log.info("Dry run complete; nothing was written.", **report)
+        return report
+
+    if migrated:
+        collection.flush()
+        bump_collection_version(collection_name)
+        rebuild_from_collection(collection)  # BM25 / citation hits carry pks and metadata
+        if os.path.exists(MANIFEST_PATH):
+            # Migrated entities have new pks; the next ingestion re-adopts the collection
+            os.remove(MANIFEST_PATH)
+            log.info("Removed the ingestion manifest", path=MANIFEST_PATH)
+    log.info("Migration complete.", **report)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy Excel metadata onto existing Milvus records")
+    parser.add_argument("target", help="Excel file, or a directory searched recursively for Excel files")
+    parser.add_argument("--dry-run", action="store_true", help="Report the match rate without writing")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Entities per batch")
+    args = parser.parse_args()
+
+    target = args.target
     if os.path.isdir(target):
         excel_files = []
         for root, _, files in os.walk(target):
@@ -199,10 +234,11 @@ if __name__ == "__main__":
         if not excel_files:
             print(f"No Excel files found in {target}")
             sys.exit(1)
-        print(f"Found {len(excel_files)} Excel files. Starting migration...")
-        for i, path in enumerate(excel_files, 1):
-            print(f"\n[{i}/{len(excel_files)}] Migrating: {path}")
-            migrate(path)
-        print("\nAll files migrated.")
+        print(f"Found {len(excel_files)} Excel files.")
     else:
-        migrate(target)
+        excel_files = [target]
+    migrate(sorted(excel_files), dry_run=args.dry_run, batch_size=args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,13 @@
 import sys
 import os
+from typing import Optional
 
 # Add project root to sys.path to access app.core.config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from pymilvus import connections, FieldSchema, CollectionSchema, DataType, Collection, utility
 from app.core.config import settings
+from app.services.legal_entities import SCALAR_FIELDS, scalar_fields
 import structlog
 import logging
 
@@ -13,6 +15,76 @@ import logging
 logging.basicConfig(level=logging.INFO)
 log = structlog.get_logger()
 
+HNSW_PARAMS = {"M": 16, "efConstruction": 200}
+# Typed copies of the citation metadata (app/services/legal_entities.py), filtered
+# through INVERTED scalar indexes instead of JSON-path scans. Nullable: articles
+# have no court / year, rulings no law / article.
+_VARCHAR_LENGTHS = {"law_name": 512, "court": 256}
+
+
+def build_schema(dim: int) -> CollectionSchema:
+    # Schema Definition based on User Request
+    fields = [
+        # pk: Int64, Primary Key, Auto ID
+        FieldSchema(name="pk", dtype=DataType.INT64, is_primary=True, auto_id=True, description="Unique identifier"),
+        
+        # vector: FloatVector, HNSW
+        FieldSchema(name="vector", dtype=DataType.FLOAT_VECTOR, dim=dim, description="Embedding vector"),
+        
+        # source_type: VarChar, Partition Key
+        FieldSchema(name="source_type", dtype=DataType.VARCHAR, max_length=64, is_partition_key=True, description="Source type (e.g., ruling, article)"),
+        
+        # text_content: VarChar
+        FieldSchema(name="text_content", dtype=DataType.VARCHAR, max_length=65535, description="The actual text content"),
+        
+        # metadata: JSON
+        FieldSchema(name="metadata", dtype=DataType.JSON, description="Additional metadata")
+    ]
+    for name in SCALAR_FIELDS:
+        if name in _VARCHAR_LENGTHS:
+            fields.append(FieldSchema(name=name, dtype=DataType.VARCHAR, max_length=_VARCHAR_LENGTHS[name], nullable=True))
+        else:
+            fields.append(FieldSchema(name=name, dtype=DataType.INT64, nullable=True))
+
+    return CollectionSchema(fields, description="Lebanese Legal Assistant Knowledge Base")
+
+
+def hnsw_index_params(M: int = HNSW_PARAMS["M"], efConstruction: int = HNSW_PARAMS["efConstruction"]) -> dict:
+    return {
+        "metric_type": "COSINE",
+        "index_type": "HNSW",
+        "params": {"M": M, "efConstruction": efConstruction}
+    }
+
+
+def create_scalar_indexes(collection: Collection):
+    for name in SCALAR_FIELDS:
+        collection.create_index(field_name=name, index_params={"index_type": "INVERTED"}, index_name=f"{name}_idx")
+
+
+def has_scalar_fields(collection: Collection) -> bool:
+    """True if the collection was created with the typed citation fields."""
+    names = {f.name for f in collection.schema.fields}
+    return all(name in names for name in SCALAR_FIELDS)
+
+
+def _fit(value, max_bytes: Optional[int]):
+    # VARCHAR max_length counts UTF-8 bytes (2 per Arabic letter)
+    if max_bytes is None or value is None:
+        return value
+    return value.encode()[:max_bytes].decode(errors="ignore")
+
+
+def entity_columns(collection: Collection, vectors: list, sources: list, texts: list, metas: list) -> list:
+    """Column-based insert payload, with the typed citation fields when the collection has them."""
+    columns = [vectors, sources, texts, metas]
+    if has_scalar_fields(collection):
+        rows = [scalar_fields(meta) for meta in metas]
+        for name in SCALAR_FIELDS:
+            columns.append([_fit(row[name], _VARCHAR_LENGTHS.get(name)) for row in rows])
+    return columns
+
+
 def create_collection():
     if settings.MILVUS_URI.startswith("https"):
         log.info("Connecting to Zilliz Cloud...", uri=settings.MILVUS_URI)
@@ -42,38 +114,15 @@ def create_collection():
 
     log.info(f"Creating collection {collection_name} with dim={dim}")
 
-    # Schema Definition based on User Request
-    fields = [
-        # pk: Int64, Primary Key, Auto ID
-        FieldSchema(name="pk", dtype=DataType.INT64, is_primary=True, auto_id=True, description="Unique identifier"),
-        
-        # vector: FloatVector, HNSW
-        FieldSchema(name="vector", dtype=DataType.FLOAT_VECTOR, dim=dim, description="Embedding vector"),
-        
-        # source_type: VarChar, Partition Key
-        FieldSchema(name="source_type", dtype=DataType.VARCHAR, max_length=64, is_partition_key=True, description="Source type (e.g., ruling, article)"),
-        
-        # text_content: VarChar
-        FieldSchema(name="text_content", dtype=DataType.VARCHAR, max_length=65535, description="The actual text content"),
-        
-        # metadata: JSON
-        FieldSchema(name="metadata", dtype=DataType.JSON, description="Additional metadata")
-    ]
-
-    schema = CollectionSchema(fields, description="Lebanese Legal Assistant Knowledge Base")
+    schema = build_schema(dim)
 
     collection = Collection(name=collection_name, schema=schema)
     log.info("Collection created.")
 
     # Index Creation
     log.info("Creating index...")
-    index_params = {
-        "metric_type": "COSINE",
-        "index_type": "HNSW",
-        "params": {"M": 16, "efConstruction": 200}
-    }
-    
-    collection.create_index(field_name="vector", index_params=index_params)
+    collection.create_index(field_name="vector", index_params=hnsw_index_params())
+    create_scalar_indexes(collection)
     log.info("Index created successfully.")
     
     # Load collection to memory
@@ -0,0 +1,91 @@
+"""
+milvus_stream.py
+----------------
+Cursor-based reads of a whole collection for the pipeline scripts.
+
+iter_batches() walks the collection with pymilvus' query_iterator (pk keyset
+under the hood) instead of expr + growing offset, so every batch costs the same
+and the offset+limit window cap never applies. Batches are yielded lazily:
+callers hold one batch at a time.
+"""
+
+import json
+import time
+import structlog
+from typing import Iterable, Iterator, List
+
+log = structlog.get_logger()
+
+BATCH_SIZE = 1000
+PK_FIELD = "pk"
+_ROW_OVERHEAD = 64  # per-row framing in the insert request
+
+
+def iter_batches(collection, output_fields: List[str], batch_size: int = BATCH_SIZE,
+                 expr: str = f"{PK_FIELD} >= 0") -> Iterator[List[dict]]:
+    collection.load()
+    iterator = collection.query_iterator(batch_size=batch_size, expr=expr, output_fields=output_fields)
+    try:
+        while True:
+            batch = iterator.next()
+            if not batch:
+                return
+            yield batch
+    finally:
+        iterator.close()
+
+
+class Throughput:
+    """Counts entities through a pipeline stage and logs entities/sec as it goes."""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.count = 0
+        self.started = time.perf_counter()
+
+    @property
+    def rate(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return round(self.count / elapsed, 1) if elapsed else 0.0
+
+    def add(self, n: int, **fields):
+        self.count += n
+        log.info(self.stage, total=self.count, entities_per_sec=self.rate, **fields)
+
+    def summary(self) -> dict:
+        return {
+            "total": self.count,
+            "seconds": round(time.perf_counter() - self.started, 2),
+            "entities_per_sec": self.rate,
+        }
+
+
+def entity_bytes(entity: dict) -> int:
+    """Approximate insert payload of one entity: float32 vector + UTF-8 text + JSON metadata."""
+    return (
+        4 * len(entity.get("vector") or ())
+        + len((entity.get("text_content") or "").encode("utf-8"))
+        + len(json.dumps(entity.get("metadata") or {}, ensure_ascii=False).encode("utf-8"))
+        + len(entity.get("source_type") or "")
+        + _ROW_OVERHEAD
+    )
+
+
+def rebatch_by_bytes(batches: Iterable[List[dict]], max_bytes: int,
+                     max_rows: int = BATCH_SIZE) -> Iterator[List[dict]]:
+    """
+    Re-chunks a stream of batches so each insert stays under max_bytes of payload
+    (and max_rows rows): rows with long texts make smaller batches, short ones
+    larger. Row order is preserved.
+    """
+    batch, size = [], 0
+    for entities in batches:
+        for entity in entities:
+            n = entity_bytes(entity)
+            if batch and (size + n > max_bytes or len(batch) >= max_rows):
+                yield batch
+                batch, size = [], 0
+            batch.append(entity)
+            size += n
+    if batch:
+        yield batch
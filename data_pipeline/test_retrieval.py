@@ -14,6 +14,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from pymilvus import connections, Collection
 from app.core.config import settings
+from app.core.embedding_store import EmbeddingStore, model_input
 from openai import OpenAI
 
 # Configure logging
@@ -82,13 +83,30 @@ SAMPLE_SCENARIOS = [
 # ──────────────────────────────────────────────
 # Synchronous Milvus search (used by both modes)
 # ──────────────────────────────────────────────
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+
+def embed_query(query: str) -> list[float]:
+    """Embedding of *query*, from the embedding store when it has been embedded before."""
+    store = EmbeddingStore.open_default()
+    try:
+        if store is not None:
+            stored = store.get_texts(EMBEDDING_MODEL, [query])
+            if query in stored:
+                return stored[query].tolist()
+        client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        vector = client.embeddings.create(input=[model_input(query)], model=EMBEDDING_MODEL).data[0].embedding
+        if store is not None:
+            store.put_texts(EMBEDDING_MODEL, {query: vector})
+        return vector
+    finally:
+        if store is not None:
+            store.close()
+
+
 def search(query: str, top_k: int = 5):
     """Embed *query* and return top-k Milvus results."""
-    client = OpenAI(api_key=settings.OPENAI_API_KEY)
-
-    query_vector = client.embeddings.create(
-        input=[query], model="text-embedding-3-small"
-    ).data[0].embedding
+    query_vector = embed_query(query)
 
     connections.connect(uri=settings.MILVUS_URI)
     collection = Collection(settings.MILVUS_COLLECTION_NAME)
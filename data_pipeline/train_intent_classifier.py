@@ -0,0 +1,98 @@
+"""
+train_intent_classifier.py
+--------------------------
+Trains the optional linear model used by LocalIntentClassifier
+(app/services/intent_classifier.py) from labelled production traffic.
+
+Input is a JSONL file, one message per line:
+    {"query": "مرحبا", "label": "greeting"}
+    {"query": "ما هي مدة الإشعار في قانون العمل؟", "label": "legal"}
+Labels are the gpt-4o-mini intent labels ("greeting", "legal", "off_topic"),
+e.g. exported from the "Intent classified" log lines or LangSmith traces.
+
+Usage:
+    python data_pipeline/train_intent_classifier.py labels.jsonl data/intent_model.npz
+Then set INTENT_MODEL_PATH=data/intent_model.npz.
+"""
+
+import sys
+import os
+import json
+import argparse
+import numpy as np
+import structlog
+import logging
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.intent_classifier import LABELS, LinearIntentModel, hashed_ngrams
+
+logging.basicConfig(level=logging.INFO)
+log = structlog.get_logger()
+
+
+def load_labelled(path: str) -> tuple[list[str], list[str]]:
+    queries, labels = [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if row.get("label") in LABELS and row.get("query"):
+                queries.append(row["query"])
+                labels.append(row["label"])
+    return queries, labels
+
+
+def train(queries: list[str], labels: list[str], n_features: int, epochs: int, lr: float, l2: float) -> LinearIntentModel:
+    X = np.stack([hashed_ngrams(q, n_features) for q in queries])
+    y = np.array([LABELS.index(l) for l in labels])
+    Y = np.eye(len(LABELS), dtype=np.float32)[y]
+
+    # Inverse-frequency class weights: legal traffic dominates the logs
+    counts = np.bincount(y, minlength=len(LABELS)).astype(np.float32)
+    class_weight = np.where(counts > 0, len(y) / (len(LABELS) * np.maximum(counts, 1)), 0.0)
+    sample_weight = class_weight[y][:, None]
+
+    W = np.zeros((len(LABELS), n_features), dtype=np.float32)
+    b = np.zeros(len(LABELS), dtype=np.float32)
+    for epoch in range(epochs):
+        logits = X @ W.T + b
+        logits -= logits.max(axis=1, keepdims=True)
+        P = np.exp(logits)
+        P /= P.sum(axis=1, keepdims=True)
+        grad = (P - Y) * sample_weight / len(y)
+        W -= lr * (grad.T @ X + l2 * W)
+        b -= lr * grad.sum(axis=0)
+        if (epoch + 1) % 100 == 0:
+            loss = -np.mean(np.log(P[np.arange(len(y)), y] + 1e-9))
+            log.info("Training", epoch=epoch + 1, loss=round(float(loss), 4))
+
+    model = LinearIntentModel(W, b, n_features)
+    accuracy = np.mean([np.argmax(model.predict_proba(q)) == t for q, t in zip(queries, y)])
+    log.info("Training accuracy", accuracy=round(float(accuracy), 4), samples=len(y), per_class=counts.tolist())
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local n-gram intent model")
+    parser.add_argument("labels", help="JSONL file with query/label rows")
+    parser.add_argument("output", help="Output .npz path (set INTENT_MODEL_PATH to it)")
+    parser.add_argument("--features", type=int, default=2 ** 14)
+    parser.add_argument("--epochs", type=int, default=500)
+    parser.add_argument("--lr", type=float, default=5.0)
+    parser.add_argument("--l2", type=float, default=1e-4)
+    args = parser.parse_args()
+
+    queries, labels = load_labelled(args.labels)
+    if not queries:
+        log.error("No labelled rows found", path=args.labels)
+        sys.exit(1)
+
+    model = train(queries, labels, args.features, args.epochs, args.lr, args.l2)
+    model.save(args.output)
+    log.info("Model saved", path=args.output)
+
+
+if __name__ == "__main__":
+    main()
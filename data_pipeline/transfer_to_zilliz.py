@@ -4,75 +4,290 @@ transfer_to_zilliz.py
 Transfers all entities from a local Milvus collection to Zilliz Cloud,
 reusing existing vectors (no re-embedding cost).
 
+Reading and writing overlap: the main thread streams entities from local Milvus
+with a query iterator and cuts them into insert batches sized by payload bytes,
+while --workers threads insert them into Zilliz. Failed inserts are retried with
+backoff; oversized batches are split in half.
+
+Progress is checkpointed to a JSON file keyed by source pk, so an interrupted
+transfer resumes where it stopped instead of starting over. Zilliz assigns new
+pks (auto_id), so the checkpoint also records batches (and inserted halves of
+split batches) that finished out of order to avoid inserting them twice on resume.
+Each copied entity carries its source pk in metadata["source_pk"]: before a
+retry, and for every batch of a resumed run, the rows already in Zilliz (an
+insert that timed out but committed) are looked up and skipped.
+
 Usage:
     python data_pipeline/transfer_to_zilliz.py \
         --zilliz-uri  https://your-endpoint.zillizcloud.com \
         --zilliz-token your_api_key
 
+    # Run again after an interruption to resume; --restart ignores the checkpoint
+    python data_pipeline/transfer_to_zilliz.py ... --workers 8 --restart
+
 The local Milvus URI and collection name are read from app.core.config (settings).
 """
 
 import sys
 import os
+import json
+import time
+import queue
 import argparse
+import threading
 import structlog
 import logging
+from typing import Callable, Iterable, Iterator, Optional
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from pymilvus import connections, Collection, utility
 from app.core.config import settings
+from app.services.response_cache import bump_collection_version
+from data_pipeline.milvus_setup import entity_columns
+from data_pipeline.milvus_stream import Throughput, iter_batches, rebatch_by_bytes
 
 logging.basicConfig(level=logging.INFO)
 log = structlog.get_logger()
 
-BATCH_SIZE = 500   # entities per query/insert batch
-PK_FIELD   = "pk"
+READ_BATCH_SIZE = 1000               # entities per query_iterator page
+MAX_BATCH_ROWS  = 1000               # entities per insert
+MAX_BATCH_BYTES = 16 * 1024 * 1024   # insert payload cap, well under the 64 MB gRPC limit
+WORKERS         = 4
+RETRIES         = 5                  # attempts per batch before giving up
+CHECKPOINT_PATH = os.path.join("data", "transfer_checkpoint.json")
+PK_FIELD        = "pk"
+OUTPUT_FIELDS   = [PK_FIELD, "text_content", "source_type", "metadata", "vector"]
+SOURCE_PK_KEY   = "source_pk"        # metadata key holding the local pk on the destination
 
+# Not a bare "exceed": gRPC's "deadline exceeded" is a timeout, whose insert may have committed
+_SIZE_ERRORS = ("larger than", "too large", "exceeds", "size exceeded", "resource_exhausted")
 
-def fetch_all_from_local(collection: Collection) -> list[dict]:
-    collection.load()
-    all_entities = []
-    offset = 0
 
-    log.info("Fetching all entities from local Milvus...")
-    while True:
-        batch = collection.query(
-            expr=f"{PK_FIELD} >= 0",
-            output_fields=[PK_FIELD, "text_content", "source_type", "metadata", "vector"],
-            limit=BATCH_SIZE,
-            offset=offset,
-        )
-        if not batch:
-            break
-        all_entities.extend(batch)
-        log.info("Fetched batch", offset=offset, batch_size=len(batch), total=len(all_entities))
-        if len(batch) < BATCH_SIZE:
-            break
-        offset += BATCH_SIZE
+class TransferCheckpoint:
+    """
+    Tracks which source pks have been written to the destination.
+
+    Batches are cut in ascending pk order and numbered; last_pk only advances
+    over a contiguous run of finished batches. Batches that finish ahead of an
+    unfinished one, and the inserted parts of a batch that was split, are kept
+    in done_ranges so a resume skips them.
+    """
+
+    def __init__(self, path: str, identity: dict, restart: bool = False):
+        self.path = path
+        self.identity = identity
+        self.last_pk: Optional[int] = None
+        self.done_ranges: list[list[int]] = []
+        self.transferred = 0
+        self.complete = False
+        self._lock = threading.Lock()
+        self._pending: dict[int, dict] = {}   # seq -> first / last pk, count, rows and ranges inserted
+        self._next_seq = 0
+        self._committed_seq = 0
+        self.resumed = False
+        if not restart and os.path.exists(path):
+            self._load()
+            self.resumed = True
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("identity") != self.identity:
+            raise ValueError(
+                f"Checkpoint {self.path} belongs to another transfer ({state.get('identity')}); "
+                "pass --restart or --checkpoint to start a new one"
+            )
+        self.last_pk = state.get("last_pk")
+        self.done_ranges = state.get("done_ranges", [])
+        self.transferred = state.get("transferred", 0)
+        self.complete = state.get("complete", False)
+        log.info("Resuming from checkpoint", path=self.path, last_pk=self.last_pk,
+                 transferred=self.transferred, ranges_ahead=len(self.done_ranges))
+
+    @property
+    def expr(self) -> str:
+        return f"{PK_FIELD} >= 0" if self.last_pk is None else f"{PK_FIELD} > {self.last_pk}"
+
+    def already_done(self, pk: int) -> bool:
+        return any(first <= pk <= last for first, last in self.done_ranges)
+
+    def register(self, batch: list[dict]) -> int:
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            self._pending[seq] = {"first": batch[0][PK_FIELD], "last": batch[-1][PK_FIELD],
+                                  "count": len(batch), "rows": 0, "parts": []}
+            return seq
+
+    def finish(self, seq: int, part: list[dict]):
+        """Records *part*, a contiguous run of batch *seq* (all of it unless the batch was split), as written."""
+        with self._lock:
+            pending = self._pending[seq]
+            pending["rows"] += len(part)
+            pending["parts"].append([part[0][PK_FIELD], part[-1][PK_FIELD]])
+            self.transferred += len(part)
+            while self._committed_seq in self._pending and self._done(self._pending[self._committed_seq]):
+                self.last_pk = self._pending.pop(self._committed_seq)["last"]
+                self._committed_seq += 1
+            ahead = []
+            for p in self._pending.values():
+                ahead.extend([[p["first"], p["last"]]] if self._done(p) else p["parts"])
+            floor = -1 if self.last_pk is None else self.last_pk
+            resumed = [r for r in self.done_ranges if r[1] > floor and r not in ahead]
+            self.done_ranges = resumed + ahead
+            self._save()
+
+    @staticmethod
+    def _done(pending: dict) -> bool:
+        return pending["rows"] >= pending["count"]
+
+    def mark_complete(self):
+        with self._lock:
+            self.complete = True
+            self.done_ranges = []
+            self._save()
+
+    def _save(self):
+        tmp = f"{self.path}.tmp"
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "identity": self.identity,
+                "last_pk": self.last_pk,
+                "done_ranges": self.done_ranges,
+                "transferred": self.transferred,
+                "complete": self.complete,
+                "updated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            }, f)
+        os.replace(tmp, self.path)
 
-    log.info("Fetch complete", total_entities=len(all_entities))
-    return all_entities
 
+def stream_from_local(collection: Collection, checkpoint: TransferCheckpoint,
+                      max_bytes: int = MAX_BATCH_BYTES) -> Iterator[list[dict]]:
+    """Insert-sized batches of the entities the checkpoint has not seen yet, in pk order."""
+    log.info("Streaming entities from local Milvus...", expr=checkpoint.expr)
+    pages = iter_batches(collection, OUTPUT_FIELDS, READ_BATCH_SIZE, expr=checkpoint.expr)
+    if checkpoint.done_ranges:
+        pages = ([e for e in page if not checkpoint.already_done(e[PK_FIELD])] for page in pages)
+    return rebatch_by_bytes(pages, max_bytes, MAX_BATCH_ROWS)
 
-def insert_to_zilliz(collection: Collection, entities: list[dict]):
-    total = len(entities)
-    inserted = 0
 
-    for i in range(0, total, BATCH_SIZE):
-        batch = entities[i : i + BATCH_SIZE]
+def _inserted_source_pks(collection: Collection, batch: list[dict]) -> set:
+    """Source pks of *batch* that are already in the destination."""
+    first, last = batch[0][PK_FIELD], batch[-1][PK_FIELD]
+    rows = collection.query(
+        expr=f'metadata["{SOURCE_PK_KEY}"] >= {first} and metadata["{SOURCE_PK_KEY}"] <= {last}',
+        output_fields=["metadata"], consistency_level="Strong",
+    )
+    return {(row.get("metadata") or {}).get(SOURCE_PK_KEY) for row in rows}
 
-        vectors = [e["vector"]       for e in batch]
-        sources = [e["source_type"]  for e in batch]
-        texts   = [e["text_content"] for e in batch]
-        metas   = [e["metadata"] or {} for e in batch]
 
-        collection.insert([vectors, sources, texts, metas])
-        inserted += len(batch)
-        log.info("Inserted batch", inserted=inserted, total=total)
+def _runs(batch: list[dict], present: set) -> Iterator[tuple]:
+    """Contiguous (rows, already_inserted) runs of *batch*."""
+    start = 0
+    for i in range(1, len(batch) + 1):
+        if i == len(batch) or (batch[i][PK_FIELD] in present) != (batch[start][PK_FIELD] in present):
+            yield batch[start:i], batch[start][PK_FIELD] in present
+            start = i
 
-    collection.flush()
-    log.info("All entities inserted and flushed to Zilliz.", total=inserted)
+
+def _insert_batch(collection: Collection, batch: list[dict], on_inserted: Callable[[list], None],
+                  verify: bool = False):
+    """
+    Inserts one batch, retrying with backoff; batches rejected as too large are split
+    in half. on_inserted is called with each contiguous run once it is in the
+    destination. Rows a failed attempt may have committed (and, with *verify*, rows
+    an earlier run inserted) are looked up by source pk first and not inserted again.
+    """
+    for attempt in range(1, RETRIES + 1):
+        try:
+            present = _inserted_source_pks(collection, batch) if verify or attempt > 1 else set()
+            if present:
+                log.info("Skipping rows already in the destination", first_pk=batch[0][PK_FIELD],
+                         rows=len(batch), present=len(present))
+                for run, inserted in _runs(batch, present):
+                    if inserted:
+                        on_inserted(run)
+                    else:
+                        _insert_batch(collection, run, on_inserted)
+                return
+            collection.insert(entity_columns(
+                collection,
+                [e["vector"]          for e in batch],
+                [e["source_type"]     for e in batch],
+                [e["text_content"]    for e in batch],
+                [{**(e["metadata"] or {}), SOURCE_PK_KEY: e[PK_FIELD]} for e in batch],
+            ))
+            on_inserted(batch)
+            return
+        except Exception as e:
+            if len(batch) > 1 and any(s in str(e).lower() for s in _SIZE_ERRORS):
+                # Rejected before anything was written, so neither half needs a lookup
+                log.warning("Batch rejected as too large, splitting", rows=len(batch), error=str(e))
+                half = len(batch) // 2
+                _insert_batch(collection, batch[:half], on_inserted)
+                _insert_batch(collection, batch[half:], on_inserted)
+                return
+            if attempt == RETRIES:
+                raise
+            delay = 2 ** (attempt - 1)
+            log.warning("Insert failed, retrying", attempt=attempt, retry_in=delay,
+                        first_pk=batch[0][PK_FIELD], error=str(e))
+            time.sleep(delay)
+
+
+def insert_to_zilliz(collection: Collection, batches: Iterable[list[dict]],
+                     checkpoint: TransferCheckpoint, workers: int = WORKERS) -> int:
+    """Feeds batches to `workers` insert threads through a bounded queue; returns entities inserted."""
+    meter = Throughput("Inserted batch")
+    meter_lock = threading.Lock()
+    work: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=workers * 2)
+    failed = threading.Event()
+    errors: list[Exception] = []
+
+    def worker():
+        while True:
+            item = work.get()
+            if item is None:
+                return
+            if failed.is_set():
+                continue  # drain so the producer never blocks on a full queue
+            seq, batch = item
+
+            def inserted(part, seq=seq):
+                checkpoint.finish(seq, part)
+                with meter_lock:
+                    meter.add(len(part), queued=work.qsize())
+
+            try:
+                _insert_batch(collection, batch, inserted, verify=checkpoint.resumed)
+            except Exception as e:
+                errors.append(e)
+                failed.set()
+                log.error("Batch failed after retries; stopping", first_pk=batch[0][PK_FIELD],
+                          rows=len(batch), error=str(e))
+
+    threads = [threading.Thread(target=worker, name=f"transfer-insert-{i}", daemon=True) for i in range(workers)]
+    for t in threads:
+        t.start()
+    try:
+        for batch in batches:
+            if failed.is_set():
+                break
+            work.put((checkpoint.register(batch), batch))
+    finally:
+        for _ in threads:
+            work.put(None)
+        for t in threads:
+            t.join()
+
+    if meter.count:
+        collection.flush()
+    if errors:
+        raise RuntimeError(f"Transfer stopped after a failed batch; rerun to resume from {checkpoint.path}") from errors[0]
+    log.info("All entities inserted and flushed to Zilliz.", **meter.summary())
+    return meter.count
 
 
 def main():
@@ -81,6 +296,10 @@ def main():
     parser.add_argument("--zilliz-token", required=True, help="Zilliz Cloud API key")
     parser.add_argument("--collection",   default=settings.MILVUS_COLLECTION_NAME,
                         help=f"Collection name (default: {settings.MILVUS_COLLECTION_NAME})")
+    parser.add_argument("--workers",      type=int, default=WORKERS, help="Concurrent insert workers")
+    parser.add_argument("--batch-bytes",  type=int, default=MAX_BATCH_BYTES, help="Max payload bytes per insert")
+    parser.add_argument("--checkpoint",   default=CHECKPOINT_PATH, help="Resume file")
+    parser.add_argument("--restart",      action="store_true", help="Ignore an existing checkpoint")
     args = parser.parse_args()
 
     collection_name = args.collection
@@ -94,6 +313,20 @@ def main():
         )
         sys.exit(1)
 
+    try:
+        checkpoint = TransferCheckpoint(
+            args.checkpoint,
+            {"source": local_uri, "destination": args.zilliz_uri, "collection": collection_name},
+            restart=args.restart,
+        )
+    except ValueError as e:
+        log.error(str(e))
+        sys.exit(1)
+    if checkpoint.complete:
+        log.info("Checkpoint says this transfer already completed; pass --restart to run it again.",
+                 transferred=checkpoint.transferred)
+        return
+
     log.info("Connecting to local Milvus...", uri=local_uri)
     connections.connect(alias="local", uri=local_uri)
 
@@ -102,9 +335,7 @@ def main():
         sys.exit(1)
 
     local_col = Collection(collection_name, using="local")
-    entities  = fetch_all_from_local(local_col)
-
-    if not entities:
+    if local_col.num_entities == 0:
         log.warning("No entities found in local collection. Nothing to transfer.")
         return
 
@@ -123,8 +354,15 @@ def main():
     zilliz_col = Collection(collection_name, using="zilliz")
 
     # ── Transfer ─────────────────────────────────────────────────────────────
-    insert_to_zilliz(zilliz_col, entities)
-    log.info("Transfer complete.")
+    try:
+        insert_to_zilliz(zilliz_col, stream_from_local(local_col, checkpoint, args.batch_bytes),
+                         checkpoint, args.workers)
+    except RuntimeError as e:
+        log.error(str(e))
+        sys.exit(1)
+    checkpoint.mark_complete()
+    bump_collection_version(collection_name)
+    log.info("Transfer complete.", transferred=checkpoint.transferred)
 
 
 if __name__ == "__main__":
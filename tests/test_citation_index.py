@@ -0,0 +1,41 @@
+from app.services.citation_index import CitationIndex
+
+CIVIL = "قانون أصول المحاكمات المدنية"
+DOCS = [
+    {"id": 1, "text": "المادة 24 من أصول المحاكمات", "source": "article",
+     "metadata": {"law_name": CIVIL, "article_number": 24}},
+    {"id": 2, "text": "المادة 24 من قانون العقوبات", "source": "article",
+     "metadata": {"law_name": "قانون العقوبات", "article_number": 24}},
+    {"id": 3, "text": "رد مجلس شورى الدولة طلب الشطب", "source": "ruling",
+     "metadata": {"Ruling_Number": 171, "Year": 2021, "Court": "شورى"}},
+    {"id": 4, "text": "تابع القرار", "source": "ruling",
+     "metadata": {"Ruling_Number": 171, "Year": 2021, "Court": "شورى"}},
+    {"id": 5, "text": "قرار آخر بالرقم نفسه", "source": "ruling",
+     "metadata": {"Ruling_Number": 171, "Year": 2021, "Court": "تمييز جزائي"}},
+    {"id": 6, "text": "نص بلا بيانات", "source": "article", "metadata": {}},
+]
+
+
+def ids(hits):
+    return [h["id"] for h in hits]
+
+
+def test_article_lookup_narrows_by_law_name(tmp_path):
+    path = str(tmp_path / "citations.json")
+    CitationIndex.build(DOCS).save(path)
+    index = CitationIndex.load(path)
+    assert len(index) == 5
+    assert ids(index.lookup("ما هو نص المادة ٢٤ من قانون اصول المحاكمات المدنية؟")) == [1]
+    assert ids(index.lookup("المادة 24 عقوبات")) == [2]
+    assert ids(index.lookup("المادة 24")) == [1, 2]  # no law named: every law with an article 24
+    assert index.lookup("المادة 99") == []
+    assert index.lookup("ما هي شروط دعوى الحيازة") == []
+
+
+def test_ruling_lookup_returns_every_chunk_of_the_named_court():
+    index = CitationIndex.build(DOCS)
+    assert ids(index.lookup("القرار رقم 171 لعام 2021 الصادر عن مجلس شورى الدولة")) == [3, 4]
+    assert ids(index.lookup("القرار رقم 171/2021 لمحكمة التمييز الجزائية")) == [5]
+    assert ids(index.lookup("قرار 171/2021")) == [3, 4, 5]
+    assert index.lookup("قرار 171/2021", limit=1) == []  # ambiguous: left to vector search
+    assert index.lookup("قرار 171 لعام 2020") == []
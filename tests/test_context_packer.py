@@ -0,0 +1,50 @@
+import os
+
+os.environ.setdefault("SERVICE_API_KEY", "test-key")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from app.core.tokens import count_tokens
+from app.models.schemas import ChatMessage
+from app.services.context_packer import ContextPacker, best_window, render_metadata
+
+FILLER = " ".join(f"جملة عامة رقم {i} لا علاقة لها بالسؤال." for i in range(300))
+TARGET = "يحق للمستأجر تجديد عقد الإيجار بعد انتهاء مدته."
+LONG = f"{FILLER} {TARGET} {FILLER}"
+
+
+def hit(id, text, source="article", metadata=None):
+    return {"id": id, "score": 1.0, "text": text, "source": source, "metadata": metadata or {}}
+
+
+def test_long_documents_are_cut_to_the_query_window():
+    window, trimmed = best_window(LONG, {"مستاجر", "تجديد", "ايجار"}, 120)
+    assert trimmed and TARGET in window
+    assert window.startswith("… ") and window.endswith(" …")
+    assert count_tokens(window) <= 124
+    assert best_window(TARGET, {"تجديد"}, 120) == (TARGET, False)
+
+
+def test_pack_drops_near_duplicates_respects_the_budget_and_reports_savings():
+    ruling = {"Ruling_Number": 171, "Year": 2021, "Court": "شورى", "Keywords": ["إيجار"], "President": ""}
+    assert render_metadata(ruling) == "Ruling_Number: 171 | Year: 2021 | Court: شورى"
+    hits = [
+        hit(1, LONG, metadata={"law_name": "قانون الإيجارات", "article_number": 10}),
+        hit(2, LONG.replace("رقم 5 ", "رقم 6 ")),  # same chunk ingested twice
+        hit(3, TARGET, source="ruling", metadata=ruling),
+    ] + [hit(10 + i, " ".join(f"فقرة {i}{j} من مستند مستقل." for j in range(200))) for i in range(10)]
+    packer = ContextPacker(prompt_budget=8000, min_context_tokens=100, doc_max_tokens=200)
+    context, packed, stats = packer.pack("تجديد عقد الإيجار للمستأجر", hits, budget=600)
+
+    assert [h["id"] for h in packed[:2]] == [1, 3] and stats["duplicates"] == 1
+    assert stats["context_tokens"] <= 600 and stats["packed"] < len(hits)
+    assert stats["tokens_saved"] == stats["baseline_tokens"] - stats["context_tokens"] > 0
+    assert "[Document 2] ruling\nMetadata: Ruling_Number: 171" in context and "{" not in context
+    assert packer.stats()["tokens_saved"] == stats["tokens_saved"]
+
+
+def test_oldest_history_turns_make_room_for_the_context():
+    history = [ChatMessage(role="user", content=FILLER[:3000]) for _ in range(4)]
+    packer = ContextPacker(prompt_budget=3000, min_context_tokens=1000)
+    kept = packer.fit_history(history, ["system prompt", "query"])
+    assert 0 < len(kept) < len(history) and kept == history[-len(kept):]
+    assert packer.context_budget(["system prompt", "query"] + [m.content for m in kept]) >= 1000
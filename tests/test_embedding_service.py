@@ -0,0 +1,88 @@
+import os
+import asyncio
+import numpy as np
+from types import SimpleNamespace
+
+os.environ.setdefault("SERVICE_API_KEY", "test-key")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from app.core.config import settings
+from app.core.embedding_store import EmbeddingStore
+from app.core.vector_codec import encode_vector
+from app.services.embedding_service import EmbeddingL1Cache, EmbeddingService
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.inputs = []
+
+    async def create(self, input, model):
+        self.inputs.extend(input)
+        await asyncio.sleep(0.01)
+        return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=[float(len(t)), 1.0]) for i, t in enumerate(input)])
+
+
+class DownRedis:
+    async def mget(self, keys):
+        raise ConnectionError("redis is down")
+
+
+def test_l1_evicts_least_recently_used_by_bytes():
+    vector = np.zeros(256, dtype=np.float32)  # 1 KB
+    cache = EmbeddingL1Cache(max_bytes=2500)
+    cache.put("a", vector)
+    cache.put("b", vector)
+    cache.get("a")
+    cache.put("c", vector)
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.get("b") is None
+    assert cache.nbytes <= 2500
+
+
+def test_single_flight_and_l1_without_redis(tmp_path):
+    embeddings = FakeEmbeddings()
+    service = EmbeddingService(client=SimpleNamespace(embeddings=embeddings), redis_client=DownRedis(),
+                               store=EmbeddingStore(str(tmp_path / "store.sqlite")))
+
+    async def run():
+        first, second = await asyncio.gather(service.get_embeddings(["a", "bb"]), service.get_embeddings(["bb"]))
+        again = await service.get_embeddings(["bb"])
+        return first, second, again
+
+    first, second, again = asyncio.run(run())
+    assert embeddings.inputs == ["a", "bb"]
+    assert np.array_equal(second[0], first[1]) and np.array_equal(again[0], first[1])
+    stats = service.stats()
+    assert stats["single_flight_joins"] == 1 and stats["l1"]["hits"] == 1
+    assert stats["redis"]["errors"] == 1
+
+
+def test_store_serves_a_fresh_process_without_openai(tmp_path):
+    path = str(tmp_path / "store.sqlite")
+    first = EmbeddingService(client=SimpleNamespace(embeddings=FakeEmbeddings()), redis_client=DownRedis(),
+                             store=EmbeddingStore(path))
+    expected = asyncio.run(first.get_embeddings(["line one\nline two", "x"]))
+    first.close()
+
+    embeddings = FakeEmbeddings()
+    second = EmbeddingService(client=SimpleNamespace(embeddings=embeddings), redis_client=DownRedis(),
+                              store=EmbeddingStore(path))
+    vectors = asyncio.run(second.get_embeddings(["line one\nline two", "x"]))
+    assert embeddings.inputs == []
+    assert all(np.array_equal(a, b) for a, b in zip(vectors, expected))
+    assert second.stats()["store"]["hits"] == 2
+
+
+def test_store_keeps_float32_whatever_the_redis_dtype(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_DTYPE", "int8")
+    monkeypatch.setattr(settings, "EMBEDDING_STORE_PATH", str(tmp_path / "store.sqlite"))
+    store = EmbeddingStore.open_default()
+    vector = np.array([0.123456, -0.5, 0.75], dtype=np.float32)
+    store.put_many("m", [("a", vector)])
+    assert np.array_equal(store.get_many("m", ["a"])["a"], vector)
+
+    # A quantized row from an older version is a miss and gets replaced
+    store.db.execute("INSERT INTO embeddings VALUES ('m', 'b', ?, 0)", (encode_vector(vector, "int8"),))
+    assert store.get_many("m", ["b"]) == {}
+    store.put_many("m", [("b", vector)])
+    assert np.array_equal(store.get_many("m", ["b"])["b"], vector)
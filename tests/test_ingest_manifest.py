@@ -0,0 +1,112 @@
+import asyncio
+from types import SimpleNamespace as NS
+
+import data_pipeline.ingest_data as ingest
+from data_pipeline.ingest_manifest import IngestManifest
+from data_pipeline.milvus_stream import Throughput
+
+
+def _row(text, meta=None, source="article"):
+    return {"source_type": source, "text_content": text, "metadata": meta or {}}
+
+
+def _ingest(manifest, source_file, rows, next_pk):
+    new, changed, unchanged = manifest.classify(source_file, rows)
+    for i, e in enumerate(new + changed):
+        e["pk"] = next_pk + i
+    manifest.record(source_file, new + changed)
+    manifest.replaced([e["old_pk"] for e in changed])
+    return new, changed, unchanged, manifest.stale(source_file)
+
+
+def test_reruns_skip_unchanged_rows_and_track_changes(tmp_path):
+    path, identity = str(tmp_path / "m.sqlite"), {"collection": "c"}
+
+    manifest = IngestManifest(path, identity)
+    new, changed, unchanged, stale = _ingest(manifest, "a.xlsx", [_row("A"), _row("B"), _row("B")], 1)
+    assert [e["text_content"] for e in new] == ["A", "B"] and not changed and not stale
+    manifest.close()
+
+    manifest = IngestManifest(path, identity)
+    new, changed, unchanged, stale = _ingest(manifest, "a.xlsx", [_row("A"), _row("B")], 10)
+    assert (new, changed, unchanged, stale) == ([], [], 2, [])
+    manifest.close()
+
+    manifest = IngestManifest(path, identity)
+    new, changed, unchanged, stale = _ingest(manifest, "a.xlsx", [_row("A", {"n": 1}), _row("C")], 20)
+    assert [e["text_content"] for e in new] == ["C"]
+    assert [(e["text_content"], e["old_pk"]) for e in changed] == [("A", 1)]
+    assert stale == [2]  # B is gone
+    manifest.close()
+
+
+def test_adopted_entities_are_claimed_and_duplicates_reported(tmp_path):
+    manifest = IngestManifest(str(tmp_path / "m.sqlite"), {"collection": "c"})
+    existing = [{"pk": 7, **_row("A")}, {"pk": 8, **_row("A")}, {"pk": 9, **_row("Z")}]
+    assert manifest.adopt([existing]) == [8]
+
+    new, changed, unchanged, stale = _ingest(manifest, "a.xlsx", [_row("A")], 100)
+    assert (new, changed, unchanged, stale) == ([], [], 1, [])
+    assert manifest.files() == ["a.xlsx"]
+
+
+def test_batches_inserted_before_a_failure_are_recorded(tmp_path, monkeypatch):
+    class FlakyCollection:
+        schema = NS(fields=[])
+
+        def __init__(self):
+            self.next_pk, self.deleted = 100, []
+
+        def insert(self, columns):
+            if self.next_pk >= 102:
+                raise ConnectionError("milvus down")
+            pks = list(range(self.next_pk, self.next_pk + len(columns[0])))
+            self.next_pk += len(pks)
+            return NS(primary_keys=pks)
+
+        def delete(self, expr):
+            self.deleted.append(expr)
+
+    monkeypatch.setattr(ingest, "MAX_INSERT_ROWS", 2)
+    manifest = IngestManifest(str(tmp_path / "m.sqlite"), {"collection": "c"})
+    rows = [_row(t) for t in "ABCD"]
+    new, _, _ = manifest.classify("a.xlsx", rows)
+    for e in new:
+        e["vector"] = [0.0]
+    try:
+        asyncio.run(ingest.insert_entities(FlakyCollection(), new, Throughput("t"), manifest, "a.xlsx"))
+    except ConnectionError:
+        pass
+
+    # The next run skips A and B (inserted) and retries only C and D
+    manifest = IngestManifest(str(tmp_path / "m.sqlite"), {"collection": "c"})
+    new, changed, unchanged = manifest.classify("a.xlsx", [_row(t) for t in "ABCD"])
+    assert unchanged == 2 and [e["text_content"] for e in new] == ["C", "D"] and not changed
+
+
+def test_replaced_entity_is_kept_until_its_delete_succeeds(tmp_path):
+    class NoDeletes:
+        schema = NS(fields=[])
+
+        def insert(self, columns):
+            return NS(primary_keys=[200])
+
+        def delete(self, expr):
+            raise ConnectionError("milvus down")
+
+    path, identity = str(tmp_path / "m.sqlite"), {"collection": "c"}
+    _ingest(IngestManifest(path, identity), "a.xlsx", [_row("A", {"v": 1})], 1)
+
+    manifest = IngestManifest(path, identity)
+    _, changed, _ = manifest.classify("a.xlsx", [_row("A", {"v": 2})])
+    changed[0]["vector"] = [0.0]
+    try:
+        asyncio.run(ingest.insert_entities(NoDeletes(), changed, Throughput("t"), manifest, "a.xlsx"))
+    except ConnectionError:
+        pass
+
+    # The old entity (pk 1) is still known, so the next run prunes it
+    manifest = IngestManifest(path, identity)
+    new, changed, unchanged = manifest.classify("a.xlsx", [_row("A", {"v": 2})])
+    assert (new, changed, unchanged) == ([], [], 1)
+    assert manifest.stale("a.xlsx") == [1]
@@ -0,0 +1,39 @@
+import os
+
+os.environ.setdefault("SERVICE_API_KEY", "test-key")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from app.models.schemas import ChatMessage
+from app.services.intent_classifier import LocalIntentClassifier
+
+
+def test_greetings_short_circuit_in_all_languages():
+    clf = LocalIntentClassifier(threshold=0.9)
+    for message in ("مرحبا", "شكراً!", "السلام عليكم", "hello there", "Bonjour", "marhaba kifak"):
+        assert clf.classify(message) == "greeting", message
+
+
+def test_greeting_with_legal_question_is_legal():
+    clf = LocalIntentClassifier(threshold=0.9)
+    assert clf.classify("مرحبا، ما هي حقوق المستأجر في عقد الإيجار؟") == "legal"
+
+
+def test_ambiguous_follow_up_defers_to_llm():
+    clf = LocalIntentClassifier(threshold=0.9)
+    assert clf.classify("أخبرني أكثر") is None
+    assert clf.stats()["deferred_to_llm"] == 1
+
+
+def test_off_topic_only_without_history():
+    clf = LocalIntentClassifier(threshold=0.9)
+    assert clf.classify("ما هو الطقس والمطر اليوم؟") == "off_topic"
+    history = [ChatMessage(role="user", content="عقد إيجار")]
+    assert clf.classify("ما هو الطقس والمطر اليوم؟", history) is None
+
+
+def test_single_off_topic_word_defers_to_llm():
+    clf = LocalIntentClassifier(threshold=0.9)
+    assert clf.predict("ما هو الطقس اليوم؟") == ("off_topic", 0.6)
+    for message in ("قدم زوجي بلاغا ضدي", "هل يحق لي نشر فيلم صورته لجاري",
+                    "my neighbor football broke my window, who pays?", "وصفه الطبيب بالمهمل أمام الناس"):
+        assert clf.classify(message) is None, message
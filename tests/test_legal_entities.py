@@ -0,0 +1,29 @@
+from app.services.legal_entities import QueryEntityParser, filter_expr, scalar_fields
+from app.services.local_vector_index import compile_filter
+
+CIVIL = "قانون أصول المحاكمات المدنية"
+parser = QueryEntityParser(laws=[CIVIL, "قانون العقوبات"], courts=["شورى", "تمييز جزائي", "استئناف جزائي"])
+
+
+def test_query_entities_become_typed_or_json_prefilters():
+    entities = parser.parse("ما هو نص المادة ٢٤ من قانون اصول المحاكمات المدنية؟")
+    assert entities == {"law_name": [CIVIL], "article_number": [24]}
+    assert filter_expr(entities) == f'law_name == "{CIVIL}" and article_number == 24'
+    assert filter_expr(entities, typed=False) == \
+        f'metadata["law_name"] == "{CIVIL}" and metadata["article_number"] == 24'
+    assert filter_expr(parser.parse("المادة 24 والمادة 25")) == "article_number in [24, 25]"
+
+    assert filter_expr(parser.parse("القرار رقم 171/2021 لمحكمة التمييز الجزائية")) == \
+        'court == "تمييز جزائي" and year == 2021 and ruling_number == 171'
+    assert filter_expr(parser.parse("قرارات مجلس شورى الدولة لعام ٢٠١٩")) == 'court == "شورى" and year == 2019'
+    assert filter_expr(parser.parse("ما هي عقوبة السرقة في قانون العقوبات")) == 'law_name == "قانون العقوبات"'
+    assert parser.parse("ما هي شروط دعوى الحيازة عام 2020") == {}  # a year alone is not a citation
+
+
+def test_typed_fields_derive_from_metadata_in_the_local_index():
+    ruling = {"metadata": {"Ruling_Number": "١٧١", "Year": "2021", "Court": " تمييز جزائي "}}
+    assert scalar_fields(ruling["metadata"]) == {
+        "law_name": None, "article_number": None, "court": "تمييز جزائي", "year": 2021, "ruling_number": 171}
+    match = compile_filter(filter_expr(parser.parse("قرار رقم 171 لعام 2021 تمييز جزائي")))
+    assert match(ruling)
+    assert not match({"metadata": {"Ruling_Number": 171, "Year": 2020, "Court": "تمييز جزائي"}})
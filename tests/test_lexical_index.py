@@ -0,0 +1,46 @@
+import os
+import time
+import asyncio
+
+from app.core import reload
+from app.services.lexical_index import BM25Index, LexicalRetriever, reciprocal_rank_fusion
+
+DOCS = [
+    {"id": 11, "text": "يعاقب بالحبس كل من أقدم على إصدار شيك بدون رصيد", "source": "article", "metadata": {}},
+    {"id": 12, "text": "صدر المرسوم رقم 17386 المتعلق بتنظيم المحاكم الشرعية", "source": "article", "metadata": {}},
+    {"id": 13, "text": "للمستأجر الحق في تجديد عقد الإيجار", "source": "article", "metadata": {}},
+]
+
+
+def test_search_folds_arabic_variants_and_digits(tmp_path):
+    index = BM25Index.build(DOCS)
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    index = BM25Index.load(path)
+    assert index.search("المرسوم ١٧٣٨٦", limit=2)[0]["id"] == 12
+    assert index.search("اصدار الشيك", limit=2)[0]["id"] == 11
+    assert index.search("عقد الايجار للمستاجر", limit=2)[0]["id"] == 13
+    assert index.search("طقس", limit=2) == []
+
+
+def test_rrf_rewards_documents_found_by_both_retrievers():
+    dense = [{"id": 1}, {"id": 2}, {"id": 3}]
+    lexical = [{"id": 3}, {"id": 4}]
+    assert [h["id"] for h in reciprocal_rank_fusion([dense, lexical], limit=2)] == [3, 1]
+
+
+def test_rebuilt_index_loads_in_the_background(tmp_path, monkeypatch):
+    path = str(tmp_path / "index.npz")
+    BM25Index.build(DOCS[:1]).save(path)
+    retriever = LexicalRetriever(path)
+    BM25Index.build(DOCS).save(path)
+    os.utime(path, (time.time() + 5, time.time() + 5))
+    monkeypatch.setattr(reload, "RELOAD_CHECK_INTERVAL", 0.0)
+
+    async def run():
+        during = retriever.search("عقد الايجار للمستاجر", limit=2)  # served by the old index
+        await retriever._reload_task
+        return during, retriever.search("عقد الايجار للمستاجر", limit=2)
+
+    during, after = asyncio.run(run())
+    assert during == [] and after[0]["id"] == 13
@@ -0,0 +1,51 @@
+import os
+import asyncio
+from types import SimpleNamespace as NS
+
+os.environ.setdefault("SERVICE_API_KEY", "test-key")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from app.services.llm_service import LLMService
+
+
+def usage(prompt, cached, completion):
+    return NS(prompt_tokens=prompt, completion_tokens=completion,
+              prompt_tokens_details=NS(cached_tokens=cached))
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if not kwargs.get("stream"):
+            return NS(choices=[NS(message=NS(content="answer"))], usage=usage(2000, 1792, 50))
+
+        async def chunks():
+            yield NS(choices=[NS(delta=NS(content="ans"))], usage=None)
+            yield NS(choices=[NS(delta=NS(content="wer"))], usage=None)
+            yield NS(choices=[], usage=usage(2000, 0, 40))
+        return chunks()
+
+
+def test_generations_record_prompt_cache_usage():
+    completions = FakeCompletions()
+    llm = LLMService(client=NS(chat=NS(completions=completions)))
+    messages = [{"role": "system", "content": "static"}, {"role": "user", "content": "q"}]
+
+    first = {}
+    assert asyncio.run(llm.generate_response(messages, usage=first)) == "answer"
+    assert first == {"prompt_tokens": 2000, "cached_tokens": 1792, "completion_tokens": 50}
+
+    async def stream():
+        second = {}
+        text = "".join([c async for c in llm.stream_response(messages, usage=second)])
+        return text, second
+    text, second = asyncio.run(stream())
+    assert text == "answer" and second["cached_tokens"] == 0
+    assert completions.calls[1]["stream_options"] == {"include_usage": True}
+
+    stats = llm.stats()
+    assert stats["generations"] == 2 and stats["prefix_cache_hits"] == 1
+    assert stats["cached_ratio"] == round(1792 / 4000, 4)
@@ -0,0 +1,48 @@
+import os
+import asyncio
+import numpy as np
+
+os.environ.setdefault("SERVICE_API_KEY", "test-key")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from app.core.snapshot import write_snapshot
+from app.services.local_vector_index import LocalVectorIndex, compile_filter
+from app.services.vector_store_service import VectorStoreService
+
+
+def _snapshot(tmp_path, n=300, dim=32):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    docs = [{"text": f"doc {i}", "source": "article" if i % 2 else "ruling", "metadata": {"article_number": i % 10}}
+            for i in range(n)]
+    path = str(tmp_path / "snapshot")
+    write_snapshot(path, np.arange(n) + 100, vectors, docs)
+    return path, vectors
+
+
+def test_search_modes_agree_on_nearest_neighbour(tmp_path):
+    path, vectors = _snapshot(tmp_path)
+    query = vectors[42] + 0.05
+    exact = LocalVectorIndex.load(path, dtype="float32", nlist=0)
+    assert exact.search(query, limit=1)[0]["id"] == 142
+    for index in (LocalVectorIndex.load(path, dtype="int8", nlist=0),
+                  LocalVectorIndex.load(path, dtype="float32", nlist=8, nprobe=8)):
+        assert [h["id"] for h in index.search(query, limit=5)] == [h["id"] for h in exact.search(query, limit=5)]
+
+
+def test_filters_follow_milvus_expression_subset(tmp_path):
+    path, vectors = _snapshot(tmp_path)
+    index = LocalVectorIndex.load(path, dtype="float32", nlist=0)
+    hits = index.search(vectors[3], limit=50, expr='metadata["article_number"] == 3 and source_type == "article"')
+    assert hits and all(h["metadata"]["article_number"] == 3 and h["source"] == "article" for h in hits)
+    assert compile_filter('source_type in ["ruling"]')({"source": "ruling"})
+    assert index.search(vectors[3], limit=5, expr="text_content like 'x%'") == []
+
+
+def test_vector_store_serves_from_local_backend_without_milvus(tmp_path):
+    path, vectors = _snapshot(tmp_path)
+    store = VectorStoreService()
+    store.backend = "local"
+    store.local_index = LocalVectorIndex.load(path, dtype="float32", nlist=0)
+    hits = asyncio.run(store.search(vectors[7], limit=3))
+    assert hits[0]["id"] == 107 and set(hits[0]) == {"id", "score", "text", "source", "metadata"}
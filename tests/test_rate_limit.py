@@ -0,0 +1,31 @@
+import time
+import asyncio
+
+from app.core.rate_limit import AsyncTokenBucket
+
+
+def test_bucket_allows_a_burst_then_paces_to_the_rate():
+    async def run():
+        bucket = AsyncTokenBucket(rate_per_minute=1200, burst_seconds=0.25)  # 20/s, burst of 5
+        start = time.monotonic()
+        for _ in range(5):
+            await bucket.acquire()
+        burst = time.monotonic() - start
+        for _ in range(4):
+            await bucket.acquire()
+        return burst, time.monotonic() - start
+
+    burst, total = asyncio.run(run())
+    assert burst < 0.05
+    assert 0.15 <= total < 0.5
+
+
+def test_oversized_acquire_goes_into_debt():
+    async def run():
+        bucket = AsyncTokenBucket(rate_per_minute=6000, burst_seconds=0.1)  # 100/s, burst of 10
+        await bucket.acquire(30)  # larger than the bucket: allowed, leaves a debt of 20
+        start = time.monotonic()
+        await bucket.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 0.19
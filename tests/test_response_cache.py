@@ -0,0 +1,62 @@
+import os
+import asyncio
+
+os.environ.setdefault("SERVICE_API_KEY", "test-key")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from app.models.schemas import ChatMessage, SourceDocument
+from app.services.response_cache import ResponseCache, replay_stream
+
+SOURCES = [SourceDocument(id=1, score=0.9, text="نص المادة", source_type="article", metadata={})]
+
+
+def test_exact_hit_ignores_whitespace_diacritics_and_punctuation():
+    cache = ResponseCache()
+    cache.put("ما هي المادة 24؟", [], "answer", SOURCES)
+    assert asyncio.run(cache.get_exact("  ما هيَ   المادة 24 ", [])) == ("answer", SOURCES)
+
+
+def test_exact_miss_on_different_history():
+    cache = ResponseCache()
+    cache.put("tell me more", [ChatMessage(role="user", content="lease law")], "answer", SOURCES)
+    assert asyncio.run(cache.get_exact("tell me more", [ChatMessage(role="user", content="labor law")])) is None
+
+
+def test_semantic_hit_requires_threshold_and_same_numbers():
+    cache = ResponseCache()
+    cache.threshold = 0.95
+    cache.put("what does article 24 say", [], "answer", SOURCES, vector=[1.0, 0.0])
+    assert cache.get_semantic("what is in article 24", [], [0.99, 0.05]) == ("answer", SOURCES)
+    assert cache.get_semantic("what is in article 25", [], [0.99, 0.05]) is None
+    assert cache.get_semantic("what is in article 24", [], [0.0, 1.0]) is None
+
+
+def test_every_request_counts_one_lookup():
+    cache = ResponseCache()
+    cache.put("what does article 24 say", [], "answer", SOURCES, vector=[1.0, 0.0])
+    # A greeting or citation-answered request: exact tier only
+    assert asyncio.run(cache.get_exact("hello", [])) is None
+    # Exact miss, semantic hit
+    assert asyncio.run(cache.get_exact("what is in article 24", [])) is None
+    assert cache.get_semantic("what is in article 24", [], [0.99, 0.05]) == ("answer", SOURCES)
+    assert asyncio.run(cache.get_exact("what does article 24 say", [])) == ("answer", SOURCES)
+    stats = cache.stats()
+    assert (stats["exact_hits"], stats["semantic_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["hit_rate"] == round(2 / 3, 4)
+
+
+def test_lru_eviction_and_clear():
+    cache = ResponseCache()
+    cache.max_entries = 2
+    for q in ("a", "b", "c"):
+        cache.put(q, [], q, SOURCES)
+    assert asyncio.run(cache.get_exact("a", [])) is None
+    assert asyncio.run(cache.get_exact("c", [])) == ("c", SOURCES)
+    cache.clear()
+    assert asyncio.run(cache.get_exact("c", [])) is None
+
+
+def test_replay_stream_matches_sse_events():
+    events = list(replay_stream("x" * 450, SOURCES))
+    assert events[0]["type"] == "sources"
+    assert "".join(e["content"] for e in events[1:]) == "x" * 450
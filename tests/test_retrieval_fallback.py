@@ -0,0 +1,45 @@
+import os
+import asyncio
+from types import SimpleNamespace as NS
+
+os.environ.setdefault("SERVICE_API_KEY", "test-key")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from app.core.config import settings
+from app.services.lexical_index import BM25Index
+from app.services.rag_service import RAGService
+
+
+class FailingVectorStore:
+    typed_filters = False
+
+    def __init__(self):
+        self.calls = 0
+
+    async def search(self, vector, limit=5, expr=None):
+        self.calls += 1
+        raise ConnectionError("milvus unavailable")
+
+    async def search_sources(self, vector, sources, limit=5, expr=None):
+        return await self.search(vector, limit, expr)
+
+
+def test_filtered_search_failure_serves_lexical_results(tmp_path, monkeypatch):
+    # Keep the default sub-services away from the data/ files of the working tree
+    monkeypatch.setattr(settings, "EMBEDDING_STORE_PATH", str(tmp_path / "store.sqlite"))
+    monkeypatch.setattr(settings, "CITATION_INDEX_PATH", str(tmp_path / "citations.json"))
+    monkeypatch.setattr(settings, "INTENT_MODEL_PATH", "")
+    path = str(tmp_path / "lexical.npz")
+    monkeypatch.setattr(settings, "LEXICAL_INDEX_PATH", path)
+    BM25Index.build([
+        {"id": 1, "text": "المادة 24 من قانون العقوبات: يعاقب على السرقة", "source": "article", "metadata": {}},
+        {"id": 2, "text": "قرار في عقد الإيجار", "source": "ruling", "metadata": {}},
+    ]).save(path)
+    store = FailingVectorStore()
+    rag = RAGService(openai_client=NS(), vector_store=store)
+
+    query = "ما نص المادة 24 من قانون العقوبات"
+    assert rag._build_filter(rag._parse_entities(query))
+    hits = asyncio.run(rag._retrieve(query, query, vector=[0.0] * 4))
+    assert [h["id"] for h in hits] == [1]
+    assert store.calls == 2  # the filtered search, then the hybrid one
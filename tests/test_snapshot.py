@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from app.core.snapshot import SnapshotWriter, open_vectors, read_docs, read_ids, verify_snapshot
+
+
+def test_streamed_batches_read_back_zero_copy_and_verify(tmp_path):
+    path = str(tmp_path / "snapshot")
+    vectors = np.arange(30, dtype=np.float32).reshape(10, 3)
+    with SnapshotWriter(path, dim=3, docs_format="jsonl", collection="laws") as writer:
+        for start in (0, 4, 8):
+            rows = range(start, min(start + 4, 10))
+            writer.write([100 + i for i in rows], vectors[start:start + 4],
+                         [{"text": f"نص {i}", "source": "article", "metadata": {"n": i}} for i in rows])
+
+    manifest = verify_snapshot(path)
+    assert manifest["count"] == 10 and manifest["collection"] == "laws"
+    mapped = open_vectors(path)
+    assert isinstance(mapped, np.memmap) and np.array_equal(mapped, vectors)
+    assert read_ids(path).tolist() == list(range(100, 110))
+    assert read_docs(path)[7] == {"text": "نص 7", "source": "article", "metadata": {"n": 7}}
+
+    with open(f"{path}/docs.jsonl", "a", encoding="utf-8") as f:
+        f.write("{}\n")
+    with pytest.raises(ValueError):
+        verify_snapshot(path)
@@ -0,0 +1,60 @@
+import os
+import asyncio
+import numpy as np
+
+os.environ.setdefault("SERVICE_API_KEY", "test-key")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from app.core.snapshot import write_snapshot
+from app.services.legal_entities import QueryEntityParser
+from app.services.lexical_index import BM25Index
+from app.services.local_vector_index import LocalVectorIndex
+from app.services.source_routing import apply_quotas, route_sources, source_quotas
+from app.services.vector_store_service import VectorStoreService
+
+parser = QueryEntityParser(laws=["قانون العقوبات"], courts=["تمييز جزائي"])
+
+
+def route(query):
+    return route_sources(query, parser.parse(query))
+
+
+def test_queries_route_to_statutes_rulings_or_both():
+    assert route("ما نص المادة ٢٤ من قانون العقوبات") == ["article"]
+    assert route("ما هي عقوبة السرقة في قانون العقوبات") == ["article"]
+    assert route("ما هي الاجتهادات في الصرف التعسفي") == ["ruling"]
+    assert route("قرارات محكمة التمييز الجزائية لعام 2021") == ["ruling"]
+    assert route("ما هي شروط الإيجار") == ["article", "ruling"]  # no cue: both
+    assert route("المواد والاجتهادات المتعلقة بالشيك بدون رصيد") == ["article", "ruling"]
+    assert route("إقرار المدين بالدين") == ["article", "ruling"]  # إقرار is not قرار
+
+
+def test_mixed_quotas_keep_both_sources_and_fill_short_ones():
+    assert source_quotas(["article", "ruling"], 5, ruling_share=0.4) == {"article": 3, "ruling": 2}
+    assert source_quotas(["ruling"], 5) == {"ruling": 5}
+    hits = [{"id": i, "source": "article"} for i in range(6)] + [{"id": 9, "source": "ruling"}]
+    assert [h["id"] for h in apply_quotas(hits, {"article": 3, "ruling": 2})] == [0, 1, 2, 3, 9]
+    assert [h["id"] for h in apply_quotas(hits, {"ruling": 2})] == [9]
+
+    index = BM25Index.build([{"id": 1, "text": "الشيك بدون رصيد", "source": "article", "metadata": {}},
+                             {"id": 2, "text": "قرار في الشيك بدون رصيد", "source": "ruling", "metadata": {}}])
+    assert [h["id"] for h in index.search("الشيك", limit=5, sources=["ruling"])] == [2]
+
+
+def test_partition_searches_run_per_source_and_merge_by_score(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((40, 16)).astype(np.float32)
+    docs = [{"text": f"doc {i}", "source": "ruling" if i % 4 == 0 else "article", "metadata": {}} for i in range(40)]
+    path = str(tmp_path / "snapshot")
+    write_snapshot(path, np.arange(40), vectors, docs)
+    store = VectorStoreService()
+    store.backend = "local"
+    store.local_index = LocalVectorIndex.load(path, dtype="float32", nlist=0)
+
+    hits = asyncio.run(store.search_sources(vectors[1], ["article", "ruling"], limit=4))
+    assert len(hits) == 8 and hits[0]["id"] == 1
+    assert [h["score"] for h in hits] == sorted((h["score"] for h in hits), reverse=True)
+    mixed = apply_quotas(hits, {"article": 3, "ruling": 1})
+    assert [h["source"] for h in mixed].count("ruling") == 1 and len(mixed) == 4
+    only_rulings = asyncio.run(store.search_sources(vectors[1], ["ruling"], limit=4))
+    assert {h["source"] for h in only_rulings} == {"ruling"}
@@ -0,0 +1,70 @@
+import re
+from types import SimpleNamespace as NS
+
+import data_pipeline.transfer_to_zilliz as transfer
+from data_pipeline.transfer_to_zilliz import TransferCheckpoint, insert_to_zilliz
+
+
+class FakeZilliz:
+    """Destination collection; `fail` maps an insert call number to the error it raises."""
+
+    def __init__(self, fail=None, commit_before_failing=False):
+        self.schema = NS(fields=[NS(name=n) for n in ("pk", "vector", "source_type", "text_content", "metadata")])
+        self.rows = []
+        self.inserts = 0
+        self.fail = fail or {}
+        self.commit_before_failing = commit_before_failing
+
+    def insert(self, columns):
+        self.inserts += 1
+        error = self.fail.get(self.inserts)
+        if error and not self.commit_before_failing:
+            raise error
+        self.rows.extend(columns[3])
+        if error:
+            raise error
+
+    def query(self, expr, output_fields, consistency_level):
+        first, last = map(int, re.findall(r"(\d+)", expr))
+        return [{"metadata": m} for m in self.rows if first <= m["source_pk"] <= last]
+
+    def flush(self):
+        pass
+
+
+def entities(pks):
+    return [{"pk": pk, "vector": [0.0], "source_type": "article", "text_content": f"t{pk}", "metadata": {}}
+            for pk in pks]
+
+
+def source_pks(zilliz):
+    return sorted(m["source_pk"] for m in zilliz.rows)
+
+
+def test_timed_out_insert_that_committed_is_not_inserted_again(tmp_path, monkeypatch):
+    monkeypatch.setattr(transfer.time, "sleep", lambda s: None)
+    zilliz = FakeZilliz(fail={1: TimeoutError("deadline exceeded")}, commit_before_failing=True)
+    checkpoint = TransferCheckpoint(str(tmp_path / "cp.json"), {"c": 1})
+    insert_to_zilliz(zilliz, [entities(range(1, 5))], checkpoint, workers=1)
+    assert source_pks(zilliz) == [1, 2, 3, 4] and checkpoint.last_pk == 4
+
+
+def test_resume_after_a_split_batch_skips_the_inserted_half(tmp_path, monkeypatch):
+    monkeypatch.setattr(transfer.time, "sleep", lambda s: None)
+    monkeypatch.setattr(transfer, "RETRIES", 2)
+    path = str(tmp_path / "cp.json")
+    # Batch 1 is too large; its first half goes in, its second half keeps failing
+    zilliz = FakeZilliz(fail={1: ValueError("message larger than max"), 3: OSError("down"), 4: OSError("down")})
+    checkpoint = TransferCheckpoint(path, {"c": 1})
+    try:
+        insert_to_zilliz(zilliz, [entities(range(1, 9))], checkpoint, workers=1)
+    except RuntimeError:
+        pass
+    assert source_pks(zilliz) == [1, 2, 3, 4]
+    assert checkpoint.last_pk is None and checkpoint.done_ranges == [[1, 4]]
+
+    resumed = TransferCheckpoint(path, {"c": 1})
+    zilliz.fail = {}
+    remaining = [e for e in entities(range(1, 9)) if not resumed.already_done(e["pk"])]
+    insert_to_zilliz(zilliz, [remaining], resumed, workers=1)
+    assert source_pks(zilliz) == list(range(1, 9)) and resumed.last_pk == 8
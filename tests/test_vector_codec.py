@@ -0,0 +1,26 @@
+import json
+import numpy as np
+
+from app.core.vector_codec import decode_vector, encode_vector
+
+VECTOR = np.linspace(-1, 1, 1536, dtype=np.float32)
+
+
+def test_float32_roundtrip_is_exact_and_zero_copy():
+    blob = encode_vector(VECTOR)
+    decoded = decode_vector(blob)
+    assert decoded.dtype == np.float32
+    assert np.array_equal(decoded, VECTOR)
+    assert not decoded.flags.owndata
+
+
+def test_compact_dtypes_stay_close():
+    for dtype, tolerance in (("float16", 1e-3), ("int8", 1e-2)):
+        decoded = decode_vector(encode_vector(VECTOR, dtype))
+        assert np.max(np.abs(decoded - VECTOR)) < tolerance
+
+
+def test_legacy_json_entries_still_decode():
+    legacy = json.dumps([0.5, -0.25, 1.0])
+    assert np.array_equal(decode_vector(legacy), [0.5, -0.25, 1.0])
+    assert np.array_equal(decode_vector(legacy.encode()), [0.5, -0.25, 1.0])